@@ -0,0 +1,472 @@
+"""Compares benchmark results to a baseline and fails on significant regressions.
+
+Results are the JSON files written by the benchmarks with ``--benchmark-json`` or saved
+with ``--benchmark-save`` (see ``tests/benchmarks/conftest.py``). The time per item
+(e.g. per constraint rewritten or per dependency of the project) of each benchmark is
+compared to the baseline's. A benchmark regressed when it is slower by more than the
+threshold and the slowdown is statistically significant: a one-sided Welch's t-test on
+the mean and standard deviation of the rounds of each run gives a p-value below alpha.
+
+By default, the latest saved run is compared to the run saved before it on a machine
+with the same fingerprint.
+
+Example
+-------
+
+Save a baseline, change the code, then compare a new run to the baseline:
+
+$ pytest tests/benchmarks --run-benchmarks --benchmark-save
+$ pytest tests/benchmarks --run-benchmarks --benchmark-save
+$ python ci/compare_benchmarks.py --threshold 10
+
+or compare two result files:
+
+$ python ci/compare_benchmarks.py benchmarks.json --baseline main.json
+
+The script exits with 1 if any benchmark regressed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+from statistics import NormalDist
+from typing import Any, NamedTuple
+
+SUPPORTED_VERSIONS = {1}
+
+STORAGE = Path('.benchmarks')
+
+# The maximum number of terms of the continued fraction of the incomplete beta function
+_MAX_ITERATIONS = 200
+_EPSILON = 1e-12
+
+
+class InvalidResultsError(ValueError):
+    def __init__(
+        self,
+        path: Path,
+        reason: str,
+    ) -> None:
+        super().__init__(f"Invalid benchmark results '{path}': {reason}.")
+
+
+class NoSavedRunError(Exception):
+    def __init__(
+        self,
+        storage: Path,
+    ) -> None:
+        super().__init__(
+            f"No benchmark run saved in '{storage}' to compare on this machine. Run"
+            " the benchmarks with '--benchmark-save' first.",
+        )
+
+
+class Comparison(NamedTuple):
+    """The time per item of a benchmark in the baseline and the current run."""
+
+    name: str
+    baseline: float | None
+    current: float | None
+    # The relative change, e.g. 0.1 if 10% slower
+    change: float | None
+    # The probability of a slowdown at least this large if there were none
+    p_value: float | None
+    verdict: str
+
+
+def load_results(path: Path) -> dict[str, Any]:
+    """Read a benchmark results file.
+
+    Parameters
+    ----------
+    path : Path
+        The file
+
+    Returns
+    -------
+    dict[str, Any]
+        The results
+
+    Raises
+    ------
+    InvalidResultsError
+        If the file is not valid JSON or has an unsupported format version
+    """
+    try:
+        results = json.loads(path.read_text(encoding='utf-8'))
+    except ValueError as exc:
+        raise InvalidResultsError(path, str(exc)) from exc
+
+    if not isinstance(results, dict) or results.get('version') not in SUPPORTED_VERSIONS:
+        raise InvalidResultsError(path, 'unsupported format version')
+
+    return results
+
+
+def _fingerprint(results: dict[str, Any]) -> str | None:
+    return results.get('machine', {}).get('fingerprint')
+
+
+def latest_run(storage: Path) -> Path:
+    """Return the latest saved run.
+
+    Parameters
+    ----------
+    storage : Path
+        The directory of saved runs
+
+    Returns
+    -------
+    Path
+        The run, saved runs being named after the time they were created
+
+    Raises
+    ------
+    NoSavedRunError
+        If no run was saved
+    """
+    saved = sorted(storage.glob('*.json'))
+    if not saved:
+        raise NoSavedRunError(storage)
+
+    return saved[-1]
+
+
+def find_baseline(storage: Path, current: Path) -> Path:
+    """Return the latest run saved before a run, on a machine with the same fingerprint.
+
+    Parameters
+    ----------
+    storage : Path
+        The directory of saved runs
+    current : Path
+        The run to compare
+
+    Returns
+    -------
+    Path
+        The baseline
+
+    Raises
+    ------
+    NoSavedRunError
+        If no earlier run was saved on the same machine
+    """
+    results = load_results(current)
+    fingerprint, created = _fingerprint(results), results.get('created', '')
+
+    for path in sorted(storage.glob('*.json'), reverse=True):
+        if path.resolve() == current.resolve():
+            continue
+
+        baseline = load_results(path)
+        if (
+            _fingerprint(baseline) == fingerprint
+            and baseline.get('created', '') < created
+        ):
+            return path
+
+    raise NoSavedRunError(storage)
+
+
+def _continued_fraction(a: float, b: float, x: float) -> float:
+    # The continued fraction of the incomplete beta function, by Lentz's method
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    fraction = d
+
+    for m in range(1, _MAX_ITERATIONS + 1):
+        for numerator in (
+            m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+            -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1)),
+        ):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            fraction *= c * d
+
+        if abs(c * d - 1.0) < _EPSILON:
+            break
+
+    return fraction
+
+
+def _incomplete_beta(a: float, b: float, x: float) -> float:
+    # The regularized incomplete beta function I_x(a, b)
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+
+    front = math.exp(
+        math.lgamma(a + b)
+        - math.lgamma(a)
+        - math.lgamma(b)
+        + a * math.log(x)
+        + b * math.log1p(-x),
+    )
+
+    # The continued fraction converges quickly on this side only
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _continued_fraction(a, b, x) / a
+
+    return 1.0 - front * _continued_fraction(b, a, 1.0 - x) / b
+
+
+def slowdown_p_value(
+    baseline: tuple[float, float, int],
+    current: tuple[float, float, int],
+) -> float:
+    """Return the p-value of a one-sided Welch's t-test that the current run is slower.
+
+    Parameters
+    ----------
+    baseline : tuple[float, float, int]
+        The mean, the standard deviation and the number of rounds of the baseline
+    current : tuple[float, float, int]
+        The mean, the standard deviation and the number of rounds of the current run
+
+    Returns
+    -------
+    float
+        The probability of a slowdown at least as large as the one measured if the
+        means were equal
+    """
+    (mean1, stdev1, n1), (mean2, stdev2, n2) = baseline, current
+    variance1, variance2 = stdev1**2 / n1, stdev2**2 / n2
+    variance = variance1 + variance2
+
+    if variance == 0.0:
+        return 0.0 if mean2 > mean1 else 1.0
+
+    t = (mean2 - mean1) / math.sqrt(variance)
+
+    # The Welch-Satterthwaite degrees of freedom; a single round adds no variance
+    denominator = sum(
+        v**2 / (n - 1) for v, n in ((variance1, n1), (variance2, n2)) if n > 1
+    )
+    if denominator == 0.0:
+        return 1.0 - NormalDist().cdf(t)
+
+    df = variance**2 / denominator
+
+    # The tail of the t distribution beyond |t|
+    tail = 0.5 * _incomplete_beta(df / 2, 0.5, df / (df + t * t))
+
+    return tail if t > 0 else 1.0 - tail
+
+
+def _per_item(benchmark: dict[str, Any]) -> tuple[float, float, int]:
+    return (
+        benchmark['mean'] / benchmark['items'],
+        benchmark['stdev'] / benchmark['items'],
+        benchmark['rounds'],
+    )
+
+
+def compare(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    *,
+    threshold: float,
+    alpha: float,
+) -> list[Comparison]:
+    """Compare the time per item of each benchmark of two runs.
+
+    Parameters
+    ----------
+    baseline : dict[str, Any]
+        The results of the baseline
+    current : dict[str, Any]
+        The results of the current run
+    threshold : float
+        The relative slowdown (or speedup) below which a change is ignored, e.g. 0.05
+    alpha : float
+        The p-value below which a change is significant, e.g. 0.05
+
+    Returns
+    -------
+    list[Comparison]
+        The comparison of each benchmark of either run, sorted by name
+    """
+    old = {f"{b['group']}::{b['name']}": b for b in baseline['benchmarks']}
+    new = {f"{b['group']}::{b['name']}": b for b in current['benchmarks']}
+
+    comparisons = []
+
+    for name in sorted(old.keys() | new.keys()):
+        if name not in new:
+            comparisons.append(
+                Comparison(name, _per_item(old[name])[0], None, None, None, 'missing'),
+            )
+            continue
+
+        if name not in old:
+            comparisons.append(
+                Comparison(name, None, _per_item(new[name])[0], None, None, 'new'),
+            )
+            continue
+
+        before, after = _per_item(old[name]), _per_item(new[name])
+        change = after[0] / before[0] - 1.0
+
+        # A speedup is tested like a slowdown of the baseline
+        p_value = (
+            slowdown_p_value(before, after)
+            if change >= 0
+            else slowdown_p_value(after, before)
+        )
+
+        if abs(change) <= threshold or p_value >= alpha:
+            verdict = 'unchanged'
+        elif change > 0:
+            verdict = 'regressed'
+        else:
+            verdict = 'improved'
+
+        comparisons.append(
+            Comparison(name, before[0], after[0], change, p_value, verdict),
+        )
+
+    return comparisons
+
+
+def _format_time(seconds: float | None) -> str:
+    if seconds is None:
+        return '-'
+
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.2f}{unit}'
+
+    return f'{seconds / 1e-9:.2f}ns'
+
+
+def _format_revision(results: dict[str, Any]) -> str:
+    revision = results.get('revision')
+    if not revision:
+        return 'unknown revision'
+
+    return f"{revision['commit'][:12]}{' (dirty)' if revision['dirty'] else ''}"
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            'Compare benchmark results to a baseline and exit with 1 on significant'
+            ' regressions.'
+        ),
+    )
+    parser.add_argument(
+        'current',
+        nargs='?',
+        type=Path,
+        help='The results to compare (default: the latest saved run).',
+    )
+    parser.add_argument(
+        '--baseline',
+        type=Path,
+        help=(
+            'The results to compare to (default: the run saved before the current one'
+            ' on the same machine).'
+        ),
+    )
+    parser.add_argument(
+        '--storage',
+        type=Path,
+        default=STORAGE,
+        help=f'The directory of saved runs (default: {STORAGE}).',
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=5.0,
+        help='The slowdown, in percent, a regression must exceed (default: 5).',
+    )
+    parser.add_argument(
+        '--alpha',
+        type=float,
+        default=0.05,
+        help='The significance level of a regression (default: 0.05).',
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Print the comparison of each benchmark and whether any regressed.
+
+    Parameters
+    ----------
+    argv : list[str] | None, optional
+        The command line arguments, by default ``None`` for ``sys.argv``
+
+    Returns
+    -------
+    int
+        1 if any benchmark regressed, 2 if the results could not be read, else 0.
+    """
+    args = _parse_args(argv)
+
+    try:
+        current_path = args.current or latest_run(args.storage)
+        baseline_path = args.baseline or find_baseline(args.storage, current_path)
+
+        baseline, current = load_results(baseline_path), load_results(current_path)
+    except (OSError, InvalidResultsError, NoSavedRunError) as exc:
+        print(f'ERROR: {exc}', file=sys.stderr)  # noqa: T201
+        return 2
+
+    # Console output is read by developers and CI logs
+    print(  # noqa: T201
+        f'Comparing {current_path} ({_format_revision(current)}) to {baseline_path}'
+        f' ({_format_revision(baseline)}).',
+    )
+
+    if _fingerprint(baseline) != _fingerprint(current):
+        print(  # noqa: T201
+            'WARNING: The runs are from different machines, so differ by more than'
+            ' the code.',
+        )
+
+    comparisons = compare(
+        baseline,
+        current,
+        threshold=args.threshold / 100,
+        alpha=args.alpha,
+    )
+
+    width = max((len(comparison.name) for comparison in comparisons), default=4)
+    print(  # noqa: T201
+        f"{'name':<{width}}  {'baseline':>10}  {'current':>10}  {'change':>8}"
+        f"  {'p':>6}  verdict",
+    )
+
+    for comparison in comparisons:
+        change = f'{comparison.change:+.1%}' if comparison.change is not None else '-'
+        p_value = f'{comparison.p_value:.3f}' if comparison.p_value is not None else '-'
+        print(  # noqa: T201
+            f'{comparison.name:<{width}}  {_format_time(comparison.baseline):>10}'
+            f'  {_format_time(comparison.current):>10}  {change:>8}  {p_value:>6}'
+            f'  {comparison.verdict}',
+        )
+
+    regressions = [c for c in comparisons if c.verdict == 'regressed']
+
+    print(  # noqa: T201
+        f'{len(regressions)} of {len(comparisons)} benchmarks regressed by more than'
+        f' {args.threshold:g}% (p < {args.alpha:g}); times are per item.',
+    )
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
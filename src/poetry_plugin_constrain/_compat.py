@@ -0,0 +1,13 @@
+"""Compatibility shims for the supported Python versions."""
+
+from __future__ import annotations
+
+import sys
+
+if sys.version_info < (3, 11):
+    # ``tomllib`` was added to the standard library in Python 3.11
+    import tomli as tomllib
+else:
+    import tomllib
+
+__all__ = ['tomllib']
@@ -0,0 +1,189 @@
+"""Report the versions a constraint rewrite newly admits without running the solver.
+
+Whenever ``poetry`` resolves a package, it caches the release information of every
+version it inspects in a per-repository file cache (see
+``poetry.repositories.cached_repository.CachedRepository``). The versions found there
+are used to compare what the old and the new constraint of each rewritten dependency
+allow.
+
+Scanning and parsing the release caches is the expensive part, so the sorted version
+lists are stored in an index file in the plugin cache directory. The index is reused
+across runs for as long as the number of cached releases and their latest modification
+time stay the same.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from bisect import bisect_left, bisect_right
+from contextlib import suppress
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+from packaging.utils import canonicalize_name
+from poetry.core.constraints.version import Version
+from poetry.core.version.exceptions import InvalidVersion
+
+from poetry_plugin_constrain.tracing import span
+from poetry_plugin_constrain.verify import constraint_intervals
+
+if TYPE_CHECKING:
+    from poetry.core.constraints.version import VersionConstraint
+
+INDEX_FILE_NAME = 'admitted-versions.json'
+INDEX_FORMAT_VERSION = 1
+
+# ``poetry.utils.cache.FileCache`` prefixes each payload with a 10 digit expiry
+_EXPIRY_LENGTH = 10
+
+
+def _iter_release_cache_files(directory: Path) -> Iterator[os.DirEntry]:
+    """Yield the release cache files of a repository cache directory.
+
+    Sub-directories starting with an underscore (e.g. ``_http``) hold other caches.
+    """
+    with suppress(FileNotFoundError), os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                if not entry.name.startswith('_'):
+                    yield from _iter_release_cache_files(Path(entry.path))
+            else:
+                yield entry
+
+
+def _fingerprint(files: list[os.DirEntry]) -> list[int]:
+    return [len(files), max((entry.stat().st_mtime_ns for entry in files), default=0)]
+
+
+def _scan(files: list[os.DirEntry]) -> dict[str, list[str]]:
+    versions: dict[str, set[str]] = {}
+
+    for entry in files:
+        try:
+            with open(entry.path, encoding='utf-8') as file:  # noqa: PTH123
+                data = json.loads(file.read()[_EXPIRY_LENGTH:])
+            name = canonicalize_name(data['name'])
+            version = Version.parse(data['version'])
+        except (OSError, ValueError, KeyError, TypeError, InvalidVersion):
+            # Not a release cache entry, or it is corrupt
+            continue
+
+        versions.setdefault(name, set()).add(version.to_string())
+
+    return {
+        name: sorted(_versions, key=Version.parse) for name, _versions in versions.items()
+    }
+
+
+def _write_index(path: Path, index: dict[str, Any]) -> None:
+    with span('write-admitted-index', 'write', path=path):
+        # Write atomically so concurrent runs never read a partially written index
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(index, file, separators=(',', ':'))
+            Path(tmp).replace(path)
+        except BaseException:
+            with suppress(OSError):
+                Path(tmp).unlink()
+            raise
+
+
+def load_cached_versions(
+    repository_directories: Iterable[Path],
+    index_path: Path,
+    names: Iterable[str] | None = None,
+) -> dict[str, list[str]]:
+    """Return the cached versions of packages, sorted from oldest to newest.
+
+    Parameters
+    ----------
+    repository_directories : Iterable[Path]
+        The cache directories of the repositories to read
+    index_path : Path
+        The index file storing the sorted version lists across runs
+    names : Iterable[str] | None, optional
+        The canonical names of the packages to return, by default all of them
+
+    Returns
+    -------
+    dict[str, list[str]]
+        The sorted versions of each package keyed by canonical package name
+    """
+    index: dict[str, Any] = {}
+    with suppress(OSError, ValueError):
+        index = json.loads(index_path.read_text(encoding='utf-8'))
+    if index.get('format') != INDEX_FORMAT_VERSION:
+        index = {'format': INDEX_FORMAT_VERSION, 'repositories': {}}
+
+    versions: dict[str, list[list[str]]] = {}
+    changed = False
+
+    for directory in repository_directories:
+        files = list(_iter_release_cache_files(directory))
+        fingerprint = _fingerprint(files)
+
+        cached = index['repositories'].get(str(directory))
+        if cached is None or cached['fingerprint'] != fingerprint:
+            cached = {'fingerprint': fingerprint, 'packages': _scan(files)}
+            index['repositories'][str(directory)] = cached
+            changed = True
+
+        for name, _versions in cached['packages'].items():
+            versions.setdefault(name, []).append(_versions)
+
+    if changed:
+        with suppress(OSError):
+            _write_index(index_path, index)
+
+    # Lists are only re-sorted for packages cached by several repositories
+    return {
+        name: (
+            lists[0]
+            if len(lists) == 1
+            else sorted({v for _versions in lists for v in _versions}, key=Version.parse)
+        )
+        for name, lists in versions.items()
+        if names is None or name in names
+    }
+
+
+def newly_admitted(
+    versions: list[Version],
+    old: VersionConstraint,
+    new: VersionConstraint,
+) -> list[Version]:
+    """Return the versions allowed by the new constraint but not by the old one.
+
+    Parameters
+    ----------
+    versions : list[Version]
+        The available versions, sorted from oldest to newest
+    old : VersionConstraint
+        The constraint before the rewrite
+    new : VersionConstraint
+        The constraint after the rewrite
+
+    Returns
+    -------
+    list[Version]
+        The newly admitted versions, sorted from oldest to newest
+    """
+
+    def _allowed(constraint: VersionConstraint) -> set[int]:
+        indices: set[int] = set()
+        for interval in constraint_intervals(constraint):
+            lo, hi = 0, len(versions)
+            if interval.min is not None:
+                bisect = bisect_left if interval.include_min else bisect_right
+                lo = bisect(versions, interval.min)
+            if interval.max is not None:
+                bisect = bisect_right if interval.include_max else bisect_left
+                hi = bisect(versions, interval.max)
+            indices.update(range(lo, hi))
+        return indices
+
+    return [versions[i] for i in sorted(_allowed(new) - _allowed(old))]
@@ -0,0 +1,277 @@
+"""Run ``poetry constrain`` over many projects of a repository in a process pool.
+
+Running ``poetry constrain`` in every project directory pays for an interpreter
+startup and a ``poetry`` and plugin import per project. Instead, the projects found
+under a root directory are handed to a pool of worker processes, each of which imports
+``poetry`` once when it starts and then constrains every project it is given with a
+fresh ``Application`` writing to in-memory buffers. Results are yielded as soon as
+each project completes.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, NamedTuple, TypeVar
+
+from poetry_plugin_constrain._compat import tomllib
+from poetry_plugin_constrain.utils import deep_get
+
+_T = TypeVar('_T')
+_R = TypeVar('_R')
+
+# Directories that never contain projects of their own
+EXCLUDED_DIRECTORIES = frozenset(
+    [
+        'node_modules',
+        '__pycache__',
+        'build',
+        'dist',
+        'site-packages',
+        'venv',
+    ],
+)
+
+
+class ProjectResult(NamedTuple):
+    """The outcome of constraining a single project."""
+
+    path: Path
+    status: int
+    output: str
+    error: str
+    report: dict | None = None
+
+
+def is_poetry_project(path: Path) -> bool:
+    """Return whether a directory holds a ``poetry`` project.
+
+    Parameters
+    ----------
+    path : Path
+        The directory to check
+
+    Returns
+    -------
+    bool
+        ``True`` if ``pyproject.toml`` exists and has a ``[tool.poetry]`` table
+    """
+    try:
+        with (path / 'pyproject.toml').open('rb') as file:
+            data = tomllib.load(file)
+    except FileNotFoundError:
+        return False
+    except tomllib.TOMLDecodeError:
+        # Let the worker report the error for the project
+        return True
+
+    return deep_get(data, ['tool', 'poetry']) is not None
+
+
+def discover_projects(root: Path) -> list[Path]:
+    """Return the ``poetry`` projects found under a root directory.
+
+    Hidden directories (e.g. ``.git`` or ``.venv``) and directories in
+    ``EXCLUDED_DIRECTORIES`` are not searched.
+
+    Parameters
+    ----------
+    root : Path
+        The directory to search
+
+    Returns
+    -------
+    list[Path]
+        The project directories, sorted
+    """
+    projects = []
+
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = [
+            name
+            for name in subdirectories
+            if not name.startswith('.') and name not in EXCLUDED_DIRECTORIES
+        ]
+
+        if 'pyproject.toml' in files and is_poetry_project(Path(directory)):
+            projects.append(Path(directory))
+
+    return sorted(projects)
+
+
+def projects_from_files(files: Iterable[Path]) -> list[Path]:
+    """Return the ``poetry`` projects owning the given files, e.g. staged by ``git``.
+
+    Parameters
+    ----------
+    files : Iterable[Path]
+        Paths to ``pyproject.toml`` files or to project directories
+
+    Returns
+    -------
+    list[Path]
+        The project directories, without duplicates and sorted. Files that are not
+        part of a ``poetry`` project are left out.
+    """
+    directories = {path if path.is_dir() else path.parent for path in files}
+
+    return sorted(path for path in directories if is_poetry_project(path))
+
+
+def _initialize_worker() -> None:
+    """Import ``poetry`` once per worker process."""
+    # Only has an effect when workers are spawned rather than forked
+    import poetry.console.application
+    import poetry.factory  # noqa: F401
+
+
+def run_project(
+    path: Path,
+    args: list[str],
+    *,
+    report: bool = False,
+    command: str = 'constrain',
+) -> ProjectResult:
+    """Run ``poetry constrain`` in a project and capture its output.
+
+    Parameters
+    ----------
+    path : Path
+        The project directory
+    args : list[str]
+        The arguments passed to ``poetry constrain``
+    report : bool, optional
+        Whether to return the report entry of the project, by default ``False``
+    command : str, optional
+        The ``poetry`` command to run instead, by default ``'constrain'``
+
+    Returns
+    -------
+    ProjectResult
+        The exit code and output of the command
+    """
+    from cleo.io.inputs.argv_input import ArgvInput
+    from cleo.io.outputs.buffered_output import BufferedOutput
+    from poetry.console.application import Application
+    from poetry.factory import Factory
+
+    output = BufferedOutput()
+    error_output = BufferedOutput()
+    entry = None
+
+    with tempfile.TemporaryDirectory() as directory:
+        report_path = Path(directory) / 'report.json'
+        if report:
+            args = [*args, '--report-json', str(report_path)]
+
+        try:
+            application = Application()
+            application.auto_exits(False)  # noqa: FBT003
+            application._poetry = Factory().create_poetry(cwd=path)
+
+            status = application.run(
+                ArgvInput(['poetry', command, *args]),
+                output,
+                error_output,
+            )
+        except Exception as exc:  # noqa: BLE001 # pylint: disable=W0718
+            # Report e.g. an invalid pyproject.toml as a failure of the project only
+            error_output.write_line(str(exc))
+            status = 1
+
+        if report:
+            entry = {'status': status, 'groups': {}}
+            if report_path.exists():
+                (entry,) = json.loads(report_path.read_text())['projects'].values()
+
+    return ProjectResult(path, status, output.fetch(), error_output.fetch(), entry)
+
+
+def _apply(function: Callable[[_T], _R], chunk: list[_T]) -> list[_R]:
+    return [function(item) for item in chunk]
+
+
+def imap_unordered(
+    function: Callable[[_T], _R],
+    items: Iterable[_T],
+    jobs: int | None = None,
+    initializer: Callable[[], None] | None = None,
+    chunksize: int = 1,
+) -> Iterator[_R]:
+    """Apply a function to items in a process pool, yielding results as they complete.
+
+    Parameters
+    ----------
+    function : Callable[[_T], _R]
+        A picklable (i.e. module level) function
+    items : Iterable[_T]
+        The items to apply the function to
+    jobs : int | None, optional
+        The number of worker processes, by default the number of CPUs. With a single
+        job, the items are processed in the current process.
+    initializer : Callable[[], None] | None, optional
+        Called once in each worker process when it starts, by default ``None``
+    chunksize : int, optional
+        The number of items sent to a worker at once, by default 1. Larger chunks
+        reduce the inter-process overhead of cheap functions.
+
+    Yields
+    ------
+    _R
+        The result of each item in order of completion
+    """
+    items = list(items)
+    jobs = min(jobs or os.cpu_count() or 1, len(items))
+
+    if jobs <= 1:
+        yield from map(function, items)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer) as pool:
+        futures = [
+            pool.submit(_apply, function, items[i : i + chunksize])
+            for i in range(0, len(items), chunksize)
+        ]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def run_projects(
+    projects: Iterable[Path],
+    args: list[str],
+    jobs: int | None = None,
+    *,
+    report: bool = False,
+    command: str = 'constrain',
+) -> Iterator[ProjectResult]:
+    """Run ``poetry constrain`` in many projects, yielding results as they complete.
+
+    Parameters
+    ----------
+    projects : Iterable[Path]
+        The project directories
+    args : list[str]
+        The arguments passed to ``poetry constrain`` in each project
+    jobs : int | None, optional
+        The number of worker processes, by default the number of CPUs. With a single
+        job, projects are constrained in the current process.
+    report : bool, optional
+        Whether to return the report entry of each project, by default ``False``
+    command : str, optional
+        The ``poetry`` command to run instead, by default ``'constrain'``
+
+    Returns
+    -------
+    Iterator[ProjectResult]
+        The result of each project in order of completion
+    """
+    return imap_unordered(
+        partial(run_project, args=args, report=report, command=command),
+        projects,
+        jobs=jobs,
+        initializer=_initialize_worker,
+    )
@@ -0,0 +1,114 @@
+"""Find the dependency entries of a ``pyproject.toml`` changed since a ``git`` revision.
+
+Most commits touch ``pyproject.toml`` for reasons unrelated to dependencies (e.g. a
+version bump or tool configuration). The dependency tables of the file are compared
+with those of a base version read from ``git``, so ``poetry constrain`` can skip the
+run when they did not change, and otherwise only inspect the added or modified entries:
+
+- ``--since <ref>`` compares the working tree with the revision ``ref``
+- ``--staged`` compares the index with ``HEAD``, as a ``pre-commit`` hook sees them
+"""
+
+from __future__ import annotations
+
+import subprocess
+from typing import TYPE_CHECKING, Any
+
+from poetry_plugin_constrain._compat import tomllib
+from poetry_plugin_constrain.tables import (
+    TableDiff,
+    dependency_tables,
+    diff_tables,
+    parse_dependency_tables,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class GitError(RuntimeError):
+    def __init__(
+        self,
+        command: list[str],
+        message: str,
+    ) -> None:
+        super().__init__(f"'git {' '.join(command)}' failed: {message.strip()}")
+
+
+def _git(directory: Path, *args: str) -> subprocess.CompletedProcess[str]:
+    try:
+        return subprocess.run(  # noqa: S603
+            ['git', *args],  # noqa: S607
+            cwd=directory,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except FileNotFoundError as exc:
+        raise GitError(list(args), 'git is not installed') from exc
+
+
+def _revision_exists(directory: Path, revision: str) -> bool:
+    process = _git(
+        directory, 'rev-parse', '--verify', '--quiet', f'{revision}^{{commit}}'
+    )
+    return process.returncode == 0
+
+
+def _read_tables(directory: Path, spec: str) -> dict[str, dict[str, Any]]:
+    # The file may not exist in the revision (e.g. a new project)
+    process = _git(directory, 'show', spec)
+    if process.returncode != 0:
+        return {}
+
+    return parse_dependency_tables(tomllib.loads(process.stdout))
+
+
+def changed_entries(
+    path: Path,
+    *,
+    since: str | None = None,
+    staged: bool = False,
+) -> TableDiff:
+    """Return the dependency entries of a ``pyproject.toml`` changed in ``git``.
+
+    Parameters
+    ----------
+    path : Path
+        The ``pyproject.toml`` file
+    since : str | None, optional
+        The revision to compare the working tree with, by default ``None``
+    staged : bool, optional
+        Whether to compare the index with ``HEAD`` instead, by default ``False``
+
+    Returns
+    -------
+    TableDiff
+        The entries added or modified, and the names of the entries removed, by group
+
+    Raises
+    ------
+    GitError
+        If ``path`` is not in a ``git`` repository or ``since`` is not a revision
+    """
+    directory = path.parent
+    # Relative to ``directory``, so the file is found from any project of a repository
+    name = f'./{path.name}'
+
+    process = _git(directory, 'rev-parse', '--is-inside-work-tree')
+    if process.returncode != 0:
+        raise GitError(['rev-parse', '--is-inside-work-tree'], process.stderr)
+
+    base = 'HEAD' if staged else since or 'HEAD'
+
+    if _revision_exists(directory, base):
+        old = _read_tables(directory, f'{base}:{name}')
+    elif staged:
+        # No commit yet, so everything staged is new
+        old = {}
+    else:
+        raise GitError(['rev-parse', '--verify', base], f"unknown revision '{base}'")
+
+    new = _read_tables(directory, f':{name}') if staged else dependency_tables(path)
+
+    return diff_tables(old, new)
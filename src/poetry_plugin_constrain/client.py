@@ -0,0 +1,278 @@
+"""A thin client sending ``poetry constrain`` requests to the ``constrain`` daemon.
+
+The ``poetry-constrain`` script takes the same arguments as ``poetry constrain``. When a
+daemon (``poetry constrain daemon``) is listening on the socket, the request is run by
+the daemon, which keeps ``poetry`` imported and the parsed projects cached between
+requests. Otherwise, ``poetry constrain`` is run in this process, and so are the
+requests the daemon cannot serve (see ``runs_in_process``). A request the daemon does
+not answer in time is run in this process only if it cannot write (see ``is_read_only``),
+since the daemon may still be writing the project.
+
+Only the standard library is imported until the client falls back to running in
+process, so that starting the client stays cheap.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+# Overrides the path of the socket the daemon listens on
+SOCKET_ENV_VAR = 'POETRY_PLUGIN_CONSTRAIN_SOCKET'
+
+# Overrides the seconds to wait for the daemon to answer a request
+TIMEOUT_ENV_VAR = 'POETRY_PLUGIN_CONSTRAIN_TIMEOUT'
+
+# Seconds to wait for the daemon to accept a connection
+CONNECT_TIMEOUT = 1.0
+
+# Seconds to wait for the daemon to answer a request, by default. Solving with ``--lock``
+# or ``--update`` may take minutes.
+RESPONSE_TIMEOUT = 300.0
+
+# The daemon serves one request at a time, so ``--watch``, which runs until interrupted,
+# would block every other client. ``filter`` reads the standard input of the client, and
+# ``daemon`` would start a daemon in the daemon.
+_IN_PROCESS_COMMANDS = ('filter', 'daemon')
+_IN_PROCESS_OPTIONS = ('--watch',)
+
+# ``--check`` writes the project with ``--lock`` or ``--update``
+_WRITE_OPTIONS = ('--lock', '--update')
+
+
+class DaemonUnavailableError(OSError):
+    def __init__(
+        self,
+        path: Path,
+    ) -> None:
+        super().__init__(f"No 'poetry constrain' daemon is listening on '{path}'.")
+
+
+class DaemonTimeoutError(OSError):
+    def __init__(
+        self,
+        path: Path,
+        timeout: float,
+    ) -> None:
+        super().__init__(
+            f"The 'poetry constrain' daemon listening on '{path}' did not answer within"
+            f' {timeout:g} seconds.',
+        )
+
+
+def is_supported() -> bool:
+    """Return whether the platform supports the Unix sockets the daemon listens on.
+
+    Returns
+    -------
+    bool
+        ``True`` if Unix sockets are supported
+    """
+    return hasattr(socket, 'AF_UNIX')
+
+
+def socket_path() -> Path:
+    """Return the path of the socket the daemon listens on.
+
+    Returns
+    -------
+    Path
+        ``POETRY_PLUGIN_CONSTRAIN_SOCKET`` if set, else a socket in the user's runtime
+        directory (``XDG_RUNTIME_DIR``) or in a private directory of the temporary
+        directory
+    """
+    if os.environ.get(SOCKET_ENV_VAR):
+        return Path(os.environ[SOCKET_ENV_VAR])
+
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return Path(os.environ['XDG_RUNTIME_DIR']) / 'poetry-plugin-constrain.sock'
+
+    user = os.getuid() if hasattr(os, 'getuid') else os.getlogin()
+    return Path(tempfile.gettempdir()) / f'poetry-plugin-constrain-{user}' / 'daemon.sock'
+
+
+def response_timeout() -> float:
+    """Return the seconds to wait for the daemon to answer a request.
+
+    Returns
+    -------
+    float
+        ``POETRY_PLUGIN_CONSTRAIN_TIMEOUT`` if set to a positive number, else
+        ``RESPONSE_TIMEOUT``
+    """
+    try:
+        timeout = float(os.environ.get(TIMEOUT_ENV_VAR, ''))
+    except ValueError:
+        return RESPONSE_TIMEOUT
+
+    return timeout if timeout > 0 else RESPONSE_TIMEOUT
+
+
+def runs_in_process(args: list[str]) -> bool:
+    """Return whether a request cannot be served by the daemon.
+
+    Parameters
+    ----------
+    args : list[str]
+        The arguments passed to ``poetry constrain``
+
+    Returns
+    -------
+    bool
+        ``True`` for ``--watch`` and the ``filter`` and ``daemon`` subcommands
+    """
+    if any(arg in _IN_PROCESS_OPTIONS for arg in args):
+        return True
+
+    # The subcommand is the first argument, e.g. ``poetry constrain -v filter``
+    positional = [arg for arg in args if not arg.startswith('-')]
+    return bool(positional) and positional[0] in _IN_PROCESS_COMMANDS
+
+
+def is_read_only(args: list[str]) -> bool:
+    """Return whether a request cannot write the project.
+
+    Parameters
+    ----------
+    args : list[str]
+        The arguments passed to ``poetry constrain``
+
+    Returns
+    -------
+    bool
+        ``True`` for ``--dry-run``, and for ``--check`` without ``--lock`` or ``--update``
+    """
+    if '--dry-run' in args:
+        return True
+
+    return '--check' in args and not any(arg in _WRITE_OPTIONS for arg in args)
+
+
+def request(
+    payload: dict[str, Any],
+    path: Path | None = None,
+    timeout: float | None = None,
+) -> dict[str, Any]:
+    """Send a request to the daemon and return its response.
+
+    Parameters
+    ----------
+    payload : dict[str, Any]
+        The request
+    path : Path | None, optional
+        The socket of the daemon, by default ``socket_path()``
+    timeout : float | None, optional
+        The seconds to wait for the response, by default ``response_timeout()``
+
+    Returns
+    -------
+    dict[str, Any]
+        The response
+
+    Raises
+    ------
+    DaemonUnavailableError
+        If no daemon is listening on the socket, or Unix sockets are not supported
+    DaemonTimeoutError
+        If the daemon does not answer in time, e.g. if it is stuck
+    """
+    path = path or socket_path()
+
+    if not is_supported():
+        raise DaemonUnavailableError(path)
+
+    timeout = response_timeout() if timeout is None else timeout
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(CONNECT_TIMEOUT)
+        try:
+            client.connect(str(path))
+        except (FileNotFoundError, ConnectionRefusedError, socket.timeout) as exc:
+            raise DaemonUnavailableError(path) from exc
+
+        client.settimeout(timeout)
+        try:
+            client.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+
+            with client.makefile('rb') as file:
+                return json.loads(file.readline())
+        except socket.timeout as exc:
+            raise DaemonTimeoutError(path, timeout) from exc
+
+
+def run_in_process(args: list[str]) -> int:
+    """Run ``poetry constrain`` in this process.
+
+    Parameters
+    ----------
+    args : list[str]
+        The arguments passed to ``poetry constrain``
+
+    Returns
+    -------
+    int
+        The exit code of the command
+    """
+    from cleo.io.inputs.argv_input import ArgvInput
+    from poetry.console.application import Application
+
+    application = Application()
+    application.auto_exits(False)  # noqa: FBT003
+
+    return application.run(ArgvInput(['poetry', 'constrain', *args]))
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run ``poetry constrain`` in the daemon, or in this process if it cannot.
+
+    A read-only request the daemon does not answer in time is run in this process, any
+    other request fails.
+
+    Parameters
+    ----------
+    argv : list[str] | None, optional
+        The arguments passed to ``poetry constrain``, by default ``sys.argv[1:]``
+
+    Returns
+    -------
+    int
+        The exit code of the command
+    """
+    args = sys.argv[1:] if argv is None else argv
+
+    if runs_in_process(args):
+        return run_in_process(args)
+
+    try:
+        response = request(
+            {
+                'cwd': str(Path.cwd()),
+                'args': args,
+                'decorated': sys.stdout.isatty(),
+            },
+        )
+    except DaemonTimeoutError as exc:
+        if is_read_only(args):
+            sys.stderr.write(f'{exc} Running in this process instead.\n')
+            return run_in_process(args)
+
+        # The daemon may still be writing the project, so running the request again
+        # could write it concurrently
+        sys.stderr.write(f'ERROR: {exc} The request may still be running in it.\n')
+        return 1
+    except DaemonUnavailableError:
+        return run_in_process(args)
+
+    sys.stdout.write(response['output'])
+    sys.stderr.write(response['error'])
+
+    return response['status']
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,16 +11,36 @@
 
 from __future__ import annotations
 
+import sys
+from contextlib import suppress
 from enum import IntEnum
-from typing import TYPE_CHECKING
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-from cleo.helpers import option
+from cleo.helpers import argument, option
+from cleo.io.outputs.output import Type as OutputType
 from cleo.io.outputs.output import Verbosity
-from poetry.console.commands.installer_command import InstallerCommand
-from poetry.core.factory import Factory
-from poetry.core.packages.dependency_group import MAIN_GROUP
-
-from poetry_plugin_constrain.config import get_config_variable
+from packaging.utils import canonicalize_name
+from poetry.console.commands.command import Command
+from poetry.console.commands.group_command import GroupCommand
+from poetry.core.constraints.version import Version, parse_constraint
+
+from poetry_plugin_constrain.config import (
+    get_cache_directory,
+    get_config_variable,
+    get_document_config_variable,
+    is_memory_tracing_enabled,
+    is_profiling_enabled,
+    read_pyproject,
+)
+from poetry_plugin_constrain.pipeline import discover, group_table, patch, rewrite
+from poetry_plugin_constrain.profiling import NULL_PROFILER, create_profiler
+from poetry_plugin_constrain.tracing import (
+    InvalidListenerError,
+    load_listeners,
+    span,
+    tracing_session,
+)
 from poetry_plugin_constrain.utils import (
     CONSTRAINT_TYPES,
     Style,
@@ -28,13 +48,25 @@ from poetry_plugin_constrain.utils import (
     line,
     line_error,
     print_group_header,
-    replace_constraint_from_dependency,
+    print_project_header,
     run_installer_update,
 )
 
 if TYPE_CHECKING:
+    from collections import Counter
+
+    from cleo.io.inputs.argument import Argument
     from cleo.io.inputs.option import Option
     from poetry.core.packages.dependency import Dependency
+    from poetry.installation.installer import Installer
+    from poetry.utils.env import Env
+
+    from poetry_plugin_constrain.inventory import Inventory
+    from poetry_plugin_constrain.linked import Snapshot
+    from poetry_plugin_constrain.profiling import NullProfiler
+    from poetry_plugin_constrain.sharding import Shard
+    from poetry_plugin_constrain.tables import TableDiff
+    from poetry_plugin_constrain.verify import Project
 
 
 class Error(IntEnum):
@@ -43,6 +75,19 @@ class Error(IntEnum):
     NO_DEPENDENCIES_FOUND: int = 3
     NO_INSTALLER_FOUND: int = 4
     INSTALLER_UPDATE_FAILED: int = 5
+    POLICY_VIOLATIONS_FOUND: int = 6
+    NO_PROJECTS_FOUND: int = 7
+    INVALID_JOBS: int = 8
+    INVALID_PYPROJECT: int = 9
+    INVALID_SHARD: int = 10
+    INCOMPLETE_SHARDS: int = 11
+    INVALID_REPORT: int = 12
+    DEPENDENCY_CYCLE_FOUND: int = 13
+    DAEMON_ALREADY_RUNNING: int = 14
+    DAEMON_NOT_SUPPORTED: int = 15
+    INCOMPATIBLE_OPTIONS: int = 16
+    GIT_DIFF_FAILED: int = 17
+    INVALID_TRACE_LISTENER: int = 18
 
 
 PRETTY_CONSTRAINT_TYPES = '\n'.join(
@@ -50,11 +95,196 @@ PRETTY_CONSTRAINT_TYPES = '\n'.join(
 )
 
 
-class ConstrainCommand(InstallerCommand):
+def _is_valid_jobs(jobs: str | None) -> bool:
+    return jobs is None or (jobs.isdigit() and int(jobs) > 0)
+
+
+def _invalid_jobs_message(jobs: str | None) -> str:
+    return f"ERROR: '--jobs' must be a positive integer, got {jobs!r}."
+
+
+def _relative(path: Path, root: Path) -> str:
+    # Report and shard keys must not depend on where the repository is checked out
+    try:
+        return path.resolve().relative_to(root.resolve()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def _parse_shard_option(command: Command) -> Shard | None:
+    """Return the shard given with ``--shard``, if any.
+
+    Raises
+    ------
+    InvalidShardError
+        If the shard is not of the form ``'i/N'``
+    """
+    from poetry_plugin_constrain.sharding import parse_shard
+
+    value = command.option('shard')
+    return parse_shard(value) if value else None
+
+
+def _shard_projects(projects: list[Path], root: Path, shard: Shard) -> list[Path]:
+    """Return the projects assigned to a shard, balanced by dependency count."""
+    from poetry_plugin_constrain.sharding import project_weight, select_shard
+
+    keys = {project: _relative(project, root) for project in projects}
+    selected = set(
+        select_shard(
+            {keys[project]: project_weight(project) for project in projects}, shard
+        ),
+    )
+    return [project for project in projects if keys[project] in selected]
+
+
+def _check_constraint_types(command: Command, old: str, new: str) -> int:
+    """Print an error and return its code if a constraint type is invalid, else 0."""
+    for kind, value, error in (
+        ('old', old, Error.INVALID_OLD_CONSTRAINT),
+        ('new', new, Error.INVALID_NEW_CONSTRAINT),
+    ):
+        if value not in CONSTRAINT_TYPES:
+            line_error(
+                io=command.io,
+                message=(
+                    f"ERROR: '{kind}' constraint '{value}' is invalid. Please use one of"
+                    f' the following:\n'
+                    f'{PRETTY_CONSTRAINT_TYPES}'
+                ),
+                style=Style.ERROR,
+            )
+            return error
+
+    return 0
+
+
+def _forwarded_args(command: Command, excluded: tuple[str, ...]) -> list[str]:
+    """Return the options given to a command to pass on to each project.
+
+    Options left at their default value are not passed, so each project's own
+    configuration still applies.
+
+    Parameters
+    ----------
+    command : Command
+        The command whose options are forwarded
+    excluded : tuple[str, ...]
+        The options that are not forwarded
+
+    Returns
+    -------
+    list[str]
+        The command line arguments
+    """
+    args = []
+
+    for opt in command.options:
+        if opt.name in excluded:
+            continue
+
+        value = command.option(opt.name)
+        if value in (None, False, [], opt.default):
+            continue
+
+        if opt.is_flag():
+            args.append(f'--{opt.name}')
+        else:
+            for _value in value if opt.is_list() else [value]:
+                args.extend([f'--{opt.name}', str(_value)])
+
+    return args
+
+
+def _run_batch(
+    command: Command,
+    root: Path,
+    projects: list[Path],
+    args: list[str],
+    jobs: int | None,
+    entries: dict[str, dict],
+    *,
+    report: bool = False,
+    name: str = 'constrain',
+) -> list[tuple[Path, int]]:
+    """Run a command in many projects, printing each report as it completes.
+
+    Parameters
+    ----------
+    command : Command
+        The command printing the reports
+    root : Path
+        The directory the projects were found under
+    projects : list[Path]
+        The project directories
+    args : list[str]
+        The arguments passed to the command in each project
+    jobs : int | None
+        The number of worker processes
+    entries : dict[str, dict]
+        The report entry of each project, updated in place
+    report : bool, optional
+        Whether to collect the report entry of each project, by default ``False``
+    name : str, optional
+        The ``poetry`` command to run, by default ``'constrain'``
+
+    Returns
+    -------
+    list[tuple[Path, int]]
+        The projects that failed and their exit codes
+    """
+    from cleo.formatters.formatter import Formatter
+
+    from poetry_plugin_constrain.batch import run_projects
+
+    failed: list[tuple[Path, int]] = []
+
+    for result in run_projects(
+        projects,
+        args,
+        jobs=jobs,
+        report=report,
+        command=name,
+    ):
+        if result.report is not None:
+            entries[_relative(result.path, root)] = result.report
+
+        print_project_header(command.io, result.path)
+        if result.output:
+            command.io.write(Formatter.escape(result.output))
+        if result.error:
+            command.io.write_error(Formatter.escape(result.error))
+
+        if result.status != 0:
+            failed.append((result.path, result.status))
+
+    line(
+        io=command.io,
+        message=(
+            f"{'Constrained' if name == 'constrain' else f'Ran {name!r} in'}"
+            f' {len(projects)} projects: {len(projects) - len(failed)} succeeded,'
+            f' {len(failed)} failed.'
+        ),
+        style=Style.INFO,
+    )
+
+    for path, status in sorted(failed):
+        line_error(
+            io=command.io,
+            message=f'  {path} (exit code {status})',
+            style=Style.ERROR,
+        )
+
+    return failed
+
+
+class ConstrainCommand(GroupCommand):
     """Command to check the version constraints in ``pyproject.toml``."""
 
-    # Inherit from ``InstallerCommand`` (_not_ ``InstallCommand``) to get the
-    # ``installer`` property.
+    # Inherit from ``GroupCommand`` (_not_ ``InstallerCommand``), so ``poetry`` neither
+    # finds the project environment nor builds an installer before the command runs.
+    # Rewrites and reports need neither, and finding the environment runs the project
+    # interpreter. Both are built by the ``installer`` property when first needed.
 
     name = 'constrain'
     description = (
@@ -91,6 +321,15 @@ class ConstrainCommand(InstallerCommand):
             multiple=True,
             description="Don't constrain these groups.",
         ),
+        option(
+            'package',
+            flag=False,
+            multiple=True,
+            description=(
+                'Only constrain these dependencies, e.g. the ones a post-hook command'
+                ' added or updated.'
+            ),
+        ),
         option(
             'dry-run',
             flag=True,
@@ -111,11 +350,143 @@ class ConstrainCommand(InstallerCommand):
             flag=True,
             description="Run 'check' after changing constraints.",
         ),
+        option(
+            'admitted',
+            flag=True,
+            description=(
+                'Report the versions each new constraint admits that the old one did'
+                " not, using poetry's local repository cache."
+            ),
+        ),
+        option(
+            'recursive',
+            flag=False,
+            description=(
+                'Constrain every poetry project found under this directory instead of'
+                ' the current project.'
+            ),
+        ),
+        option(
+            'jobs',
+            'j',
+            flag=False,
+            description=(
+                "The number of projects to constrain in parallel with '--recursive'"
+                ' (default: the number of CPUs).'
+            ),
+        ),
+        option(
+            'linked',
+            flag=True,
+            description=(
+                "With '--recursive', rewrite every project first, then lock the"
+                ' projects in the order of their path dependencies. All files are'
+                ' restored if any project fails.'
+            ),
+        ),
+        option(
+            'shard',
+            flag=False,
+            description=(
+                "Only constrain the i-th of N shards, given as 'i/N'. Shards hold"
+                " projects with '--recursive' and dependency groups otherwise."
+            ),
+        ),
+        option(
+            'report-json',
+            flag=False,
+            description=(
+                "Write a JSON report of the proposed updates, e.g. to combine with"
+                " 'constrain merge'."
+            ),
+        ),
+        option(
+            'watch',
+            flag=True,
+            description=(
+                'Keep running and report the updates proposed for the dependencies'
+                " changed by each save of pyproject.toml, checking them with '--check'."
+                ' Nothing is written.'
+            ),
+        ),
+        option(
+            'since',
+            flag=False,
+            description=(
+                'Only constrain the dependency entries added or modified since a git'
+                ' revision. Nothing is run if the dependency tables did not change.'
+            ),
+        ),
+        option(
+            'staged',
+            flag=True,
+            description=(
+                "Only constrain the dependency entries added or modified in the git"
+                " index, e.g. in a pre-commit hook. Like '--since HEAD' for staged"
+                ' changes.'
+            ),
+        ),
+        option(
+            'profile',
+            flag=True,
+            description='Print the time spent in each phase of the run.',
+        ),
+        option(
+            'profile-output',
+            flag=False,
+            description=(
+                "Also profile every function, writing a cProfile dump (e.g. 'run.prof')"
+                " or, for files ending with '.folded', collapsed stacks for flamegraphs."
+            ),
+        ),
+        option(
+            'trace-memory',
+            flag=True,
+            description=(
+                "Like '--profile', also reporting the memory allocated in each phase,"
+                ' the peak memory use and the top allocation sites. Slows the run down.'
+            ),
+        ),
+        option(
+            'trace-output',
+            flag=False,
+            description=(
+                'Write the spans of the run (the command, solving, writing files) to a'
+                " Chrome trace-event JSON file. '{pid}' is replaced by the process id."
+            ),
+        ),
     ]
 
+    # Options that select the projects to run on, or how long to run, rather than how
+    # to constrain them. The profile or trace of each project would overwrite the same
+    # file.
+    _BATCH_OPTIONS = (
+        'recursive',
+        'jobs',
+        'linked',
+        'shard',
+        'report-json',
+        'watch',
+        'profile-output',
+        'trace-output',
+    )
+
+    _shard: Shard | None
+    _changed: dict[str, dict[str, Any]] | None
+    _updated_dependencies: dict[str, list[tuple[str, Dependency]]]
+
     examples = """Examples:
   $ poetry constrain  # ^2.0.1 --> >=2.0.1
   $ poetry constrain --dry-run
+  $ poetry constrain --dry-run --admitted
+  $ poetry constrain --recursive . --jobs 8 --check
+  $ poetry constrain --recursive . --linked
+  $ poetry constrain --recursive . --dry-run --shard 2/4 --report-json shard-2.json
+  $ poetry constrain --watch --check
+  $ poetry constrain --since origin/main --check
+  $ poetry constrain --package requests --lock
+  $ poetry constrain --dry-run --profile-output constrain.prof
+  $ poetry constrain --trace-output constrain.trace.json
 """
 
     help = f"""\
@@ -125,6 +496,57 @@ replaces '^' with '>='.
 {examples}
 """  # noqa: A003
 
+    def __init__(self) -> None:
+        self._env: Env | None = None
+        self._installer: Installer | None = None
+        self._profiler: NullProfiler = NULL_PROFILER
+
+        super().__init__()
+
+    @property
+    def env(self) -> Env:
+        """Return the environment of the project, finding it on first use."""
+        if self._env is None:
+            from poetry.utils.env import EnvManager
+
+            self._env = EnvManager(self.poetry, io=self.io).create_venv()
+
+            line(
+                io=self.io,
+                message=f'Using virtualenv: {self._env.path}',
+                style=Style.INFO,
+                verbosity=Verbosity.VERBOSE,
+            )
+
+        return self._env
+
+    def set_env(self, env: Env) -> None:
+        """Use an environment found before, e.g. by an earlier daemon request."""
+        self._env = env
+
+    @property
+    def installer(self) -> Installer:
+        """Return the installer of the project, building it on first use."""
+        if self._installer is None:
+            from poetry.installation.installer import Installer
+
+            poetry = self.poetry
+            self._installer = Installer(
+                self.io,
+                self.env,
+                poetry.package,
+                poetry.locker,
+                poetry.pool,
+                poetry.config,
+                disable_cache=poetry.disable_cache,
+            )
+
+        return self._installer
+
+    def set_installer(self, installer: Installer) -> None:
+        """Use an installer built elsewhere instead of the project's own."""
+        self._installer = installer
+
     def handle(self) -> int:
         """Constrain versions using user-provided method.
 
@@ -133,223 +555,662 @@ replaces '^' with '>='.
           int
             0 if executes successfully, else non-zero.
         """
-        return self._constrain()
-
-    def _constrain(self) -> int:  # noqa: C901; TODO: Split into helper functions
-        _old = self.option('old') or get_config_variable(
-            poetry=self.poetry,
-            toml_var_name='old',
-            default='caret',
-        )
-        _new = self.option('new') or get_config_variable(
-            poetry=self.poetry,
-            toml_var_name='new',
-            default='ge',
-        )
-        _only = self.option('only') or get_config_variable(
-            poetry=self.poetry,
-            toml_var_name='only',
-            default=set(),
-        )
-        _without = self.option('not') or get_config_variable(
-            poetry=self.poetry,
-            toml_var_name='without',
-            default=set(),
-        )
-        _dry_run = self.option('dry-run') or get_config_variable(
-            poetry=self.poetry,
-            toml_var_name='dry-run',
-            default=False,
-        )
-        _update = self.option('update') or get_config_variable(
-            poetry=self.poetry,
-            toml_var_name='update',
-            default=False,
-        )
-        _lock = self.option('lock') or get_config_variable(
-            poetry=self.poetry,
-            toml_var_name='lock',
-            default=False,
-        )
-        _check = self.option('check') or get_config_variable(
-            poetry=self.poetry,
-            toml_var_name='check',
-            default=False,
-        )
-
-        if _old not in CONSTRAINT_TYPES:
-            line_error(
-                io=self.io,
-                message=(
-                    f"ERROR: 'old' constraint '{_old}' is invalid. Please use one of the"
-                    f' following:\n'
-                    f'{PRETTY_CONSTRAINT_TYPES}'
-                ),
-                style=Style.ERROR,
-            )
-            return Error.INVALID_OLD_CONSTRAINT
-
-        if _new not in CONSTRAINT_TYPES:
-            line_error(
-                io=self.io,
-                message=(
-                    f"ERROR: 'new' constraint '{_new}' is invalid. Please use one of the"
-                    f' following:\n'
-                    f'{PRETTY_CONSTRAINT_TYPES}'
-                ),
-                style=Style.ERROR,
+        # ``--recursive`` may run outside of any project, so only reads the environment
+        if self.option('recursive'):
+            project = Path(self.option('recursive'))
+            document: dict[str, Any] = {}
+        else:
+            project = self.poetry.pyproject.path.parent
+            document = read_pyproject(self.poetry.pyproject.path)
+
+        try:
+            listeners = load_listeners(
+                output=self.option('trace-output')
+                or get_document_config_variable(document, 'trace-output'),
+                listeners=get_document_config_variable(document, 'trace-listeners'),
             )
-            return Error.INVALID_NEW_CONSTRAINT
+        except (ImportError, AttributeError, InvalidListenerError) as exc:
+            line_error(io=self.io, message=f'ERROR: {exc}', style=Style.ERROR)
+            return Error.INVALID_TRACE_LISTENER
 
-        pyproject = self.poetry.pyproject
+        with tracing_session(listeners), span('constrain', 'command', project=project):
+            return self._handle()
 
-        line(
-            io=self.io,
-            message=f"Using pyproject.toml: '{pyproject.path}'",
-            style=Style.INFO,
-            verbosity=Verbosity.VERBOSE,
-        )
+    def _handle(self) -> int:
+        from poetry_plugin_constrain.sharding import InvalidShardError
 
-        poetry_config = pyproject.poetry_config
+        self._updated_dependencies = {}
+        self._changed = None
 
-        # Returns 1 if any group not found
-        self._validate_group_options(
-            {
-                'only': _only if _only else set(),
-                'without': _without if _without else set(),
-            },
-        )
+        try:
+            self._shard = _parse_shard_option(self)
+        except InvalidShardError as exc:
+            line_error(io=self.io, message=f'ERROR: {exc}', style=Style.ERROR)
+            return Error.INVALID_SHARD
 
-        groups = [
-            str(group)
-            for group in (
-                _only
-                or sorted(
-                    self.poetry.package.dependency_group_names(include_optional=True),
+        if self.option('watch'):
+            if self.option('recursive'):
+                line_error(
+                    io=self.io,
+                    message="ERROR: '--watch' cannot be used with '--recursive'.",
+                    style=Style.ERROR,
                 )
-            )
-            if group not in _without
-        ]
+                return Error.INCOMPATIBLE_OPTIONS
+
+            return self._watch()
+
+        if self.option('recursive'):
+            return self._constrain_recursive(Path(self.option('recursive')))
 
-        if not groups:
+        if self.option('since') and self.option('staged'):
             line_error(
                 io=self.io,
-                message="ERROR: No dependencies found in 'pyproject.toml'.",
+                message="ERROR: '--since' cannot be used with '--staged'.",
                 style=Style.ERROR,
             )
-            return Error.NO_DEPENDENCIES_FOUND
+            return Error.INCOMPATIBLE_OPTIONS
 
-        updated_dependencies: dict[str, list[tuple[str, Dependency]]] = {}
+        try:
+            self._changed = self._changed_entries()
+        except Exception as exc:  # noqa: BLE001 # pylint: disable=W0718
+            # e.g. not a git repository, an unknown revision or an invalid base file
+            line_error(io=self.io, message=f'ERROR: {exc}', style=Style.ERROR)
+            return Error.GIT_DIFF_FAILED
 
-        for group in groups:
+        if self._changed is not None and not self._changed:
             line(
                 io=self.io,
-                message=f'Checking constraints in group <c1>{group!r}</c1>...',
+                message='No dependency entries changed. Skipping.',
+                style=Style.INFO,
+            )
+            status = 0
+        else:
+            status = self._constrain()
+
+        if self.option('report-json'):
+            from poetry_plugin_constrain.report import (
+                build_report,
+                project_entry,
+                write_report,
             )
 
-            if group == MAIN_GROUP:  # pylint: disable=W0160
-                group_dependencies_config = poetry_config.get('dependencies')
-            else:
-                group_dependencies_config = deep_get(
-                    poetry_config,
-                    ['group', group, 'dependencies'],
-                )
+            project = self.poetry.pyproject.path.parent
+            write_report(
+                Path(self.option('report-json')),
+                build_report(
+                    {
+                        _relative(project, Path.cwd()): project_entry(
+                            status,
+                            self._updated_dependencies,
+                        ),
+                    },
+                    shard=self._shard,
+                ),
+            )
 
-            assert group_dependencies_config is not None
+        return status
 
-            dependencies: list[Dependency] = []
-            for name, constraints in group_dependencies_config.items():
-                # Support multiple constraint dependencies
-                _constraints = (
-                    constraints if isinstance(constraints, list) else [constraints]
-                )
+    def _constrain_recursive(self, root: Path) -> int:
+        """Constrain every project under ``root`` in a process pool.
 
-                for _constraint in _constraints:
-                    dependencies.append(  # noqa: PERF401
-                        Factory.create_dependency(name, _constraint),
-                    )
+        Each project's report is printed as soon as the project completes.
 
-            if not dependencies:
-                line(
-                    io=self.io,
-                    message=f'Group <c1>{group!r}</c1> has no dependencies.',
-                )
-                updated_dependencies[group] = []
-                continue
+        Parameters
+        ----------
+        root : Path
+            The directory to search for ``poetry`` projects
 
-            line(
-                io=self.io,
-                message=(
-                    f'Found {len(dependencies)} dependencies in group <c1>{group!r}'
-                    '</c1>'
-                ),
-                style=Style.INFO,
-                verbosity=Verbosity.VERBOSE,
-            )
+        Returns
+        -------
+        int
+            The highest exit code of all projects
+        """
+        from poetry_plugin_constrain.batch import discover_projects
 
-            new_dependencies = [
-                replace_constraint_from_dependency(
-                    dependency=dependency,
-                    old=_old,
-                    new=_new,
-                )
-                for dependency in dependencies
-            ]
+        jobs = self.option('jobs')
+        if not _is_valid_jobs(jobs):
+            line_error(io=self.io, message=_invalid_jobs_message(jobs), style=Style.ERROR)
+            return Error.INVALID_JOBS
 
-            updated_dependencies[group] = [
-                (old_dependency.pretty_constraint, new_dependency)
-                for old_dependency, new_dependency in zip(dependencies, new_dependencies)
-                if old_dependency.pretty_constraint != new_dependency.pretty_constraint
-            ]
+        jobs = int(jobs) if jobs is not None else None
 
-            line(
+        projects = discover_projects(root)
+
+        if not projects:
+            line_error(
                 io=self.io,
-                message=(
-                    f'Proposing updates to {len(updated_dependencies[group])}'
-                    f' dependencies in group <c1>{group!r}</c1>'
-                ),
-                style=Style.INFO,
-                verbosity=Verbosity.VERBOSE,
+                message=f"ERROR: No poetry projects found under '{root}'.",
+                style=Style.ERROR,
             )
+            return Error.NO_PROJECTS_FOUND
 
-        num_updates = sum(len(deps) for deps in updated_dependencies.values())
-        if not num_updates:
+        line(
+            io=self.io,
+            message=f'Found {len(projects)} projects under {str(root)!r}.',
+            style=Style.INFO,
+        )
+
+        if self._shard is not None:
+            projects = _shard_projects(projects, root, self._shard)
             line(
                 io=self.io,
-                message='No dependency constraints to change.',
+                message=f'Constraining {len(projects)} projects in shard {self._shard}.',
                 style=Style.INFO,
             )
-            return 0
 
         line(io=self.io, message='')  # Cosmetic new line
 
-        line(
-            io=self.io,
-            message=f'Total: Proposing updates to {num_updates} dependencies.',
-        )
+        entries: dict[str, dict] = {}
 
-        line(io=self.io, message='')  # Cosmetic new line
+        if self.option('linked'):
+            status = self._constrain_linked(root, projects, jobs, entries)
+        else:
+            failed = _run_batch(
+                self,
+                root,
+                projects,
+                _forwarded_args(self, self._BATCH_OPTIONS),
+                jobs,
+                entries,
+                report=bool(self.option('report-json')),
+            )
+            status = max((status for _, status in failed), default=0)
 
-        if any([_check, _update, _lock]):
-            for group in groups:
-                print_group_header(self.io, group)
+        if self.option('report-json'):
+            from poetry_plugin_constrain.report import build_report, write_report
 
-                for old_constraint, dependency in updated_dependencies[group]:
-                    line(
-                        io=self.io,
-                        message=(
-                            f'  <c1>{dependency.name}</>: <c2>{old_constraint}</> -->'
-                            f' <c2>{dependency.pretty_constraint}</>'
-                        ),
-                        verbosity=Verbosity.VERBOSE,
-                    )
+            write_report(
+                Path(self.option('report-json')),
+                build_report(entries, shard=self._shard),
+            )
 
-                line(io=self.io, message='')  # Cosmetic new line
+        return status
 
-            should_not_update = _dry_run or not any([_update, _lock])
+    def _constrain_linked(
+        self,
+        root: Path,
+        projects: list[Path],
+        jobs: int | None,
+        entries: dict[str, dict],
+    ) -> int:
+        """Rewrite every project, then lock them in the order of their path dependencies.
+
+        Projects are locked when their constraints changed or when a project they
+        depend on is locked, so each lock file is written once. Projects of the same
+        level do not depend on each other and are locked in parallel. If any project
+        fails, or the run is interrupted, the ``pyproject.toml`` and ``poetry.lock`` of
+        every project are restored.
+
+        Parameters
+        ----------
+        root : Path
+            The directory the projects were found under
+        projects : list[Path]
+            The project directories
+        jobs : int | None
+            The number of worker processes
+        entries : dict[str, dict]
+            The report entry of each project, updated in place
 
-            if should_not_update:
-                line(
+        Returns
+        -------
+        int
+            0 if every project was constrained and locked, else non-zero.
+        """
+        from poetry_plugin_constrain.linked import (
+            DependencyCycleError,
+            Snapshot,
+            build_graph,
+            topological_levels,
+        )
+
+        if self._shard is not None:
+            line_error(
+                io=self.io,
+                message="ERROR: '--shard' cannot be used with '--linked'.",
+                style=Style.ERROR,
+            )
+            return Error.INVALID_SHARD
+
+        if self.option('check'):
+            # Locking solves every project, while solving sooner would use path
+            # dependencies that are not rewritten yet
+            line_error(
+                io=self.io,
+                message="ERROR: '--check' cannot be used with '--linked'.",
+                style=Style.ERROR,
+            )
+            return Error.INCOMPATIBLE_OPTIONS
+
+        graph = build_graph(projects)
+
+        try:
+            levels = topological_levels(graph)
+        except DependencyCycleError as exc:
+            line_error(io=self.io, message=f'ERROR: {exc}', style=Style.ERROR)
+            return Error.DEPENDENCY_CYCLE_FOUND
+
+        snapshot = Snapshot(projects)
+
+        try:
+            status = self._lock_linked(
+                root,
+                projects,
+                jobs,
+                entries,
+                graph,
+                levels,
+                snapshot,
+            )
+        except BaseException:
+            # e.g. interrupted, so no project is left half rewritten or locked
+            snapshot.restore()
+            line_error(
+                io=self.io,
+                message='ERROR: Restored every project since constraining was aborted.',
+                style=Style.ERROR,
+            )
+            raise
+
+        return status
+
+    def _lock_linked(
+        self,
+        root: Path,
+        projects: list[Path],
+        jobs: int | None,
+        entries: dict[str, dict],
+        graph: dict[Path, set[Path]],
+        levels: list[list[Path]],
+        snapshot: Snapshot,
+    ) -> int:
+        """Rewrite every project, then lock each level of projects in turn.
+
+        Parameters
+        ----------
+        root : Path
+            The directory the projects were found under
+        projects : list[Path]
+            The project directories
+        jobs : int | None
+            The number of worker processes
+        entries : dict[str, dict]
+            The report entry of each project, updated in place
+        graph : dict[Path, set[Path]]
+            The projects each project depends on
+        levels : list[list[Path]]
+            The projects, in the order of their path dependencies
+        snapshot : Snapshot
+            The files of every project before any was rewritten
+
+        Returns
+        -------
+        int
+            0 if every project was constrained and locked, else non-zero.
+        """
+        from poetry_plugin_constrain.linked import downstream_closure
+
+        # Locking is deferred until every project is rewritten
+        args = [
+            arg
+            for arg in _forwarded_args(self, self._BATCH_OPTIONS)
+            if arg not in ('--lock', '--update')
+        ]
+
+        failed = _run_batch(
+            self,
+            root,
+            projects,
+            args,
+            jobs,
+            entries,
+            report=bool(self.option('report-json')),
+        )
+
+        if failed:
+            snapshot.restore()
+            line_error(
+                io=self.io,
+                message='ERROR: Restored every project since constraining failed.',
+                style=Style.ERROR,
+            )
+            return max(status for _, status in failed)
+
+        if self.option('dry-run'):
+            line(
+                io=self.io,
+                message='Skipped locking due to dry-run flag.',
+                style=Style.INFO,
+            )
+            return 0
+
+        to_lock = downstream_closure(
+            graph,
+            [project for project in projects if snapshot.changed(project)],
+        )
+
+        line(io=self.io, message='')  # Cosmetic new line
+        line(
+            io=self.io,
+            message=f'Locking {len(to_lock)} projects in dependency order...',
+            style=Style.INFO,
+        )
+
+        for number, level in enumerate(levels, start=1):
+            locked = [project for project in level if project in to_lock]
+            if not locked:
+                continue
+
+            line(io=self.io, message='')  # Cosmetic new line
+            line(
+                io=self.io,
+                message=f'Level {number}: locking {len(locked)} projects',
+                style=Style.INFO,
+                verbosity=Verbosity.VERBOSE,
+            )
+
+            failed = _run_batch(
+                self,
+                root,
+                locked,
+                [] if self.option('update') else ['--no-update'],
+                jobs,
+                entries,
+                name='lock',
+            )
+
+            if failed:
+                snapshot.restore()
+                for path, status in failed:
+                    entry = entries.get(_relative(path, root))
+                    if entry is not None:
+                        entry['status'] = status
+
+                line_error(
+                    io=self.io,
+                    message='ERROR: Restored every project since locking failed.',
+                    style=Style.ERROR,
+                )
+                return max(status for _, status in failed)
+
+        return 0
+
+    def _constrain(self) -> int:
+        """Constrain the project, then report each phase with ``--profile``.
+
+        Returns
+        -------
+        int
+            0 if executes successfully, else non-zero.
+        """
+        output = self._setting('profile-output', default=None)
+
+        self._profiler = create_profiler(
+            enabled=self.option('profile') or is_profiling_enabled(self.poetry),
+            output=Path(output) if output else None,
+            memory=self.option('trace-memory') or is_memory_tracing_enabled(self.poetry),
+        )
+
+        with self._profiler:
+            status = self._constrain_project()
+
+        self._profiler.report(self.io)
+        self._profiler = NULL_PROFILER
+
+        return status
+
+    def _constrain_project(self) -> int:  # noqa: C901; TODO: Split into helper functions
+        profiler = self._profiler
+
+        with profiler.phase('config'):
+            _old = self.option('old') or get_config_variable(
+                poetry=self.poetry,
+                toml_var_name='old',
+                default='caret',
+            )
+            _new = self.option('new') or get_config_variable(
+                poetry=self.poetry,
+                toml_var_name='new',
+                default='ge',
+            )
+            _only = self.option('only') or get_config_variable(
+                poetry=self.poetry,
+                toml_var_name='only',
+                default=set(),
+            )
+            _without = self.option('without') or get_config_variable(
+                poetry=self.poetry,
+                toml_var_name='without',
+                default=set(),
+            )
+            _dry_run = self.option('dry-run') or get_config_variable(
+                poetry=self.poetry,
+                toml_var_name='dry-run',
+                default=False,
+            )
+            _update = self.option('update') or get_config_variable(
+                poetry=self.poetry,
+                toml_var_name='update',
+                default=False,
+            )
+            _lock = self.option('lock') or get_config_variable(
+                poetry=self.poetry,
+                toml_var_name='lock',
+                default=False,
+            )
+            _check = self.option('check') or get_config_variable(
+                poetry=self.poetry,
+                toml_var_name='check',
+                default=False,
+            )
+            _admitted = self.option('admitted') or get_config_variable(
+                poetry=self.poetry,
+                toml_var_name='admitted',
+                default=False,
+            )
+
+        status = _check_constraint_types(self, _old, _new)
+        if status != 0:
+            return status
+
+        pyproject = self.poetry.pyproject
+
+        line(
+            io=self.io,
+            message=f"Using pyproject.toml: '{pyproject.path}'",
+            style=Style.INFO,
+            verbosity=Verbosity.VERBOSE,
+        )
+
+        with profiler.phase('groups'):
+            # Parsed by ``poetry`` when loading the project. Only read, the ``tomlkit``
+            # document is loaded by ``_patch`` to write updates.
+            poetry_config = self.poetry.local_config
+
+            # Returns 1 if any group not found
+            self._validate_group_options(
+                {
+                    'only': _only if _only else set(),
+                    'without': _without if _without else set(),
+                },
+            )
+
+            groups = [
+                str(group)
+                for group in (
+                    _only
+                    or sorted(
+                        self.poetry.package.dependency_group_names(include_optional=True),
+                    )
+                )
+                if group not in _without
+            ]
+
+            if not groups:
+                line_error(
+                    io=self.io,
+                    message="ERROR: No dependencies found in 'pyproject.toml'.",
+                    style=Style.ERROR,
+                )
+                return Error.NO_DEPENDENCIES_FOUND
+
+            if self._shard is not None:
+                groups = self._select_shard_groups(groups, poetry_config)
+
+                if not groups:
+                    line(
+                        io=self.io,
+                        message=f'No dependency groups in shard {self._shard}.',
+                        style=Style.INFO,
+                    )
+                    return 0
+
+            if self._changed is not None:
+                groups = [group for group in groups if group in self._changed]
+
+            packages = self._packages()
+            if packages is not None:
+                groups = [
+                    group
+                    for group in groups
+                    if any(
+                        canonicalize_name(name) in packages
+                        for name in group_table(poetry_config, group) or {}
+                    )
+                ]
+
+        # The installer and the reports need every update at once. Otherwise, each
+        # group is patched as it is rewritten and its dependencies are released
+        # before the next group is read. Only the lines reporting the updates are
+        # kept, to be printed after the totals, unless the output is silenced.
+        retain = any([_check, _update, _lock, _admitted]) or bool(
+            self.option('report-json'),
+        )
+
+        updated_dependencies = self._updated_dependencies
+        updated_lines: dict[str, list[str]] = {}
+        num_updates = 0
+
+        for group in groups:
+            line(
+                io=self.io,
+                message=f'Checking constraints in group <c1>{group!r}</c1>...',
+            )
+
+            table = group_table(poetry_config, group)
+
+            assert table is not None
+
+            entries = table
+            if self._changed is not None:
+                entries = {
+                    name: table[name] for name in self._changed[group] if name in table
+                }
+            if packages is not None:
+                entries = {
+                    name: value
+                    for name, value in entries.items()
+                    if canonicalize_name(name) in packages
+                }
+
+            num_found = 0
+            num_group_updates = 0
+
+            for old_constraint, dependency in profiler.iterate(
+                'rewrite',
+                rewrite(profiler.iterate('discover', discover(entries)), _old, _new),
+            ):
+                num_found += 1
+
+                if old_constraint == dependency.pretty_constraint:
+                    continue
+
+                num_group_updates += 1
+
+                if retain:
+                    updated_dependencies.setdefault(group, []).append(
+                        (old_constraint, dependency),
+                    )
+                else:
+                    message = self._patch(
+                        group,
+                        old_constraint,
+                        dependency,
+                        write=not _dry_run,
+                    )
+                    if not self.io.output.is_quiet():
+                        updated_lines.setdefault(group, []).append(message)
+
+            if retain:
+                updated_dependencies.setdefault(group, [])
+
+            if not num_found:
+                line(
+                    io=self.io,
+                    message=f'Group <c1>{group!r}</c1> has no dependencies.',
+                )
+                continue
+
+            line(
+                io=self.io,
+                message=(f'Found {num_found} dependencies in group <c1>{group!r}</c1>'),
+                style=Style.INFO,
+                verbosity=Verbosity.VERBOSE,
+            )
+
+            line(
+                io=self.io,
+                message=(
+                    f'Proposing updates to {num_group_updates}'
+                    f' dependencies in group <c1>{group!r}</c1>'
+                ),
+                style=Style.INFO,
+                verbosity=Verbosity.VERBOSE,
+            )
+
+            num_updates += num_group_updates
+
+        if not num_updates:
+            line(
+                io=self.io,
+                message='No dependency constraints to change.',
+                style=Style.INFO,
+            )
+            return 0
+
+        line(io=self.io, message='')  # Cosmetic new line
+
+        line(
+            io=self.io,
+            message=f'Total: Proposing updates to {num_updates} dependencies.',
+        )
+
+        line(io=self.io, message='')  # Cosmetic new line
+
+        if _admitted:
+            with profiler.phase('admitted'):
+                self._report_admitted(updated_dependencies)
+
+        if any([_check, _update, _lock]):
+            for group in groups:
+                print_group_header(self.io, group)
+
+                for old_constraint, dependency in updated_dependencies[group]:
+                    line(
+                        io=self.io,
+                        message=(
+                            f'  <c1>{dependency.name}</>: <c2>{old_constraint}</> -->'
+                            f' <c2>{dependency.pretty_constraint}</>'
+                        ),
+                        verbosity=Verbosity.VERBOSE,
+                    )
+
+                line(io=self.io, message='')  # Cosmetic new line
+
+            should_not_update = _dry_run or not any([_update, _lock])
+
+            if should_not_update:
+                line(
                     io=self.io,
                     message='Checking that new dependencies can be solved...',
                     style=Style.INFO,
@@ -378,20 +1239,21 @@ replaces '^' with '>='.
                 return Error.NO_INSTALLER_FOUND
 
             try:
-                status = run_installer_update(
-                    poetry=self.poetry,
-                    installer=self.installer,
-                    lockfile_only=_lock,
-                    dependencies_by_group={
-                        group: [d for _, d in deps]
-                        for group, deps in updated_dependencies.items()
-                        if deps != []
-                    },
-                    poetry_config=poetry_config,
-                    dry_run=should_not_update,
-                    verbose=self.io.is_verbose(),
-                    silent=(should_not_update and not self.io.is_verbose()),
-                )
+                with profiler.phase('solve'):
+                    status = run_installer_update(
+                        poetry=self.poetry,
+                        installer=self.installer,
+                        lockfile_only=_lock,
+                        dependencies_by_group={
+                            group: [d for _, d in deps]
+                            for group, deps in updated_dependencies.items()
+                            if deps != []
+                        },
+                        poetry_config=poetry_config,
+                        dry_run=should_not_update,
+                        verbose=self.io.is_verbose(),
+                        silent=(should_not_update and not self.io.is_verbose()),
+                    )
             except Exception as exc:  # noqa: BLE001 # pylint: disable=W0718
                 # Catch-all for unexpected errors
                 line_error(
@@ -415,61 +1277,33 @@ replaces '^' with '>='.
 
         line(io=self.io, message='')  # Cosmetic new line
 
-        for group in groups:
-            if group == MAIN_GROUP:  # pylint: disable=W0160
-                group_dependencies_config = poetry_config.get('dependencies')
-            else:
-                group_dependencies_config = deep_get(
-                    poetry_config,
-                    ['group', group, 'dependencies'],
+        for group, updates in updated_dependencies.items():
+            updated_lines[group] = [
+                self._patch(
+                    group,
+                    old_constraint,
+                    dependency,
+                    write=status == 0 and not _dry_run,
                 )
+                for old_constraint, dependency in updates
+            ]
 
-            if group_dependencies_config is None or not updated_dependencies[group]:
+        for group, messages in updated_lines.items():
+            if not messages:
                 continue
 
             print_group_header(self.io, group)
 
-            for old_constraint, dependency in updated_dependencies[group]:
-                name = dependency.pretty_name
-                new_constraint = dependency.pretty_constraint
-
-                constraints = group_dependencies_config[name]
-
-                # Support multiple constraint dependencies
-                if isinstance(constraints, list):
-                    for ndx, _constraint in enumerate(constraints):
-                        if isinstance(_constraint, dict):
-                            _old_constraint = group_dependencies_config[name][ndx][
-                                'version'
-                            ]
-                            if _old_constraint != old_constraint:
-                                continue
-                            group_dependencies_config[name][ndx][
-                                'version'
-                            ] = new_constraint
-                        else:
-                            _old_constraint = group_dependencies_config[name][ndx]
-                            if _old_constraint != old_constraint:
-                                continue
-                            group_dependencies_config[name][ndx] = new_constraint
-                else:
-                    if isinstance(constraints, dict):
-                        group_dependencies_config[name]['version'] = new_constraint
-                    else:
-                        group_dependencies_config[name] = new_constraint
-
-                line(
-                    io=self.io,
-                    message=(
-                        f'Updated <c1>{name}</>: {old_constraint} --> {new_constraint}'
-                    ),
-                    style=Style.INFO,
-                )
+            for message in messages:
+                line(io=self.io, message=message, style=Style.INFO)
 
             line(io=self.io, message='')  # Cosmetic new line
 
         if status == 0 and not _dry_run:
-            pyproject.save()
+            with profiler.phase('save'), span(
+                'write-pyproject', 'write', path=str(pyproject.path)
+            ):
+                pyproject.save()
             line(
                 io=self.io,
                 message='Updated pyproject.toml with new constraints.',
@@ -483,3 +1317,1239 @@ replaces '^' with '>='.
             )
 
         return status
+
+    def _patch(
+        self,
+        group: str,
+        old_constraint: str,
+        dependency: Dependency,
+        *,
+        write: bool,
+    ) -> str:
+        """Apply an update to the ``pyproject.toml`` document.
+
+        Parameters
+        ----------
+        group : str
+            The group of the dependency
+        old_constraint : str
+            The constraint before the rewrite
+        dependency : Dependency
+            The rewritten dependency
+        write : bool
+            Whether to change the document, which is left as is (and not even loaded)
+            when it will not be saved (e.g. on a dry run)
+
+        Returns
+        -------
+        str
+            The line reporting the update
+        """
+        if write:
+            with self._profiler.phase('patch'):
+                # The style-preserving ``tomlkit`` document, parsed once on first use
+                table = group_table(self.poetry.pyproject.poetry_config, group)
+
+                assert table is not None
+
+                patch(table, old_constraint, dependency)
+
+        return (
+            f'Updated <c1>{dependency.pretty_name}</>: {old_constraint} -->'
+            f' {dependency.pretty_constraint}'
+        )
+
+    def _changed_entries(self) -> dict[str, dict[str, Any]] | None:
+        """Return the dependency entries changed in ``git``, by group.
+
+        Returns
+        -------
+        dict[str, dict[str, Any]] | None
+            The entries added or modified since ``--since`` or in the index with
+            ``--staged``, else ``None`` to constrain every entry
+        """
+        since = self.option('since')
+        staged = self.option('staged')
+
+        if not since and not staged:
+            return None
+
+        from poetry_plugin_constrain.changes import changed_entries
+
+        diff = changed_entries(self.poetry.pyproject.path, since=since, staged=staged)
+
+        line(
+            io=self.io,
+            message=(
+                f'Changed {sum(map(len, diff.changed.values()))} dependency entries'
+                f" {'in the index' if staged else f'since {since!r}'}."
+            ),
+            style=Style.INFO,
+            verbosity=Verbosity.VERBOSE,
+        )
+
+        return diff.changed
+
+    def _packages(self) -> set[str] | None:
+        """Return the canonical names of the dependencies given with ``--package``.
+
+        Returns
+        -------
+        set[str] | None
+            The names, else ``None`` to constrain every dependency
+        """
+        names = {
+            canonicalize_name(name.strip())
+            for value in self.option('package')
+            for name in value.split(',')
+            if name.strip()
+        }
+
+        return names or None
+
+    def _setting(self, name: str, *, default: Any) -> Any:
+        """Return an option if given, else its configured value or ``default``."""
+        return self.option(name) or get_config_variable(
+            poetry=self.poetry,
+            toml_var_name=name,
+            default=default,
+        )
+
+    def _watch(self) -> int:
+        """Report the updates proposed for the dependencies changed by each save.
+
+        ``pyproject.toml`` is read again after each save, but only the dependency
+        entries added or modified since the previous save are rewritten and, with
+        ``--check``, solved. Nothing is written. Runs until interrupted.
+
+        Returns
+        -------
+        int
+            0 once interrupted, else non-zero if the constraint types are invalid.
+        """
+        from poetry_plugin_constrain._compat import tomllib
+        from poetry_plugin_constrain.tables import dependency_tables, diff_tables
+        from poetry_plugin_constrain.watch import create_watcher
+
+        _old = self._setting('old', default='caret')
+        _new = self._setting('new', default='ge')
+        _check = self._setting('check', default=False)
+
+        status = _check_constraint_types(self, _old, _new)
+        if status != 0:
+            return status
+
+        path = self.poetry.pyproject.path
+
+        line(
+            io=self.io,
+            message=f"Watching '{path}' for changes. Press Ctrl+C to stop.",
+            style=Style.INFO,
+        )
+
+        # Start watching first, so no save is missed while reading the file
+        watcher = create_watcher(path)
+        tables: dict[str, dict[str, Any]] = {}
+
+        try:
+            while True:
+                try:
+                    current = dependency_tables(path)
+                except (OSError, tomllib.TOMLDecodeError) as exc:
+                    line_error(io=self.io, message=f'ERROR: {exc}', style=Style.ERROR)
+                else:
+                    diff = diff_tables(tables, current)
+                    tables = current
+
+                    if diff:
+                        self._report_changes(diff, _old, _new, check=_check)
+
+                watcher.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
+
+        return 0
+
+    def _report_changes(
+        self,
+        diff: TableDiff,
+        old: str,
+        new: str,
+        *,
+        check: bool,
+    ) -> None:
+        """Print the updates proposed for changed dependency entries.
+
+        Parameters
+        ----------
+        diff : TableDiff
+            The dependency entries changed since the previous save
+        old : str
+            The type of constraint to replace
+        new : str
+            The type of constraint to replace it with
+        check : bool
+            Whether to check the changed dependencies can be solved
+        """
+        rewritten = {
+            group: list(rewrite(discover(entries), old, new))
+            for group, entries in diff.changed.items()
+        }
+
+        line(io=self.io, message='')  # Cosmetic new line
+        line(
+            io=self.io,
+            message=(
+                f'Changed {sum(map(len, diff.changed.values()))} and removed'
+                f' {sum(map(len, diff.removed.values()))} dependency entries.'
+            ),
+            style=Style.INFO,
+        )
+
+        num_updates = 0
+        for group, updates in rewritten.items():
+            for old_constraint, dependency in updates:
+                if old_constraint == dependency.pretty_constraint:
+                    continue
+
+                num_updates += 1
+                line(
+                    io=self.io,
+                    message=(
+                        f'  <c1>{group}</>: <c1>{dependency.pretty_name}</>:'
+                        f' <c2>{old_constraint}</> -->'
+                        f' <c2>{dependency.pretty_constraint}</>'
+                    ),
+                )
+
+        if not num_updates:
+            line(io=self.io, message='  No dependency constraints to change.')
+
+        if check:
+            self._check_changes(diff, rewritten)
+
+    def _check_changes(
+        self,
+        diff: TableDiff,
+        rewritten: dict[str, list[tuple[str, Dependency]]],
+    ) -> None:
+        """Check the changed dependencies can be solved, without writing a lock file.
+
+        The package of the ``poetry`` instance is kept in sync with the saved file, so
+        each check only whitelists the changed dependencies.
+
+        Parameters
+        ----------
+        diff : TableDiff
+            The dependency entries changed since the previous save
+        rewritten : dict[str, list[tuple[str, Dependency]]]
+            The old constraint and the rewritten dependency of each changed entry,
+            keyed by group name
+        """
+        from poetry.core.packages.dependency_group import DependencyGroup
+
+        package = self.poetry.package
+
+        for group, names in diff.removed.items():
+            if package.has_dependency_group(group):
+                for name in names:
+                    with suppress(ValueError):
+                        package.dependency_group(group).remove_dependency(name)
+
+        for group in rewritten:
+            if not package.has_dependency_group(group):
+                package.add_dependency_group(DependencyGroup(group))
+
+        dependencies_by_group = {
+            group: [dependency for _, dependency in updates]
+            for group, updates in rewritten.items()
+            if updates
+        }
+
+        if not dependencies_by_group:
+            return
+
+        try:
+            status = run_installer_update(
+                poetry=self.poetry,
+                installer=self.installer,
+                lockfile_only=False,
+                dependencies_by_group=dependencies_by_group,
+                poetry_config=deep_get(
+                    read_pyproject(self.poetry.pyproject.path),
+                    ['tool', 'poetry'],
+                ),
+                dry_run=True,
+                verbose=self.io.is_verbose(),
+                silent=not self.io.is_verbose(),
+            )
+        except Exception as exc:  # noqa: BLE001 # pylint: disable=W0718
+            line_error(io=self.io, message=str(exc), style=Style.ERROR)
+            return
+
+        if status == 0:
+            line(io=self.io, message='  Dependency check successful.', style=Style.INFO)
+        else:
+            line_error(
+                io=self.io,
+                message='  ERROR: The changed dependencies cannot be solved.',
+                style=Style.ERROR,
+            )
+
+    def _select_shard_groups(
+        self,
+        groups: list[str],
+        poetry_config: dict[str, Any],
+    ) -> list[str]:
+        """Return the groups assigned to the shard, balanced by dependency count.
+
+        Parameters
+        ----------
+        groups : list[str]
+            The groups to constrain
+        poetry_config : dict[str, Any]
+            The contents of the ``[tool.poetry]`` table of the ``pyproject.toml``
+
+        Returns
+        -------
+        list[str]
+            The groups of the shard, in the original order
+        """
+        from poetry_plugin_constrain.sharding import select_shard
+
+        assert self._shard is not None
+
+        weights = {
+            group: len(group_table(poetry_config, group) or {}) for group in groups
+        }
+
+        selected = select_shard(weights, self._shard)
+
+        line(
+            io=self.io,
+            message=(
+                f"Constraining groups {', '.join(map(repr, selected))} in shard"
+                f' {self._shard}.'
+            ),
+            style=Style.INFO,
+            verbosity=Verbosity.VERBOSE,
+        )
+
+        return selected
+
+    def _report_admitted(
+        self,
+        updated_dependencies: dict[str, list[tuple[str, Dependency]]],
+    ) -> None:
+        """Print the versions each updated dependency newly admits.
+
+        Parameters
+        ----------
+        updated_dependencies : dict[str, list[tuple[str, Dependency]]]
+            The old constraint and the updated dependency, keyed by group name
+        """
+        # Deferred since the report is opt-in
+        from poetry_plugin_constrain.admitted import (
+            INDEX_FILE_NAME,
+            load_cached_versions,
+            newly_admitted,
+        )
+
+        cached_versions = load_cached_versions(
+            repository_directories=[
+                self.poetry.config.repository_cache_directory / repository.name
+                for repository in self.poetry.pool.repositories
+            ],
+            index_path=get_cache_directory(self.poetry) / INDEX_FILE_NAME,
+            names={
+                dependency.name
+                for dependencies in updated_dependencies.values()
+                for _, dependency in dependencies
+            },
+        )
+
+        line(
+            io=self.io,
+            message='Versions admitted by the new constraints (from the local cache):',
+            style=Style.INFO,
+        )
+
+        for group in updated_dependencies:
+            for old_constraint, dependency in updated_dependencies[group]:
+                versions = [
+                    version
+                    for version in map(
+                        Version.parse,
+                        cached_versions.get(dependency.name, []),
+                    )
+                    if version.is_stable()
+                ]
+
+                prefix = (
+                    f'  <c1>{dependency.pretty_name}</>: <c2>{old_constraint}</> -->'
+                    f' <c2>{dependency.pretty_constraint}</>:'
+                )
+
+                if not versions:
+                    line(io=self.io, message=f'{prefix} no cached versions')
+                    continue
+
+                admitted = newly_admitted(
+                    versions,
+                    old=parse_constraint(old_constraint),
+                    new=dependency.constraint,
+                )
+
+                line(
+                    io=self.io,
+                    message=(
+                        f'{prefix} {len(admitted)} of {len(versions)} cached versions'
+                        + (f" ({', '.join(map(str, admitted))})" if admitted else '')
+                    ),
+                )
+
+        line(io=self.io, message='')  # Cosmetic new line
+
+
+class ConstrainFilesCommand(Command):
+    """Command to constrain the projects owning the files passed by ``pre-commit``."""
+
+    name = 'constrain files'
+    description = (
+        'Constrain the poetry projects of the given <comment>pyproject.toml</> files'
+        ' in a single process.'
+    )
+
+    arguments: list[Argument] = [  # noqa: RUF012  # Instance variable in `Command`
+        argument(
+            'files',
+            description='The pyproject.toml files (or project directories) to constrain.',
+            optional=True,
+            multiple=True,
+        ),
+    ]
+
+    options: list[Option] = [  # noqa: RUF012  # Instance variable in `Command`
+        opt
+        for opt in ConstrainCommand.options
+        if opt.name not in ConstrainCommand._BATCH_OPTIONS
+    ]
+
+    examples = """Examples:
+  $ poetry constrain files pyproject.toml packages/a/pyproject.toml
+  $ poetry constrain files --dry-run $(git diff --cached --name-only -- '*pyproject.toml')
+"""
+
+    help = f"""\
+Constrain the project of each given file like 'poetry constrain' does, without
+requiring a project in the current directory. All projects are constrained one after
+the other in this process, so poetry is only loaded once. Files that are not part of
+a poetry project are skipped.
+
+{examples}
+"""  # noqa: A003
+
+    def handle(self) -> int:
+        """Constrain the project of each file.
+
+        Returns
+        -------
+          int
+            The highest exit code of all projects
+        """
+        from poetry_plugin_constrain.batch import projects_from_files
+
+        projects = projects_from_files(Path(file) for file in self.argument('files'))
+
+        if not projects:
+            line(
+                io=self.io,
+                message='No poetry projects to constrain.',
+                style=Style.INFO,
+                verbosity=Verbosity.VERBOSE,
+            )
+            return 0
+
+        # A single job runs every project in this process, so imports and loaded
+        # configuration are shared. ``pre-commit`` passes each file to one process
+        # only, so no two processes write the same project.
+        failed = _run_batch(
+            self,
+            Path.cwd(),
+            projects,
+            _forwarded_args(self, ()),
+            jobs=1,
+            entries={},
+        )
+
+        return max((status for _, status in failed), default=0)
+
+
+class ConstrainFilterCommand(Command):
+    """Command to constrain a ``pyproject.toml`` read from ``stdin``."""
+
+    name = 'constrain filter'
+    description = (
+        'Constrain a <comment>pyproject.toml</> read from stdin and write it to stdout.'
+    )
+
+    # Without defaults, so that the configuration in the document is used
+    options: list[Option] = [  # noqa: RUF012  # Instance variable in `Command`
+        option(
+            'old',
+            flag=False,
+            description=f"""The constraint to replace. Must be one of:
+{PRETTY_CONSTRAINT_TYPES}""",
+        ),
+        option(
+            'new',
+            flag=False,
+            description=f"""The constraint to replace the old one with. Must be one of:
+{PRETTY_CONSTRAINT_TYPES}""",
+        ),
+        *(opt for opt in ConstrainCommand.options if opt.name in ('only', 'without')),
+    ]
+
+    examples = """Examples:
+  $ poetry constrain filter < pyproject.toml > constrained.toml
+  $ generate-pyproject | poetry constrain filter --old tilde | taplo fmt -
+"""
+
+    help = f"""\
+Rewrite the dependency constraints of a pyproject.toml read from stdin like
+'poetry constrain' does, and write the document to stdout. The rest of the document is
+left unchanged. No poetry project, installer or file is loaded, so the '--old' and
+'--new' options fall back to the configuration in the document and the environment,
+else to 'caret' and 'ge'.
+
+{examples}
+"""  # noqa: A003
+
+    def handle(self) -> int:
+        """Constrain the document read from ``stdin``.
+
+        Returns
+        -------
+          int
+            0 if executes successfully, else non-zero.
+        """
+        from poetry_plugin_constrain.text import (
+            InvalidConstraintTypeError,
+            constrain_text,
+        )
+
+        stream = self.io.input.stream or sys.stdin
+
+        try:
+            text = constrain_text(
+                stream.read(),
+                old=self.option('old'),
+                new=self.option('new'),
+                only=self.option('only'),
+                without=self.option('without'),
+            )
+        except InvalidConstraintTypeError as exc:
+            line_error(
+                io=self.io,
+                message=(
+                    f'ERROR: {exc} Please use one of the following:\n'
+                    f'{PRETTY_CONSTRAINT_TYPES}'
+                ),
+                style=Style.ERROR,
+            )
+            return (
+                Error.INVALID_OLD_CONSTRAINT
+                if exc.kind == 'old'
+                else Error.INVALID_NEW_CONSTRAINT
+            )
+
+        # Raw, so e.g. '<2' is not read as a style tag
+        self.io.write(text, type=OutputType.RAW)
+
+        return 0
+
+
+class ConstrainVerifyCommand(Command):
+    """Command to check a constraint policy against the lock files of many projects."""
+
+    name = 'constrain verify'
+    description = (
+        'Check that the versions locked by many projects are allowed by their'
+        ' constraints after rewriting them.'
+    )
+
+    arguments: list[Argument] = [  # noqa: RUF012  # Instance variable in `Command`
+        argument(
+            'paths',
+            description='The project directories to check.',
+            multiple=True,
+        ),
+    ]
+
+    options: list[Option] = [  # noqa: RUF012  # Instance variable in `Command`
+        option(
+            'old',
+            flag=False,
+            default='caret',
+            description=f"""The constraint to replace. Must be one of:
+{PRETTY_CONSTRAINT_TYPES}""",
+        ),
+        option(
+            'new',
+            flag=False,
+            default='ge',
+            description=f"""The constraint to replace the old one with. Must be one of:
+{PRETTY_CONSTRAINT_TYPES}""",
+        ),
+        option(
+            'shard',
+            flag=False,
+            description=(
+                "Only check the i-th of N shards of the projects, given as 'i/N'."
+            ),
+        ),
+    ]
+
+    examples = """Examples:
+  $ poetry constrain verify projects/*
+  $ poetry constrain verify --old tilde --new ge projects/*
+  $ poetry constrain verify --shard 1/4 projects/*
+"""
+
+    help = f"""\
+Rewrite the constraints of each project with the given method and report every locked
+version that the rewritten constraint no longer allows. No file is modified.
+
+{examples}
+"""  # noqa: A003
+
+    def handle(self) -> int:
+        """Verify the constraint policy against the locked versions of each project.
+
+        Returns
+        -------
+          int
+            0 if every project could be read and no locked version violates the
+            policy, else non-zero.
+        """
+        # Deferred so ``numpy`` is only imported when the command is used
+        from poetry_plugin_constrain.sharding import InvalidShardError
+        from poetry_plugin_constrain.verify import build_violation_matrix
+
+        _old = self.option('old')
+        _new = self.option('new')
+
+        try:
+            shard = _parse_shard_option(self)
+        except InvalidShardError as exc:
+            line_error(io=self.io, message=f'ERROR: {exc}', style=Style.ERROR)
+            return Error.INVALID_SHARD
+
+        status = _check_constraint_types(self, _old, _new)
+        if status != 0:
+            return status
+
+        paths = [Path(path) for path in self.argument('paths')]
+        if shard is not None:
+            paths = _shard_projects(paths, Path.cwd(), shard)
+
+        projects = [
+            project for project in map(self._load_project, paths) if project is not None
+        ]
+        errors = len(paths) - len(projects)
+
+        matrix = build_violation_matrix(projects, old=_old, new=_new)
+
+        line(
+            io=self.io,
+            message=(
+                f'Checked {len(matrix.packages)} packages in {len(matrix.projects)}'
+                ' projects.'
+            ),
+            style=Style.INFO,
+            verbosity=Verbosity.VERBOSE,
+        )
+
+        if not matrix:
+            line(
+                io=self.io,
+                message='All locked versions are allowed by the new constraints.',
+                style=Style.INFO,
+            )
+            return Error.INVALID_PYPROJECT if errors else 0
+
+        for project, package, locked, constraint in matrix:
+            line(
+                io=self.io,
+                message=(
+                    f'{project}: <c1>{package}</> <c2>{locked}</> is not allowed by'
+                    f' <c2>{constraint}</>'
+                ),
+            )
+
+        line_error(
+            io=self.io,
+            message=f'ERROR: Found {len(matrix)} locked versions violating the policy.',
+            style=Style.ERROR,
+        )
+        return Error.POLICY_VIOLATIONS_FOUND
+
+    def _load_project(self, path: Path) -> Project | None:
+        """Load a project, reporting it if it cannot be read.
+
+        Parameters
+        ----------
+        path : Path
+            The project directory
+
+        Returns
+        -------
+        Project | None
+            The project constraints and locked versions, else ``None`` if its
+            ``pyproject.toml`` or ``poetry.lock`` is missing or invalid, or if a
+            constraint or locked version is malformed
+        """
+        from poetry_plugin_constrain.verify import load_project
+
+        try:
+            return load_project(path)
+        # Including ``TOMLDecodeError``, ``ParseConstraintError`` and ``InvalidVersion``
+        except (OSError, ValueError) as exc:
+            line_error(
+                io=self.io,
+                message=f'ERROR: Could not read {path}: {exc}',
+                style=Style.ERROR,
+            )
+            return None
+
+
+class ConstrainInventoryCommand(Command):
+    """Command to count the constraint types used by the projects of a tree."""
+
+    name = 'constrain inventory'
+    description = (
+        'Count the constraint types used by the dependencies of every poetry project'
+        ' in a directory tree.'
+    )
+
+    arguments: list[Argument] = [  # noqa: RUF012  # Instance variable in `Command`
+        argument(
+            'paths',
+            description=(
+                'The directories to search for projects (default: the current'
+                ' directory).'
+            ),
+            optional=True,
+            multiple=True,
+        ),
+    ]
+
+    options: list[Option] = [  # noqa: RUF012  # Instance variable in `Command`
+        option(
+            'jobs',
+            'j',
+            flag=False,
+            description=(
+                'The number of projects to read in parallel (default: the number of'
+                ' CPUs).'
+            ),
+        ),
+        option(
+            'json',
+            flag=True,
+            description='Print the inventory as JSON.',
+        ),
+        option(
+            'shard',
+            flag=False,
+            description=(
+                "Only read the i-th of N shards of the projects, given as 'i/N'."
+            ),
+        ),
+    ]
+
+    examples = """Examples:
+  $ poetry constrain inventory
+  $ poetry constrain inventory --json packages/ services/
+"""
+
+    help = f"""\
+Count how many dependencies use each type of constraint (e.g. '^', '~' or '==') in
+total, by group and by project. Projects are only read, never modified.
+
+{examples}
+"""  # noqa: A003
+
+    def handle(self) -> int:
+        """Print the constraint types used by the projects found under each path.
+
+        Returns
+        -------
+          int
+            0 if every project could be read, else non-zero.
+        """
+        import json
+
+        from poetry_plugin_constrain.batch import discover_projects
+        from poetry_plugin_constrain.inventory import scan_projects
+        from poetry_plugin_constrain.sharding import InvalidShardError
+
+        jobs = self.option('jobs')
+        if not _is_valid_jobs(jobs):
+            line_error(io=self.io, message=_invalid_jobs_message(jobs), style=Style.ERROR)
+            return Error.INVALID_JOBS
+
+        try:
+            shard = _parse_shard_option(self)
+        except InvalidShardError as exc:
+            line_error(io=self.io, message=f'ERROR: {exc}', style=Style.ERROR)
+            return Error.INVALID_SHARD
+
+        roots = [Path(path) for path in self.argument('paths') or ['.']]
+        projects = sorted(
+            {project for root in roots for project in discover_projects(root)}
+        )
+
+        if not projects:
+            line_error(
+                io=self.io,
+                message=(
+                    'ERROR: No poetry projects found under'
+                    f" {', '.join(repr(str(root)) for root in roots)}."
+                ),
+                style=Style.ERROR,
+            )
+            return Error.NO_PROJECTS_FOUND
+
+        if shard is not None:
+            projects = _shard_projects(projects, Path.cwd(), shard)
+
+        inventory = scan_projects(projects, jobs=int(jobs) if jobs is not None else None)
+
+        if self.option('json'):
+            self.io.write_line(json.dumps(inventory.to_dict(), indent=2))
+        else:
+            self._print_inventory(inventory)
+
+        for project in inventory.errors:
+            line_error(
+                io=self.io,
+                message=f'ERROR: Could not read {project.path}: {project.error}',
+                style=Style.ERROR,
+            )
+
+        return Error.INVALID_PYPROJECT if inventory.errors else 0
+
+    def _print_inventory(self, inventory: Inventory) -> None:
+        """Print the totals and the counts by group and by project.
+
+        Parameters
+        ----------
+        inventory : Inventory
+            The constraint types used by the projects
+        """
+
+        def _format(counts: Counter[str]) -> str:
+            return ', '.join(f'{kind} {count}' for kind, count in counts.most_common())
+
+        line(
+            io=self.io,
+            message=f'Scanned {len(inventory.projects)} projects.',
+            style=Style.INFO,
+        )
+        line(io=self.io, message='')  # Cosmetic new line
+
+        project_counts = inventory.project_counts
+        for kind, count in inventory.totals.most_common():
+            line(
+                io=self.io,
+                message=(
+                    f'<c1>{kind}</>: {count} dependencies in {project_counts[kind]}'
+                    ' projects'
+                ),
+            )
+
+        line(io=self.io, message='')  # Cosmetic new line
+
+        for group, counts in sorted(inventory.by_group.items()):
+            print_group_header(self.io, group)
+            line(io=self.io, message=f'  {_format(counts) or "no dependencies"}')
+            line(io=self.io, message='')  # Cosmetic new line
+
+        for project in inventory.projects:
+            if project.error is not None:
+                continue
+
+            print_project_header(self.io, project.path)
+            for group, counts in project.groups.items():
+                line(
+                    io=self.io,
+                    message=f'  <c1>{group}</>: {_format(counts) or "no dependencies"}',
+                )
+            line(io=self.io, message='')  # Cosmetic new line
+
+
+class ConstrainMergeCommand(Command):
+    """Command to combine the JSON reports of sharded ``poetry constrain`` runs."""
+
+    name = 'constrain merge'
+    description = (
+        "Combine the JSON reports of sharded 'poetry constrain' runs into a single"
+        ' verdict.'
+    )
+
+    arguments: list[Argument] = [  # noqa: RUF012  # Instance variable in `Command`
+        argument(
+            'reports',
+            description="The reports written with '--report-json'.",
+            multiple=True,
+        ),
+    ]
+
+    options: list[Option] = [  # noqa: RUF012  # Instance variable in `Command`
+        option(
+            'report-json',
+            flag=False,
+            description='Write the merged report to this file.',
+        ),
+    ]
+
+    examples = """Examples:
+  $ poetry constrain merge shard-*.json
+  $ poetry constrain merge --report-json report.json shard-1.json shard-2.json
+"""
+
+    help = f"""\
+Combine the reports of the shards of a 'poetry constrain --shard i/N' run. Fails if a
+shard is missing or given twice, or if any project failed.
+
+{examples}
+"""  # noqa: A003
+
+    def handle(self) -> int:  # noqa: C901
+        """Merge the reports and print the verdict.
+
+        Returns
+        -------
+          int
+            0 if every shard is present and every project succeeded, else non-zero.
+        """
+        from poetry_plugin_constrain.report import (
+            InconsistentShardsError,
+            InvalidReportError,
+            load_report,
+            merge_reports,
+            write_report,
+        )
+
+        try:
+            merged = merge_reports(
+                load_report(Path(path)) for path in self.argument('reports')
+            )
+        except (OSError, InvalidReportError) as exc:
+            line_error(io=self.io, message=f'ERROR: {exc}', style=Style.ERROR)
+            return Error.INVALID_REPORT
+        except InconsistentShardsError as exc:
+            line_error(io=self.io, message=f'ERROR: {exc}', style=Style.ERROR)
+            return Error.INCOMPLETE_SHARDS
+
+        report = merged.report
+
+        if self.option('report-json'):
+            write_report(Path(self.option('report-json')), report)
+
+        projects = report['projects']
+        failed = {path: entry for path, entry in projects.items() if entry['status']}
+        num_updates = sum(
+            len(updates)
+            for entry in projects.values()
+            for updates in entry['groups'].values()
+        )
+
+        for path, entry in projects.items():
+            for group, updates in entry['groups'].items():
+                for update in updates:
+                    line(
+                        io=self.io,
+                        message=(
+                            f"{path} (<c1>{group}</>): <c1>{update['name']}</>:"
+                            f" <c2>{update['old']}</> --> <c2>{update['new']}</>"
+                        ),
+                        verbosity=Verbosity.VERBOSE,
+                    )
+
+        line(
+            io=self.io,
+            message=(
+                f"Merged {len(self.argument('reports'))} reports: {len(projects)}"
+                f' projects, {num_updates} proposed updates, {len(failed)} failed.'
+            ),
+            style=Style.INFO,
+        )
+
+        for path, entry in failed.items():
+            line_error(
+                io=self.io,
+                message=f"  {path} (exit code {entry['status']})",
+                style=Style.ERROR,
+            )
+
+        for shards, problem in (
+            (merged.missing_shards, 'Missing'),
+            (merged.duplicate_shards, 'Duplicate'),
+        ):
+            if shards:
+                line_error(
+                    io=self.io,
+                    message=f"ERROR: {problem} shards: {', '.join(map(str, shards))}.",
+                    style=Style.ERROR,
+                )
+
+        if merged.missing_shards or merged.duplicate_shards:
+            return Error.INCOMPLETE_SHARDS
+
+        return report['status']
+
+
+class ConstrainDaemonCommand(Command):
+    """Command to serve ``poetry constrain`` requests from a long-lived process."""
+
+    name = 'constrain daemon'
+    description = (
+        "Serve 'poetry constrain' requests of the <comment>poetry-constrain</> client"
+        ' over a Unix socket.'
+    )
+
+    options: list[Option] = [  # noqa: RUF012  # Instance variable in `Command`
+        option(
+            'socket',
+            flag=False,
+            description=(
+                'The socket to listen on (default: $POETRY_PLUGIN_CONSTRAIN_SOCKET, or'
+                ' a socket in $XDG_RUNTIME_DIR or the temporary directory).'
+            ),
+        ),
+        option(
+            'stop',
+            flag=True,
+            description='Stop the daemon listening on the socket.',
+        ),
+    ]
+
+    examples = """Examples:
+  $ poetry constrain daemon &
+  $ poetry-constrain --dry-run
+  $ poetry constrain daemon --stop
+"""
+
+    help = f"""\
+Keep poetry imported and the projects it served parsed, and run the requests of the
+'poetry-constrain' client (which takes the same arguments as 'poetry constrain'). A
+project is parsed again when its pyproject.toml or poetry.lock changes. The client runs
+'poetry constrain' in its own process when no daemon is running.
+
+{examples}
+"""  # noqa: A003
+
+    def handle(self) -> int:
+        """Serve requests until the daemon is stopped.
+
+        Returns
+        -------
+          int
+            0 if the daemon ran (or was stopped) successfully, else non-zero.
+        """
+        from poetry_plugin_constrain.client import is_supported, socket_path
+
+        if not is_supported():
+            line_error(
+                io=self.io,
+                message='ERROR: The daemon requires Unix sockets.',
+                style=Style.ERROR,
+            )
+            return Error.DAEMON_NOT_SUPPORTED
+
+        # Deferred since ``socketserver.UnixStreamServer`` only exists with Unix sockets
+        from poetry_plugin_constrain.daemon import (
+            ConstrainDaemon,
+            DaemonAlreadyRunningError,
+            stop_daemon,
+        )
+
+        path = Path(self.option('socket')) if self.option('socket') else socket_path()
+
+        if self.option('stop'):
+            message = (
+                f"Stopped the daemon listening on '{path}'."
+                if stop_daemon(path)
+                else f"No daemon is listening on '{path}'."
+            )
+            line(io=self.io, message=message, style=Style.INFO)
+            return 0
+
+        try:
+            daemon = ConstrainDaemon(path)
+        except DaemonAlreadyRunningError as exc:
+            line_error(io=self.io, message=f'ERROR: {exc}', style=Style.ERROR)
+            return Error.DAEMON_ALREADY_RUNNING
+
+        line(io=self.io, message=f"Listening on '{path}'...", style=Style.INFO)
+
+        try:
+            daemon.serve()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            daemon.server_close()
+
+        line(io=self.io, message='Stopped the daemon.', style=Style.INFO)
+
+        return 0
+
+
+class ConstrainStatsCommand(Command):
+    """Command to summarize the overhead the post-hook added to ``poetry`` commands."""
+
+    name = 'constrain stats'
+    description = (
+        'Summarize the wall time the post-hook added to each poetry command, recorded'
+        " with the 'hook-stats' setting."
+    )
+
+    options: list[Option] = [  # noqa: RUF012  # Instance variable in `Command`
+        option(
+            'file',
+            flag=False,
+            description=(
+                "The stats file to read (default: 'hook-stats.jsonl' in the plugin"
+                ' cache directory).'
+            ),
+        ),
+        option(
+            'json',
+            flag=True,
+            description='Print the statistics as JSON.',
+        ),
+        option(
+            'clear',
+            flag=True,
+            description='Delete the recorded statistics.',
+        ),
+    ]
+
+    examples = """Examples:
+  $ POETRY_PLUGIN_CONSTRAIN_HOOK_STATS=1 poetry add requests
+  $ poetry constrain stats
+  $ poetry constrain stats --json
+"""
+
+    help = f"""\
+Print the percentiles of the wall time of the post-hook, by command (init, add, check or
+update) and by outcome: whether it solved the new constraints, only constrained them, or
+was skipped and why.
+
+{examples}
+"""  # noqa: A003
+
+    def handle(self) -> int:
+        """Print the statistics of the recorded post-hook runs.
+
+        Returns
+        -------
+          int
+            0 if executes successfully, else non-zero.
+        """
+        import json
+
+        from poetry_plugin_constrain.stats import (
+            PERCENTILES,
+            STATS_FILE_NAME,
+            load_records,
+            summarize,
+        )
+
+        path = (
+            Path(self.option('file'))
+            if self.option('file')
+            else get_cache_directory() / STATS_FILE_NAME
+        )
+
+        if self.option('clear'):
+            with suppress(FileNotFoundError):
+                path.unlink()
+
+            line(io=self.io, message=f"Cleared '{path}'.", style=Style.INFO)
+            return 0
+
+        records = load_records(path)
+        stats = summarize(records)
+
+        if self.option('json'):
+            self.io.write_line(
+                json.dumps(
+                    {
+                        'runs': len(records),
+                        'stats': [
+                            {
+                                'command': row.command,
+                                'outcome': row.outcome,
+                                'runs': row.runs,
+                                **{
+                                    f'p{percentile}': value
+                                    for percentile, value in zip(
+                                        PERCENTILES, row.percentiles
+                                    )
+                                },
+                                'max': row.max,
+                            }
+                            for row in stats
+                        ],
+                    },
+                    indent=2,
+                ),
+            )
+            return 0
+
+        if not records:
+            line(
+                io=self.io,
+                message=(
+                    f"No post-hook runs recorded in '{path}'. Set 'hook-stats' to"
+                    ' record them.'
+                ),
+                style=Style.INFO,
+            )
+            return 0
+
+        command_width = max(len('command'), *(len(row.command) for row in stats))
+        outcome_width = max(len('outcome'), *(len(row.outcome) for row in stats))
+
+        line(
+            io=self.io,
+            message=f'Post-hook wall time of {len(records)} runs, in ms:',
+            style=Style.INFO,
+        )
+        line(
+            io=self.io,
+            message=(
+                f"  {'command':<{command_width}}  {'outcome':<{outcome_width}}"
+                f"  {'runs':>6}"
+                + ''.join(f"  {f'p{percentile}':>8}" for percentile in PERCENTILES)
+                + f"  {'max':>8}"
+            ),
+        )
+
+        for row in stats:
+            line(
+                io=self.io,
+                message=(
+                    f'  <c1>{row.command:<{command_width}}</>'
+                    f'  {row.outcome:<{outcome_width}}  {row.runs:>6}'
+                    + ''.join(f'  {value:>8.1f}' for value in row.percentiles)
+                    + f'  {row.max:>8.1f}'
+                ),
+            )
+
+        return 0
@@ -3,9 +3,12 @@
 from __future__ import annotations
 
 import os
+from collections import OrderedDict
+from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-from poetry_plugin_constrain.utils import deep_get
+from poetry_plugin_constrain._compat import tomllib
+from poetry_plugin_constrain.utils import deep_get, file_state
 
 if TYPE_CHECKING:
     from poetry.poetry import Poetry
@@ -17,6 +20,7 @@ TOML_VAR_NAMES = [
     'post-check-hook',
     'post-update-hook',
     'enable-post-hooks',
+    'pre-add-hook',
     'old',
     'new',
     'only',
@@ -25,11 +29,26 @@ TOML_VAR_NAMES = [
     'update',
     'lock',
     'check',
+    'admitted',
+    'profile',
+    'profile-output',
+    'trace-memory',
+    'trace-output',
+    'trace-listeners',
+    'hook-stats',
 ]
 
 ENV_VAR_PREFIX = TOML_TABLE.replace('-', '_').upper()
 ENV_VAR_NAMES = {name: name.replace('-', '_').upper() for name in TOML_VAR_NAMES}
 
+# The number of documents kept by ``read_pyproject``, e.g. for the projects served by a
+# daemon
+DOCUMENT_CACHE_SIZE = 64
+
+# The documents parsed by ``read_pyproject`` and the state of their files, most
+# recently used last
+_DOCUMENTS: OrderedDict[Path, tuple[tuple[int, int, int], dict[str, Any]]] = OrderedDict()
+
 
 class TruthValueError(Exception):
     def __init__(
@@ -63,6 +82,46 @@ def _strtobool(value: str | bool) -> bool:
         raise TruthValueError(value)
 
 
+def read_pyproject(path: Path) -> dict[str, Any]:
+    """Read a ``pyproject.toml`` file that is not going to be written.
+
+    The file is parsed with ``tomllib`` (or ``tomli`` before Python 3.11), which is much
+    faster than the ``tomlkit`` document ``poetry`` keeps to preserve the style of the
+    file when writing it (``poetry.pyproject.data``). The ``DOCUMENT_CACHE_SIZE`` most
+    recently read documents are cached until their file changes, and must not be
+    modified. Prefer ``poetry.local_config`` for the ``[tool.poetry]`` table of a
+    loaded project, which ``poetry`` already parsed.
+
+    Parameters
+    ----------
+    path : Path
+        The ``pyproject.toml`` file
+
+    Returns
+    -------
+    dict[str, Any]
+        The parsed file, or an empty dictionary if it does not exist
+    """
+    state = file_state(path)
+    if state is None:
+        return {}
+
+    cached = _DOCUMENTS.get(path)
+    if cached is not None and cached[0] == state:
+        _DOCUMENTS.move_to_end(path)
+        return cached[1]
+
+    with path.open('rb') as file:
+        document = tomllib.load(file)
+
+    _DOCUMENTS[path] = (state, document)
+    _DOCUMENTS.move_to_end(path)
+    while len(_DOCUMENTS) > DOCUMENT_CACHE_SIZE:
+        _DOCUMENTS.popitem(last=False)
+
+    return document
+
+
 def get_config_variable(poetry: Poetry, toml_var_name: str, default: Any = None) -> Any:
     """Get the configuration variable value for the plugin if it exists.
 
@@ -78,6 +137,37 @@ def get_config_variable(poetry: Poetry, toml_var_name: str, default: Any = None)
     default : Any
         The default value to use if variable not found, by default ``None``
 
+    Returns
+    -------
+    Any
+        The value of the variable or the default value if not found.
+    """
+    return get_document_config_variable(
+        read_pyproject(poetry.pyproject.path),
+        toml_var_name,
+        default,
+    )
+
+
+def get_document_config_variable(
+    document: dict[str, Any],
+    toml_var_name: str,
+    default: Any = None,
+) -> Any:
+    """Get the configuration variable value for the plugin from a parsed document.
+
+    Like ``get_config_variable``, without loading a ``poetry`` project (e.g. for a
+    ``pyproject.toml`` being edited).
+
+    Parameters
+    ----------
+    document : dict[str, Any]
+        The parsed ``pyproject.toml``
+    toml_var_name : str
+        The ``pyproject.toml`` configuration variable name for the plugin.
+    default : Any
+        The default value to use if variable not found, by default ``None``
+
     Returns
     -------
     Any
@@ -86,7 +176,7 @@ def get_config_variable(poetry: Poetry, toml_var_name: str, default: Any = None)
     if toml_var_name not in ENV_VAR_NAMES:
         raise ConfigurationVariableError(toml_var_name)
 
-    pyproject_toml_section = deep_get(poetry.pyproject.data, ['tool', TOML_TABLE])
+    pyproject_toml_section = deep_get(document, ['tool', TOML_TABLE])
 
     if pyproject_toml_section and toml_var_name in pyproject_toml_section:
         return pyproject_toml_section[toml_var_name]
@@ -116,3 +206,117 @@ def are_post_hooks_enabled(poetry: Poetry) -> bool:
             default=True,
         ),
     )
+
+
+def is_pre_add_hook_enabled(poetry: Poetry) -> bool:
+    """Return whether ``poetry add`` rewrites new constraints before locking.
+
+    Parameters
+    ----------
+    poetry : Poetry
+        The ``poetry`` application
+
+    Returns
+    -------
+    bool
+        ``True`` if ``pre-add-hook`` and ``enable-post-hooks`` are set, else ``False``.
+    """
+    return are_post_hooks_enabled(poetry) and _strtobool(
+        get_config_variable(
+            poetry,
+            toml_var_name='pre-add-hook',
+            default=True,
+        ),
+    )
+
+
+def is_profiling_enabled(poetry: Poetry) -> bool:
+    """Return whether ``poetry constrain`` times each phase of its runs.
+
+    Parameters
+    ----------
+    poetry : Poetry
+        The ``poetry`` application
+
+    Returns
+    -------
+    bool
+        ``True`` if ``profile`` is set, else ``False``.
+    """
+    return _strtobool(
+        get_config_variable(
+            poetry,
+            toml_var_name='profile',
+            default=False,
+        ),
+    )
+
+
+def is_memory_tracing_enabled(poetry: Poetry) -> bool:
+    """Return whether ``poetry constrain`` traces the memory each phase allocates.
+
+    Parameters
+    ----------
+    poetry : Poetry
+        The ``poetry`` application
+
+    Returns
+    -------
+    bool
+        ``True`` if ``trace-memory`` is set, else ``False``.
+    """
+    return _strtobool(
+        get_config_variable(
+            poetry,
+            toml_var_name='trace-memory',
+            default=False,
+        ),
+    )
+
+
+def is_hook_stats_enabled(poetry: Poetry) -> bool:
+    """Return whether the post-hook records its overhead for ``constrain stats``.
+
+    Parameters
+    ----------
+    poetry : Poetry
+        The ``poetry`` application
+
+    Returns
+    -------
+    bool
+        ``True`` if ``hook-stats`` is set, else ``False``.
+    """
+    return _strtobool(
+        get_config_variable(
+            poetry,
+            toml_var_name='hook-stats',
+            default=False,
+        ),
+    )
+
+
+def get_cache_directory(poetry: Poetry | None = None) -> Path:
+    """Return the directory the plugin caches data in across runs.
+
+    The directory lives in the ``poetry`` cache directory (the ``cache-dir`` setting).
+
+    Parameters
+    ----------
+    poetry : Poetry | None, optional
+        The ``poetry`` application, by default ``None`` to read the global ``poetry``
+        configuration, e.g. outside of a project
+
+    Returns
+    -------
+    Path
+        The plugin cache directory. It is not guaranteed to exist.
+    """
+    if poetry is None:
+        from poetry.config.config import Config
+
+        config = Config.create()
+    else:
+        config = poetry.config
+
+    return Path(config.get('cache-dir')).expanduser() / TOML_TABLE
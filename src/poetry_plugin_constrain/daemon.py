@@ -0,0 +1,393 @@
+"""A long-lived process serving ``poetry constrain`` requests over a Unix socket.
+
+Each ``poetry constrain`` run pays for the interpreter startup, the ``poetry`` and
+plugin imports, and for parsing the ``pyproject.toml`` and ``poetry.lock`` of the
+project. The daemon pays for the imports once and keeps the ``Poetry`` instance and
+the environment of each project it served. They are reused until the
+``pyproject.toml`` or ``poetry.lock`` of the project change (i.e. their inode,
+modification time or size) or until a request changes them in memory (e.g. the
+installer run by ``--check``).
+
+Requests are handled one at a time, as ``poetry`` is not thread-safe and each request
+runs in the working directory of its client. A request is a line of JSON::
+
+    {"cwd": "/path/to/project", "args": ["--dry-run"], "decorated": false}
+
+and so is its response::
+
+    {"status": 0, "output": "...", "error": ""}
+
+A ``{"ping": true}`` request only checks the daemon is running and a
+``{"stop": true}`` request stops it. The daemon requires Unix sockets (see
+``client.is_supported``).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+from collections import OrderedDict
+from contextlib import suppress
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from poetry_plugin_constrain.client import (
+    CONNECT_TIMEOUT,
+    DaemonTimeoutError,
+    DaemonUnavailableError,
+    request,
+    runs_in_process,
+)
+from poetry_plugin_constrain.utils import file_state
+
+if TYPE_CHECKING:
+    from cleo.events.event import Event
+    from cleo.events.event_dispatcher import EventDispatcher
+    from poetry.packages.locker import Locker
+    from poetry.poetry import Poetry
+    from poetry.utils.env import Env
+
+# The number of projects whose ``Poetry`` instance is kept
+CACHE_SIZE = 64
+
+# Seconds to wait for a client to send its request
+REQUEST_TIMEOUT = 5.0
+
+# The files of a project whose changes invalidate its cached ``Poetry`` instance
+_STATE_FILES = ('pyproject.toml', 'poetry.lock')
+
+
+class DaemonAlreadyRunningError(RuntimeError):
+    def __init__(
+        self,
+        path: Path,
+    ) -> None:
+        super().__init__(f"A 'poetry constrain' daemon is already listening on '{path}'.")
+
+
+class _Entry(NamedTuple):
+    state: tuple[tuple[int, int, int] | None, ...]
+    poetry: Poetry
+    locker: Locker
+
+
+class ProjectCache:
+    """The ``Poetry`` instances of the most recently used projects."""
+
+    def __init__(self, maxsize: int = CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Path, _Entry] = OrderedDict()
+        self._envs: dict[Path, Env] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, directory: Path) -> Poetry | None:
+        """Return the ``Poetry`` instance of the project a directory belongs to.
+
+        Parameters
+        ----------
+        directory : Path
+            A directory in the project
+
+        Returns
+        -------
+        Poetry | None
+            The cached instance if the project files are unchanged, else a new one.
+            ``None`` if the directory is not in a ``poetry`` project.
+        """
+        from poetry.core.factory import Factory as CoreFactory
+        from poetry.factory import Factory
+
+        try:
+            root = CoreFactory.locate(directory).parent
+        except RuntimeError:
+            return None
+
+        state = tuple(file_state(root / name) for name in _STATE_FILES)
+
+        entry = self._entries.get(root)
+        if entry is None or entry.state != state:
+            poetry = Factory().create_poetry(cwd=root)
+            entry = _Entry(state, poetry, poetry.locker)
+            self._entries[root] = entry
+            # e.g. the ``python`` constraint may select another environment
+            self._envs.pop(root, None)
+
+        self._entries.move_to_end(root)
+        while len(self._entries) > self.maxsize:
+            self._envs.pop(self._entries.popitem(last=False)[0], None)
+
+        return entry.poetry
+
+    def get_env(self, poetry: Poetry) -> Env | None:
+        """Return the environment found for a cached project, if it still exists.
+
+        Parameters
+        ----------
+        poetry : Poetry
+            The cached ``Poetry`` instance of the project
+
+        Returns
+        -------
+        Env | None
+            The environment, or ``None`` if none was found yet
+        """
+        env = self._envs.get(poetry.pyproject.path.parent)
+        return env if env is not None and env.path.exists() else None
+
+    def set_env(self, poetry: Poetry, env: Env) -> None:
+        """Keep the environment found for a cached project.
+
+        Finding the environment of a project runs its interpreter several times.
+
+        Parameters
+        ----------
+        poetry : Poetry
+            The cached ``Poetry`` instance of the project
+        env : Env
+            The environment of the project
+        """
+        root = poetry.pyproject.path.parent
+        if root in self._entries:
+            self._envs[root] = env
+
+    def discard_modified(self) -> None:
+        """Forget the instances a request changed in memory.
+
+        Files written by a request are detected by ``get``. The installer (e.g. run by
+        ``--check``) also changes the dependencies of the package and replaces the
+        locker of the ``Poetry`` instance, without necessarily writing any file.
+        """
+        for root, entry in list(self._entries.items()):
+            if entry.poetry.locker is not entry.locker:
+                del self._entries[root]
+                self._envs.pop(root, None)
+
+
+def _restore_env(
+    cache: ProjectCache,
+    poetry: Poetry,
+    event: Event,
+    event_name: str,  # noqa: ARG001
+    dispatcher: EventDispatcher,  # noqa: ARG001
+) -> None:
+    from cleo.events.console_command_event import ConsoleCommandEvent
+
+    from poetry_plugin_constrain.commands import ConstrainCommand
+
+    assert isinstance(event, ConsoleCommandEvent)
+    command = event.command
+
+    if isinstance(command, ConstrainCommand) and command._env is None:
+        env = cache.get_env(poetry)
+        if env is not None:
+            command.set_env(env)
+
+
+def _keep_env(
+    cache: ProjectCache,
+    poetry: Poetry,
+    event: Event,
+    event_name: str,  # noqa: ARG001
+    dispatcher: EventDispatcher,  # noqa: ARG001
+) -> None:
+    from cleo.events.console_terminate_event import ConsoleTerminateEvent
+
+    from poetry_plugin_constrain.commands import ConstrainCommand
+
+    assert isinstance(event, ConsoleTerminateEvent)
+    command = event.command
+
+    # The environment is only found if the request ran the installer
+    if isinstance(command, ConstrainCommand) and command._env is not None:
+        cache.set_env(poetry, command.env)
+
+
+def execute(
+    cache: ProjectCache,
+    cwd: Path,
+    args: list[str],
+    *,
+    decorated: bool = False,
+) -> dict[str, Any]:
+    """Run ``poetry constrain`` in a directory with the cached project.
+
+    Parameters
+    ----------
+    cache : ProjectCache
+        The cached projects
+    cwd : Path
+        The working directory of the client
+    args : list[str]
+        The arguments passed to ``poetry constrain``
+    decorated : bool, optional
+        Whether to style the output, by default ``False``
+
+    Returns
+    -------
+    dict[str, Any]
+        The exit code and the output of the command, or an error if the request must
+        run in the client
+    """
+    from cleo.events.console_events import COMMAND, TERMINATE
+    from cleo.io.inputs.argv_input import ArgvInput
+    from cleo.io.outputs.buffered_output import BufferedOutput
+    from poetry.console.application import Application
+
+    from poetry_plugin_constrain.commands import Error
+
+    if runs_in_process(args):
+        return {
+            'status': Error.INCOMPATIBLE_OPTIONS,
+            'output': '',
+            'error': (
+                f"'poetry constrain {' '.join(args)}' cannot be run by the daemon. Run"
+                " it with 'poetry constrain' instead.\n"
+            ),
+        }
+
+    output = BufferedOutput(decorated=decorated)
+    error_output = BufferedOutput(decorated=decorated)
+
+    previous = Path.cwd()
+
+    try:
+        # Relative paths in the arguments are relative to the client
+        os.chdir(cwd)
+
+        application = Application()
+        application.auto_exits(False)  # noqa: FBT003
+
+        poetry = cache.get(cwd)
+        if poetry is not None:
+            application._poetry = poetry
+
+            # Hand the environment found by an earlier request to the command, which
+            # otherwise finds it again when it first runs the installer
+            dispatcher = application.event_dispatcher
+            assert dispatcher is not None
+            dispatcher.add_listener(COMMAND, partial(_restore_env, cache, poetry))
+            dispatcher.add_listener(TERMINATE, partial(_keep_env, cache, poetry))
+
+        status = application.run(
+            ArgvInput(['poetry', 'constrain', *args]),
+            output,
+            error_output,
+        )
+    except Exception as exc:  # noqa: BLE001 # pylint: disable=W0718
+        # Report e.g. an invalid pyproject.toml to the client, but keep serving
+        error_output.write_line(str(exc))
+        status = 1
+    finally:
+        os.chdir(previous)
+        cache.discard_modified()
+
+    return {'status': status, 'output': output.fetch(), 'error': error_output.fetch()}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: ConstrainDaemon
+
+    # Set on the connection, so that a client sending nothing cannot block the daemon
+    timeout = REQUEST_TIMEOUT
+
+    def handle(self) -> None:
+        try:
+            payload = json.loads(self.rfile.readline())
+        except socket.timeout:
+            return
+
+        if payload.get('stop') or payload.get('ping'):
+            self.server.stopped = bool(payload.get('stop'))
+            response = {'status': 0, 'output': '', 'error': ''}
+        else:
+            response = execute(
+                self.server.cache,
+                Path(payload['cwd']),
+                list(payload.get('args', [])),
+                decorated=bool(payload.get('decorated', False)),
+            )
+
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class ConstrainDaemon(socketserver.UnixStreamServer):
+    """Serve ``poetry constrain`` requests on a Unix socket, one at a time."""
+
+    def __init__(self, path: Path, cache: ProjectCache | None = None) -> None:
+        """Listen on a socket.
+
+        Parameters
+        ----------
+        path : Path
+            The socket to listen on. A socket left by a daemon that is no longer
+            running is replaced.
+        cache : ProjectCache | None, optional
+            The cached projects, by default an empty cache
+
+        Raises
+        ------
+        DaemonAlreadyRunningError
+            If another daemon is listening on the socket
+        """
+        self.path = path
+        self.cache = cache if cache is not None else ProjectCache()
+        self.stopped = False
+
+        if path.exists():
+            try:
+                request({'ping': True}, path, timeout=CONNECT_TIMEOUT)
+            except DaemonUnavailableError:
+                path.unlink()
+            except DaemonTimeoutError as exc:
+                # Busy serving a request
+                raise DaemonAlreadyRunningError(path) from exc
+            else:
+                raise DaemonAlreadyRunningError(path)
+
+        # Keep the socket private to the user
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(path), _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def serve(self) -> None:
+        """Handle requests until a stop request is received."""
+        while not self.stopped:
+            self.handle_request()
+
+    def server_close(self) -> None:
+        """Close the socket and remove its file."""
+        super().server_close()
+        with suppress(FileNotFoundError):
+            self.path.unlink()
+
+
+def stop_daemon(path: Path) -> bool:
+    """Ask the daemon listening on a socket to stop.
+
+    Parameters
+    ----------
+    path : Path
+        The socket of the daemon
+
+    Returns
+    -------
+    bool
+        ``True`` if a daemon was running
+    """
+    try:
+        request({'stop': True}, path)
+    except DaemonUnavailableError:
+        return False
+    except DaemonTimeoutError:
+        # The daemon stops once it reads the request
+        return True
+
+    return True
@@ -0,0 +1,152 @@
+"""Count the constraint types used by the dependencies of many projects.
+
+The dependency tables are walked the same way ``poetry constrain`` walks them, but
+``pyproject.toml`` files are only read (with ``tomllib``) and ``poetry`` itself is never
+loaded, so thousands of projects can be scanned in a few seconds.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import TYPE_CHECKING, Iterable, NamedTuple
+
+from poetry.core.packages.dependency_group import MAIN_GROUP
+
+from poetry_plugin_constrain._compat import tomllib
+from poetry_plugin_constrain.batch import imap_unordered
+from poetry_plugin_constrain.utils import constraint_types, deep_get
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_CHUNKSIZE = 32
+
+
+class ProjectInventory(NamedTuple):
+    """The number of dependencies using each constraint type in a project."""
+
+    path: Path
+    groups: dict[str, Counter[str]]
+    error: str | None = None
+
+
+class Inventory(NamedTuple):
+    """The constraint types used across many projects."""
+
+    projects: list[ProjectInventory]
+
+    @property
+    def totals(self) -> Counter[str]:
+        """The number of dependencies using each constraint type."""
+        return sum(self.by_group.values(), Counter())
+
+    @property
+    def by_group(self) -> dict[str, Counter[str]]:
+        """The number of dependencies using each constraint type, by group."""
+        groups: dict[str, Counter[str]] = {}
+        for project in self.projects:
+            for group, counts in project.groups.items():
+                groups.setdefault(group, Counter()).update(counts)
+        return groups
+
+    @property
+    def project_counts(self) -> Counter[str]:
+        """The number of projects using each constraint type."""
+        return Counter(
+            kind
+            for project in self.projects
+            for kind in set().union(*project.groups.values())
+        )
+
+    @property
+    def errors(self) -> list[ProjectInventory]:
+        """The projects whose ``pyproject.toml`` could not be read."""
+        return [project for project in self.projects if project.error is not None]
+
+    def to_dict(self) -> dict:
+        """Return the inventory as a JSON serializable dictionary.
+
+        Returns
+        -------
+        dict
+            The totals and the counts by group and by project
+        """
+        return {
+            'totals': dict(self.totals),
+            'projects_using': dict(self.project_counts),
+            'groups': {group: dict(counts) for group, counts in self.by_group.items()},
+            'projects': {
+                str(project.path): {
+                    group: dict(counts) for group, counts in project.groups.items()
+                }
+                for project in self.projects
+                if project.error is None
+            },
+            'errors': {str(project.path): project.error for project in self.errors},
+        }
+
+
+def scan_project(path: Path) -> ProjectInventory:
+    """Count the dependencies using each constraint type in a project.
+
+    A dependency using several types (e.g. ``>=1.2,<2``) is counted once for each
+    of them. Dependencies without a version (e.g. path or VCS dependencies) are not
+    counted.
+
+    Parameters
+    ----------
+    path : Path
+        The project directory containing ``pyproject.toml``
+
+    Returns
+    -------
+    ProjectInventory
+        The counts of each constraint type keyed by group name
+    """
+    try:
+        with (path / 'pyproject.toml').open('rb') as file:
+            poetry_config = deep_get(tomllib.load(file), ['tool', 'poetry']) or {}
+    except (OSError, tomllib.TOMLDecodeError) as exc:
+        return ProjectInventory(path, {}, error=str(exc))
+
+    tables = {MAIN_GROUP: poetry_config.get('dependencies', {})}
+    tables.update(
+        (name, group.get('dependencies', {}))
+        for name, group in poetry_config.get('group', {}).items()
+    )
+
+    groups: dict[str, Counter[str]] = {}
+    for group, table in tables.items():
+        counts: Counter[str] = Counter()
+
+        for spec in table.values():
+            # Support multiple constraint dependencies
+            for entry in spec if isinstance(spec, list) else [spec]:
+                constraint = entry.get('version') if isinstance(entry, dict) else entry
+                if isinstance(constraint, str):
+                    counts.update(set(constraint_types(constraint)))
+
+        groups[group] = counts
+
+    return ProjectInventory(path, groups)
+
+
+def scan_projects(projects: Iterable[Path], jobs: int | None = None) -> Inventory:
+    """Count the dependencies using each constraint type in many projects.
+
+    Parameters
+    ----------
+    projects : Iterable[Path]
+        The project directories
+    jobs : int | None, optional
+        The number of worker processes, by default the number of CPUs
+
+    Returns
+    -------
+    Inventory
+        The counts of each project, sorted by path
+    """
+    # Reading a project is cheap, so send projects to the workers in chunks
+    results = imap_unordered(scan_project, projects, jobs=jobs, chunksize=_CHUNKSIZE)
+
+    return Inventory(sorted(results, key=lambda project: project.path))
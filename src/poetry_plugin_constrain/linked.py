@@ -0,0 +1,202 @@
+"""Order the projects of a monorepo by their ``path`` dependencies.
+
+Projects that depend on each other through ``path`` dependencies must be locked after
+the projects they depend on, or their lock files go stale as soon as an upstream
+constraint changes. The projects are grouped into *levels*: every project of a level
+only depends on projects of earlier levels, so the projects of a level can be locked
+in parallel.
+
+Since all projects are rewritten before any is locked, the files of every project are
+snapshot first and restored if any step fails.
+"""
+
+from __future__ import annotations
+
+from contextlib import suppress
+from typing import TYPE_CHECKING, Iterable
+
+from poetry_plugin_constrain._compat import tomllib
+from poetry_plugin_constrain.utils import deep_get
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+# The files ``poetry constrain`` and ``poetry lock`` may change
+PROJECT_FILES = ('pyproject.toml', 'poetry.lock')
+
+
+class DependencyCycleError(ValueError):
+    def __init__(
+        self,
+        projects: Iterable[Path],
+    ) -> None:
+        super().__init__(
+            'The path dependencies of these projects form a cycle:'
+            f" {', '.join(sorted(map(str, projects)))}",
+        )
+
+
+def path_dependencies(path: Path) -> set[Path]:
+    """Return the directories of the ``path`` dependencies of a project.
+
+    Parameters
+    ----------
+    path : Path
+        The project directory containing ``pyproject.toml``
+
+    Returns
+    -------
+    set[Path]
+        The resolved directories of the path dependencies in all groups
+    """
+    try:
+        with (path / 'pyproject.toml').open('rb') as file:
+            poetry_config = deep_get(tomllib.load(file), ['tool', 'poetry']) or {}
+    except (OSError, tomllib.TOMLDecodeError):
+        return set()
+
+    tables = [poetry_config.get('dependencies', {})] + [
+        group.get('dependencies', {}) for group in poetry_config.get('group', {}).values()
+    ]
+
+    return {
+        (path / entry['path']).resolve()
+        for table in tables
+        for spec in table.values()
+        # Support multiple constraint dependencies
+        for entry in (spec if isinstance(spec, list) else [spec])
+        if isinstance(entry, dict) and 'path' in entry
+    }
+
+
+def build_graph(projects: Iterable[Path]) -> dict[Path, set[Path]]:
+    """Return the projects each project depends on through ``path`` dependencies.
+
+    Parameters
+    ----------
+    projects : Iterable[Path]
+        The project directories
+
+    Returns
+    -------
+    dict[Path, set[Path]]
+        The upstream projects of each project. Path dependencies on directories that
+        are not among ``projects`` are left out.
+    """
+    by_directory = {project.resolve(): project for project in projects}
+
+    return {
+        project: {
+            by_directory[directory]
+            for directory in path_dependencies(project)
+            if directory in by_directory and by_directory[directory] != project
+        }
+        for project in by_directory.values()
+    }
+
+
+def topological_levels(graph: dict[Path, set[Path]]) -> list[list[Path]]:
+    """Group the projects into levels that only depend on earlier levels.
+
+    Parameters
+    ----------
+    graph : dict[Path, set[Path]]
+        The upstream projects of each project
+
+    Returns
+    -------
+    list[list[Path]]
+        The levels, each sorted by path
+
+    Raises
+    ------
+    DependencyCycleError
+        If the path dependencies form a cycle
+    """
+    remaining = {project: set(upstream) for project, upstream in graph.items()}
+    levels = []
+
+    while remaining:
+        level = sorted(project for project, upstream in remaining.items() if not upstream)
+        if not level:
+            raise DependencyCycleError(remaining)
+
+        levels.append(level)
+        for project in level:
+            del remaining[project]
+        for upstream in remaining.values():
+            upstream.difference_update(level)
+
+    return levels
+
+
+def downstream_closure(
+    graph: dict[Path, set[Path]], projects: Iterable[Path]
+) -> set[Path]:
+    """Return the projects and every project that depends on them, transitively.
+
+    Parameters
+    ----------
+    graph : dict[Path, set[Path]]
+        The upstream projects of each project
+    projects : Iterable[Path]
+        The projects to start from
+
+    Returns
+    -------
+    set[Path]
+        The projects and all of their downstream projects
+    """
+    closure = set(projects)
+
+    changed = True
+    while changed:
+        downstream = {
+            project for project, upstream in graph.items() if upstream & closure
+        }
+        changed = not downstream <= closure
+        closure |= downstream
+
+    return closure
+
+
+class Snapshot:
+    """The contents of the ``pyproject.toml`` and ``poetry.lock`` files of projects."""
+
+    def __init__(self, projects: Iterable[Path]) -> None:
+        self._contents: dict[Path, bytes | None] = {}
+
+        for project in projects:
+            for name in PROJECT_FILES:
+                path = project / name
+                try:
+                    self._contents[path] = path.read_bytes()
+                except FileNotFoundError:
+                    self._contents[path] = None
+
+    def changed(self, project: Path) -> bool:
+        """Return whether the ``pyproject.toml`` of a project changed since the snapshot.
+
+        Parameters
+        ----------
+        project : Path
+            The project directory
+
+        Returns
+        -------
+        bool
+            ``True`` if the file differs from its snapshot
+        """
+        path = project / 'pyproject.toml'
+        with suppress(FileNotFoundError):
+            return path.read_bytes() != self._contents[path]
+        return self._contents[path] is not None
+
+    def restore(self) -> None:
+        """Write back the files of the snapshot and remove the ones created since."""
+        for path, content in self._contents.items():
+            if content is None:
+                with suppress(FileNotFoundError):
+                    path.unlink()
+            elif not path.exists() or path.read_bytes() != content:
+                path.write_bytes(content)
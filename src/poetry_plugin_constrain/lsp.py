@@ -0,0 +1,451 @@
+"""A language server reporting dependency constraints to rewrite in ``pyproject.toml``.
+
+Editors start the server with the ``poetry-constrain-lsp`` script (or ``python -m
+poetry_plugin_constrain.lsp``) and talk to it over ``stdio`` with the Language Server
+Protocol. Each constraint of a dependency table that ``poetry constrain`` would rewrite
+is published as a warning, with a quick fix applying the rewrite (and a fix for the
+whole file).
+
+The server keeps each open document as a list of lines and the tokens found on each
+line (see ``text.py``). An edit only tokenizes again the lines it touched, and the
+constraints are rewritten with the same parser as ``poetry constrain``
+(``utils.replace_constraint``).
+Neither ``poetry`` nor the lock file is loaded, unless the client runs the
+``poetry-plugin-constrain.check`` command, which checks the dependencies can still be
+solved with ``poetry constrain --dry-run --check``.
+
+The ``old`` and ``new`` constraint types are read from the
+``[tool.poetry-plugin-constrain]`` table of the document, then from the environment
+variables of the plugin, then from the ``initializationOptions`` of the client.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+
+from poetry_plugin_constrain.text import (
+    constraints,
+    rewrite_constraint,
+    settings,
+    tokenize,
+)
+from poetry_plugin_constrain.utils import CONSTRAINT_TYPES
+
+if TYPE_CHECKING:
+    from poetry_plugin_constrain.daemon import ProjectCache
+
+SOURCE = 'poetry-plugin-constrain'
+CHECK_COMMAND = 'poetry-plugin-constrain.check'
+
+# See the Language Server Protocol specification
+_INCREMENTAL_SYNC = 2
+_WARNING = 2
+_MESSAGE_ERROR = 1
+_MESSAGE_INFO = 3
+_METHOD_NOT_FOUND = -32601
+_INTERNAL_ERROR = -32603
+
+
+def _utf16_length(text: str) -> int:
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _index(line: str, character: int) -> int:
+    """Return the index in a line of a position given in UTF-16 code units."""
+    if line.isascii():
+        return min(character, len(line))
+
+    units = 0
+    for index, char in enumerate(line):
+        if units >= character:
+            return index
+        units += 2 if ord(char) > 0xFFFF else 1
+
+    return len(line)
+
+
+def _position(line: str, index: int) -> int:
+    return _utf16_length(line[:index])
+
+
+class Document:
+    """An open ``pyproject.toml``, tokenized line by line."""
+
+    def __init__(self, uri: str, text: str) -> None:
+        self.uri = uri
+        self.lines = text.split('\n')
+        self.tokens = [tokenize(line) for line in self.lines]
+
+    @property
+    def text(self) -> str:
+        """The text of the document."""
+        return '\n'.join(self.lines)
+
+    def apply_change(self, change: dict[str, Any]) -> None:
+        """Apply a change sent by the client, tokenizing only the lines it touched.
+
+        Parameters
+        ----------
+        change : dict[str, Any]
+            A ``TextDocumentContentChangeEvent``: a replacement of a range of the
+            document, or of the whole document if the range is missing
+        """
+        if 'range' not in change:
+            self.lines = change['text'].split('\n')
+            self.tokens = [tokenize(line) for line in self.lines]
+            return
+
+        start = change['range']['start']
+        end = change['range']['end']
+        first = min(start['line'], len(self.lines) - 1)
+        last = min(end['line'], len(self.lines) - 1)
+
+        prefix = self.lines[first][: _index(self.lines[first], start['character'])]
+        suffix = self.lines[last][_index(self.lines[last], end['character']) :]
+
+        lines = f"{prefix}{change['text']}{suffix}".split('\n')
+
+        self.lines[first : last + 1] = lines
+        self.tokens[first : last + 1] = [tokenize(line) for line in lines]
+
+    def settings(self, defaults: dict[str, str]) -> tuple[str, str]:
+        """Return the ``old`` and ``new`` constraint types configured for the document.
+
+        Parameters
+        ----------
+        defaults : dict[str, str]
+            The types to use if neither the document nor the environment sets them
+
+        Returns
+        -------
+        tuple[str, str]
+            The ``old`` and ``new`` constraint types
+        """
+        return settings(self.tokens, defaults)
+
+    def diagnostics(self, old: str, new: str) -> list[dict[str, Any]]:
+        """Return a diagnostic for each constraint ``poetry constrain`` would rewrite.
+
+        Parameters
+        ----------
+        old : str
+            The type of constraint to replace
+        new : str
+            The type of constraint to replace it with
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            The ``Diagnostic`` objects, with the rewritten constraint as their ``data``
+        """
+        if old not in CONSTRAINT_TYPES or new not in CONSTRAINT_TYPES:
+            return []
+
+        diagnostics = []
+
+        for number, _, token in constraints(self.tokens):
+            replacement = rewrite_constraint(token.value, old, new)
+            if replacement == token.value:
+                continue
+
+            line = self.lines[number]
+            diagnostics.append(
+                {
+                    'range': {
+                        'start': {
+                            'line': number,
+                            'character': _position(line, token.start),
+                        },
+                        'end': {'line': number, 'character': _position(line, token.end)},
+                    },
+                    'severity': _WARNING,
+                    'source': SOURCE,
+                    'code': f'{old}-constraint',
+                    'message': (
+                        f"'{token.value}' uses a '{old}' constraint."
+                        f" Use '{replacement}' instead."
+                    ),
+                    'data': {'replacement': replacement},
+                },
+            )
+
+        return diagnostics
+
+
+def _overlaps(first: dict[str, Any], second: dict[str, Any]) -> bool:
+    def key(position: dict[str, int]) -> tuple[int, int]:
+        return position['line'], position['character']
+
+    return key(first['start']) <= key(second['end']) and key(second['start']) <= key(
+        first['end'],
+    )
+
+
+def _uri_to_path(uri: str) -> Path:
+    return Path(url2pathname(unquote(urlparse(uri).path)))
+
+
+class LanguageServer:
+    """Serve one client over a pair of binary streams (e.g. ``stdin`` and ``stdout``)."""
+
+    def __init__(self, reader: BinaryIO, writer: BinaryIO) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.documents: dict[str, Document] = {}
+        self.defaults: dict[str, str] = {}
+        self._shutdown = False
+        self._exited = False
+        self._cache: ProjectCache | None = None
+        self._handlers: dict[str, Callable[[dict[str, Any]], Any]] = {
+            'initialize': self._initialize,
+            'shutdown': self._shutdown_request,
+            'exit': self._exit,
+            'textDocument/didOpen': self._did_open,
+            'textDocument/didChange': self._did_change,
+            'textDocument/didClose': self._did_close,
+            'textDocument/codeAction': self._code_action,
+            'workspace/executeCommand': self._execute_command,
+        }
+
+    def _read_message(self) -> dict[str, Any] | None:
+        length = None
+
+        while True:
+            header = self.reader.readline()
+            if not header:
+                return None
+            if header in (b'\r\n', b'\n'):
+                break
+
+            name, _, value = header.decode('ascii').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+
+        if length is None:
+            return None
+
+        return json.loads(self.reader.read(length))
+
+    def send(self, message: dict[str, Any]) -> None:
+        """Send a message to the client.
+
+        Parameters
+        ----------
+        message : dict[str, Any]
+            The ``JSON-RPC`` message, without its ``jsonrpc`` member
+        """
+        body = json.dumps({'jsonrpc': '2.0', **message}).encode('utf-8')
+        self.writer.write(f'Content-Length: {len(body)}\r\n\r\n'.encode('ascii') + body)
+        self.writer.flush()
+
+    def serve(self) -> int:
+        """Handle messages until the client asks the server to exit.
+
+        Returns
+        -------
+        int
+            0 if the client asked the server to shut down before exiting, else 1
+        """
+        while not self._exited:
+            message = self._read_message()
+            if message is None:
+                break
+
+            self.handle(message)
+
+        return 0 if self._shutdown else 1
+
+    def handle(self, message: dict[str, Any]) -> None:
+        """Handle a request or a notification, answering requests.
+
+        Parameters
+        ----------
+        message : dict[str, Any]
+            The ``JSON-RPC`` message
+        """
+        handler = self._handlers.get(message.get('method', ''))
+        is_request = 'id' in message
+
+        if handler is None:
+            if is_request:
+                self.send(
+                    {
+                        'id': message['id'],
+                        'error': {
+                            'code': _METHOD_NOT_FOUND,
+                            'message': f"Unknown method '{message.get('method')}'.",
+                        },
+                    },
+                )
+            return
+
+        try:
+            result = handler(message.get('params') or {})
+        except Exception as exc:  # noqa: BLE001 # pylint: disable=W0718
+            # Keep serving the other documents
+            if is_request:
+                self.send(
+                    {
+                        'id': message['id'],
+                        'error': {'code': _INTERNAL_ERROR, 'message': str(exc)},
+                    },
+                )
+            return
+
+        if is_request:
+            self.send({'id': message['id'], 'result': result})
+
+    def _publish(self, document: Document) -> None:
+        old, new = document.settings(self.defaults)
+        self.send(
+            {
+                'method': 'textDocument/publishDiagnostics',
+                'params': {
+                    'uri': document.uri,
+                    'diagnostics': document.diagnostics(old, new),
+                },
+            },
+        )
+
+    def _initialize(self, params: dict[str, Any]) -> dict[str, Any]:
+        options = params.get('initializationOptions') or {}
+        self.defaults = {key: options[key] for key in ('old', 'new') if key in options}
+
+        return {
+            'capabilities': {
+                'textDocumentSync': {'openClose': True, 'change': _INCREMENTAL_SYNC},
+                'codeActionProvider': {'codeActionKinds': ['quickfix', 'source.fixAll']},
+                'executeCommandProvider': {'commands': [CHECK_COMMAND]},
+            },
+            'serverInfo': {'name': SOURCE},
+        }
+
+    def _shutdown_request(self, params: dict[str, Any]) -> None:  # noqa: ARG002
+        self._shutdown = True
+
+    def _exit(self, params: dict[str, Any]) -> None:  # noqa: ARG002
+        self._exited = True
+
+    def _did_open(self, params: dict[str, Any]) -> None:
+        item = params['textDocument']
+        document = Document(item['uri'], item['text'])
+        self.documents[item['uri']] = document
+        self._publish(document)
+
+    def _did_change(self, params: dict[str, Any]) -> None:
+        document = self.documents[params['textDocument']['uri']]
+        for change in params['contentChanges']:
+            document.apply_change(change)
+        self._publish(document)
+
+    def _did_close(self, params: dict[str, Any]) -> None:
+        uri = params['textDocument']['uri']
+        self.documents.pop(uri, None)
+        self.send(
+            {
+                'method': 'textDocument/publishDiagnostics',
+                'params': {'uri': uri, 'diagnostics': []},
+            },
+        )
+
+    def _code_action(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        uri = params['textDocument']['uri']
+        document = self.documents.get(uri)
+        if document is None:
+            return []
+
+        diagnostics = document.diagnostics(*document.settings(self.defaults))
+
+        def edit(fixed: list[dict[str, Any]]) -> dict[str, Any]:
+            return {
+                'changes': {
+                    uri: [
+                        {
+                            'range': diagnostic['range'],
+                            'newText': diagnostic['data']['replacement'],
+                        }
+                        for diagnostic in fixed
+                    ],
+                },
+            }
+
+        actions = [
+            {
+                'title': f"Replace with '{diagnostic['data']['replacement']}'",
+                'kind': 'quickfix',
+                'diagnostics': [diagnostic],
+                'isPreferred': True,
+                'edit': edit([diagnostic]),
+            }
+            for diagnostic in diagnostics
+            if _overlaps(diagnostic['range'], params['range'])
+        ]
+
+        if diagnostics:
+            actions.append(
+                {
+                    'title': 'Constrain all dependencies',
+                    'kind': 'source.fixAll',
+                    'diagnostics': diagnostics,
+                    'edit': edit(diagnostics),
+                },
+            )
+
+        actions.append(
+            {
+                'title': 'Check the dependencies can be solved',
+                'kind': 'source',
+                'command': {
+                    'title': 'Check the dependencies can be solved',
+                    'command': CHECK_COMMAND,
+                    'arguments': [uri],
+                },
+            },
+        )
+
+        return actions
+
+    def _execute_command(self, params: dict[str, Any]) -> int | None:
+        if params.get('command') != CHECK_COMMAND:
+            return None
+
+        # Deferred, so ``poetry`` is only loaded when the user asks for a check
+        from poetry_plugin_constrain.daemon import ProjectCache, execute
+
+        if self._cache is None:
+            self._cache = ProjectCache()
+
+        directory = _uri_to_path(params['arguments'][0]).parent
+        response = execute(self._cache, directory, ['--dry-run', '--check'])
+
+        self.send(
+            {
+                'method': 'window/showMessage',
+                'params': {
+                    'type': _MESSAGE_INFO if response['status'] == 0 else _MESSAGE_ERROR,
+                    'message': (response['output'] + response['error']).strip(),
+                },
+            },
+        )
+
+        return response['status']
+
+
+def main() -> int:
+    """Serve a client over ``stdin`` and ``stdout``.
+
+    Returns
+    -------
+    int
+        The exit code of the server
+    """
+    return LanguageServer(sys.stdin.buffer, sys.stdout.buffer).serve()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
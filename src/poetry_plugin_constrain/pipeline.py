@@ -0,0 +1,127 @@
+"""The stages ``poetry constrain`` passes the dependencies of each group through.
+
+Each stage is a generator consuming the previous one, so a group's dependencies flow
+through discovery and rewriting one at a time::
+
+    for old_constraint, dependency in rewrite(discover(table), old='caret', new='ge'):
+        if old_constraint != dependency.pretty_constraint:
+            patch(table, old_constraint, dependency)
+
+Only the dependencies whose constraint changed need to outlive the pipeline, and only
+when a later step (e.g. the installer) needs all of them at once.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+from poetry.core.factory import Factory
+from poetry.core.packages.dependency_group import MAIN_GROUP
+
+from poetry_plugin_constrain.utils import deep_get, replace_constraint_from_dependency
+
+if TYPE_CHECKING:
+    from poetry.core.packages.dependency import Dependency
+
+
+def group_table(poetry_config: dict[str, Any], group: str) -> dict[str, Any] | None:
+    """Return the dependency table of a group.
+
+    Parameters
+    ----------
+    poetry_config : dict[str, Any]
+        The contents of the ``[tool.poetry]`` table of the ``pyproject.toml``
+    group : str
+        The group name
+
+    Returns
+    -------
+    dict[str, Any] | None
+        The dependencies of the group keyed by name, or ``None`` if the group has no
+        dependency table
+    """
+    if group == MAIN_GROUP:  # pylint: disable=W0160
+        return poetry_config.get('dependencies')
+
+    return deep_get(poetry_config, ['group', group, 'dependencies'])
+
+
+def discover(table: dict[str, Any]) -> Iterator[Dependency]:
+    """Yield the dependencies of a dependency table.
+
+    Parameters
+    ----------
+    table : dict[str, Any]
+        The dependencies of a group keyed by name
+
+    Yields
+    ------
+    Dependency
+        Each dependency, once for each constraint of multiple constraint dependencies
+    """
+    for name, constraints in table.items():
+        # Support multiple constraint dependencies
+        for constraint in constraints if isinstance(constraints, list) else [constraints]:
+            yield Factory.create_dependency(name, constraint)
+
+
+def rewrite(
+    dependencies: Iterable[Dependency],
+    old: str,
+    new: str,
+) -> Iterator[tuple[str, Dependency]]:
+    """Yield each dependency with its constraint replaced.
+
+    Parameters
+    ----------
+    dependencies : Iterable[Dependency]
+        The dependencies to rewrite
+    old : str
+        The type of constraint to replace
+    new : str
+        The type of constraint to replace it with
+
+    Yields
+    ------
+    tuple[str, Dependency]
+        The old constraint and the rewritten dependency, which is the same when the
+        constraint is left unchanged
+    """
+    for dependency in dependencies:
+        yield dependency.pretty_constraint, replace_constraint_from_dependency(
+            dependency=dependency,
+            old=old,
+            new=new,
+        )
+
+
+def patch(table: dict[str, Any], old_constraint: str, dependency: Dependency) -> None:
+    """Write the constraint of a rewritten dependency back to its dependency table.
+
+    Parameters
+    ----------
+    table : dict[str, Any]
+        The dependencies of the group keyed by name
+    old_constraint : str
+        The constraint before the rewrite, to find the entry of multiple constraint
+        dependencies
+    dependency : Dependency
+        The rewritten dependency
+    """
+    name = dependency.pretty_name
+    new_constraint = dependency.pretty_constraint
+
+    constraints = table[name]
+
+    # Support multiple constraint dependencies
+    if isinstance(constraints, list):
+        for ndx, constraint in enumerate(constraints):
+            if isinstance(constraint, dict):
+                if constraint['version'] == old_constraint:
+                    constraints[ndx]['version'] = new_constraint
+            elif constraint == old_constraint:
+                constraints[ndx] = new_constraint
+    elif isinstance(constraints, dict):
+        constraints['version'] = new_constraint
+    else:
+        table[name] = new_constraint
@@ -2,28 +2,66 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, cast
+import time
+from typing import TYPE_CHECKING, Any, cast
 
 from cleo.events import console_events
+from cleo.events.console_command_event import ConsoleCommandEvent
 from cleo.events.console_terminate_event import ConsoleTerminateEvent
 from cleo.io.inputs.string_input import StringInput
 from cleo.io.outputs.output import Verbosity
 from poetry.console.application import Application
-from poetry.console.commands.add import AddCommand
-from poetry.console.commands.check import CheckCommand
-from poetry.console.commands.init import InitCommand
-from poetry.console.commands.update import UpdateCommand
 from poetry.plugins.application_plugin import ApplicationPlugin
 
-from poetry_plugin_constrain.commands import ConstrainCommand
-from poetry_plugin_constrain.config import are_post_hooks_enabled
-from poetry_plugin_constrain.utils import Style, line
+from poetry_plugin_constrain.commands import (
+    ConstrainCommand,
+    ConstrainDaemonCommand,
+    ConstrainFilesCommand,
+    ConstrainFilterCommand,
+    ConstrainInventoryCommand,
+    ConstrainMergeCommand,
+    ConstrainStatsCommand,
+    ConstrainVerifyCommand,
+)
+from poetry_plugin_constrain.config import (
+    are_post_hooks_enabled,
+    get_cache_directory,
+    get_config_variable,
+    is_hook_stats_enabled,
+    is_pre_add_hook_enabled,
+    read_pyproject,
+)
+from poetry_plugin_constrain.stats import (
+    STATS_FILE_NAME,
+    HookRecord,
+    SolveListener,
+    append_record,
+)
+from poetry_plugin_constrain.tracing import (
+    InvalidListenerError,
+    load_listeners,
+    span,
+    tracing_session,
+)
+from poetry_plugin_constrain.utils import (
+    CONSTRAINT_TYPES,
+    Style,
+    deep_get,
+    line,
+    line_error,
+    replace_constraint,
+)
 
 if TYPE_CHECKING:
     from cleo.events.event import Event
     from cleo.events.event_dispatcher import EventDispatcher
     from poetry.console.commands.command import Command
 
+    from poetry_plugin_constrain.tracing import SpanListener
+
+# Commands are matched by name: ``poetry`` imports each command module (and, for
+# ``add`` and ``init``, much of its machinery) only to run the command, so importing
+# them here would slow down every ``poetry`` command.
 POST_HOOK_COMMANDS = [
     'init',
     'add',
@@ -34,6 +72,42 @@ POST_HOOK_COMMANDS = [
 OPTIONS = [opt.name for opt in ConstrainCommand.options]
 
 
+def _package_names(command: Command) -> list[str]:
+    """Return the names of the packages ``poetry add`` or ``poetry update`` was given.
+
+    Parameters
+    ----------
+    command : Command
+        The ``poetry`` command that triggered the post-hook
+
+    Returns
+    -------
+    list[str]
+        The names, else an empty list if the command applies to every package or a
+        requirement is not a name (e.g. a path or a URL)
+    """
+    if command.name == 'add':
+        requirements = command.argument('name')
+    elif command.name == 'update':
+        requirements = command.argument('packages')
+    else:
+        return []
+
+    from poetry.core.packages.dependency import Dependency
+
+    names = []
+    for requirement in requirements:
+        # ``poetry add`` also takes ``foo@^1.0``, whose name is parsed the same way
+        try:
+            dependency = Dependency.create_from_pep_508(requirement)
+        except ValueError:
+            return []
+
+        names.append(dependency.pretty_name)
+
+    return names
+
+
 class ConstrainPlugin(ApplicationPlugin):
     """Constrain dependency versions using a specified format."""
 
@@ -49,7 +123,16 @@ class ConstrainPlugin(ApplicationPlugin):
         list[type[Command]]
             The commands registered for the plugin
         """
-        return [ConstrainCommand]
+        return [
+            ConstrainCommand,
+            ConstrainFilesCommand,
+            ConstrainFilterCommand,
+            ConstrainVerifyCommand,
+            ConstrainInventoryCommand,
+            ConstrainMergeCommand,
+            ConstrainDaemonCommand,
+            ConstrainStatsCommand,
+        ]
 
     def activate(self, application: Application) -> None:
         """Activate the plugin.
@@ -65,12 +148,108 @@ class ConstrainPlugin(ApplicationPlugin):
             The activated console application
         """
         assert application.event_dispatcher is not None
+        application.event_dispatcher.add_listener(
+            console_events.COMMAND,
+            self._pre_add_hook,
+        )
         application.event_dispatcher.add_listener(
             console_events.TERMINATE,
             self._constrain_hook,
         )
         super().activate(application)
 
+    def _pre_add_hook(
+        self,
+        event: Event,
+        event_name: str,  # noqa: ARG002; Required to implement ``Listener``
+        dispatcher: EventDispatcher,  # noqa: ARG002; Required to implement ``Listener``
+    ) -> None:
+        """Pre-hook rewriting the constraints of ``poetry add`` before it locks.
+
+        ``poetry add`` picks a constraint for each new requirement (by default, a caret
+        constraint on the latest version), then writes and locks it. Rewriting the
+        requirements as soon as they are determined means the lock file is only
+        resolved once, with the constraints the post-hook would otherwise rewrite and
+        resolve again. There is no public hook for this, so the hook wraps the private
+        ``_determine_requirements`` of the command (checked against the installed
+        ``poetry`` by ``tests/test_plugin.py``), and leaves the requirements to the
+        post-hook if it is missing.
+
+        The hook is enabled unless ``pre-add-hook`` (or ``enable-post-hooks``) is set
+        to ``false`` in the ``[tool.poetry-plugin-constrain]`` table of the
+        ``pyproject.toml`` file or with the
+        ``POETRY_PLUGIN_CONSTRAIN_PRE_ADD_HOOK`` environment variable.
+
+        Parameters
+        ----------
+        event : ConsoleCommandEvent
+            The ``poetry`` event that triggered the hook.
+        event_name : str
+            The name of the event.
+        dispatcher : EventDispatcher
+            The ``cleo`` application event dispatcher
+        """
+        assert isinstance(event, ConsoleCommandEvent)
+        command = event.command
+
+        if command.name != 'add' or not is_pre_add_hook_enabled(
+            command.poetry,
+        ):
+            return
+
+        # A private method of ``poetry add``, so the post-hook constrains the new
+        # requirements instead if it is ever removed
+        if not hasattr(command, '_determine_requirements'):
+            line(
+                io=event.io,
+                message=(
+                    "Skip 'poetry-constrain' pre-add hook since 'poetry add' has no"
+                    " '_determine_requirements' method."
+                ),
+                style=Style.INFO,
+                verbosity=Verbosity.DEBUG,
+            )
+            return
+
+        old = get_config_variable(command.poetry, toml_var_name='old', default='caret')
+        new = get_config_variable(command.poetry, toml_var_name='new', default='ge')
+
+        only = get_config_variable(command.poetry, toml_var_name='only', default=set())
+        without = get_config_variable(
+            command.poetry,
+            toml_var_name='without',
+            default=set(),
+        )
+        # The command is not bound to its ``IO`` until it runs
+        options = event.io.input
+        group = 'dev' if options.option('dev') else options.option('group')
+
+        # Left to the post-hook, which reports invalid constraint types
+        if old not in CONSTRAINT_TYPES or new not in CONSTRAINT_TYPES:
+            return
+
+        if (only and group not in only) or (not only and group in without):
+            return
+
+        determine_requirements = command._determine_requirements
+
+        def _determine_requirements(
+            *args: Any,
+            **kwargs: Any,
+        ) -> list[dict[str, Any]]:
+            requirements = determine_requirements(*args, **kwargs)
+
+            for requirement in requirements:
+                version = (
+                    requirement.get('version') if isinstance(requirement, dict) else None
+                )
+                if isinstance(version, str):
+                    requirement['version'] = replace_constraint(version, old=old, new=new)
+
+            return requirements
+
+        command._determine_requirements = _determine_requirements  # type: ignore[method-assign]
+
     def _constrain_hook(
         self,
         event: Event,
@@ -130,15 +309,61 @@ class ConstrainPlugin(ApplicationPlugin):
         dispatcher : EventDispatcher
             The ``cleo`` application event dispatcher
         """
+        start = time.perf_counter()
+
         assert isinstance(event, ConsoleTerminateEvent)
-        io = event.io
         command = event.command
 
-        _skip_hook = "Skip 'poetry-constrain' post-hook"
+        # The plugin's own commands (e.g. ``constrain files``) may run without a project
+        # in the current directory, so never load one for them
+        if isinstance(command, tuple(self.commands)) or not hasattr(command, 'poetry'):
+            return
 
-        if isinstance(command, ConstrainCommand) or not hasattr(command, 'poetry'):
+        if command.name not in POST_HOOK_COMMANDS or not is_hook_stats_enabled(
+            command.poetry,
+        ):
+            self._post_hook(event, listeners=[])
             return
 
+        solve = SolveListener()
+        reason = self._post_hook(event, listeners=[solve])
+
+        append_record(
+            get_cache_directory(command.poetry) / STATS_FILE_NAME,
+            HookRecord(
+                time=time.time(),
+                command=command.name,
+                elapsed=time.perf_counter() - start,
+                skipped=reason is not None,
+                reason=reason,
+                solved=solve.solved,
+            ),
+        )
+
+    def _post_hook(
+        self,
+        event: ConsoleTerminateEvent,
+        listeners: list[SpanListener],
+    ) -> str | None:
+        """Run ``constrain`` after a ``poetry`` command, unless the hook is skipped.
+
+        Parameters
+        ----------
+        event : ConsoleTerminateEvent
+            The ``poetry`` event that triggered the hook.
+        listeners : list[SpanListener]
+            Listeners to attach for the run, besides those configured
+
+        Returns
+        -------
+        str | None
+            Why the hook was skipped, else ``None`` if ``constrain`` was run
+        """
+        io = event.io
+        command = event.command
+
+        _skip_hook = "Skip 'poetry-constrain' post-hook"
+
         if not are_post_hooks_enabled(command.poetry):
             line(
                 io=io,
@@ -146,7 +371,7 @@ class ConstrainPlugin(ApplicationPlugin):
                 style=Style.INFO,
                 verbosity=Verbosity.DEBUG,
             )
-            return
+            return 'disabled'
 
         if event.exit_code != 0:
             line(
@@ -157,12 +382,9 @@ class ConstrainPlugin(ApplicationPlugin):
                 style=Style.INFO,
                 verbosity=Verbosity.DEBUG,
             )
-            return
+            return 'failed'
 
-        if not isinstance(
-            command,
-            (InitCommand, AddCommand, CheckCommand, UpdateCommand),
-        ):
+        if command.name not in POST_HOOK_COMMANDS:
             commands = [f"'{cmd}'" for cmd in POST_HOOK_COMMANDS]
             line(
                 io=io,
@@ -173,13 +395,13 @@ class ConstrainPlugin(ApplicationPlugin):
                 style=Style.INFO,
                 verbosity=Verbosity.DEBUG,
             )
-            return
+            return 'not a hook command'
 
         # Grab relevant options from ``poetry`` commands that we transfer to the
         # ``constrain`` command
         dry_run = command.option('dry-run') if io.input.has_option('dry-run') else False
 
-        check = command.option('check') if isinstance(command, CheckCommand) else False
+        check = command.option('check') if command.name == 'check' else False
         lock = command.option('lock') if io.input.has_option('lock') else False
         only = ','.join(command.option('only')) if io.input.has_option('only') else None
         without = (
@@ -188,6 +410,8 @@ class ConstrainPlugin(ApplicationPlugin):
             else None
         )
 
+        packages = ','.join(_package_names(command))
+
         argv = (
             'constrain'
             f"{' --check' if check else ''}"
@@ -195,11 +419,39 @@ class ConstrainPlugin(ApplicationPlugin):
             f"{' --lock' if lock else ''}"
             f"{f' --only {only}' if only else ''}"
             f"{f' --without {without}' if without else ''}"
+            f"{f' --package {packages}' if packages else ''}"
+        )
+
+        # ``poetry add`` and ``poetry init`` write the file without updating the document
+        # read before they ran, which ``constrain`` would otherwise rewrite and save, nor
+        # the ``[tool.poetry]`` table parsed when the project was loaded
+        command.poetry.pyproject.reload()
+        command.poetry._local_config = (  # No public setter
+            deep_get(read_pyproject(command.poetry.pyproject.path), ['tool', 'poetry'])
+            or {}
         )
 
         poetry = cast(Application, command.application)
 
-        self._run_with(poetry, argv)
+        try:
+            listeners = [
+                *load_listeners(
+                    output=get_config_variable(command.poetry, 'trace-output'),
+                    listeners=get_config_variable(command.poetry, 'trace-listeners'),
+                ),
+                *listeners,
+            ]
+        except (ImportError, AttributeError, InvalidListenerError) as exc:
+            line_error(io=io, message=f'ERROR: {exc}', style=Style.ERROR)
+            return 'invalid trace listener'
+
+        # ``constrain`` reports its spans to the listeners of the post-hook
+        with tracing_session(listeners), span(
+            'post-hook', 'hook', command=command.name, argv=argv
+        ):
+            self._run_with(poetry, argv)
+
+        return None
 
     def _run_with(
         self,
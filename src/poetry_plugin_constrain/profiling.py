@@ -0,0 +1,396 @@
+"""Time the phases of ``poetry constrain`` with ``--profile``.
+
+Each phase is timed exclusively: entering a phase pauses the phase it is nested in,
+e.g. creating a dependency pauses the rewrite pulling it through the pipeline. The
+times of the phases and of the code outside any phase add up to the whole run.
+
+With ``--trace-memory``, ``tracemalloc`` also attributes the memory allocated, and the
+highest memory use, to each phase. ``tracemalloc`` is only imported then.
+
+Profiling is off unless asked for, and ``NULL_PROFILER`` then stands in for the
+profiler: its phases are a shared no-op context manager and its ``iterate`` returns
+the iterable it is given, so the pipeline runs unwrapped.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, ContextManager, Iterable, Iterator
+
+from poetry_plugin_constrain.utils import Style, line
+
+if TYPE_CHECKING:
+    from tracemalloc import Snapshot, StatisticDiff
+    from types import FrameType
+
+    from cleo.io.io import IO
+
+# ``--profile-output`` files with this suffix hold collapsed stacks, others ``pstats``
+COLLAPSED_STACKS_SUFFIX = '.folded'
+
+# The number of allocation sites reported with ``--trace-memory``
+TOP_ALLOCATIONS = 10
+
+_NULL_PHASE = nullcontext()
+
+
+class NullProfiler:
+    """A profiler that times nothing, used unless profiling is enabled."""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+    def phase(self, name: str) -> ContextManager[None]:  # noqa: ARG002
+        """Return a context manager timing a phase, here doing nothing."""
+        return _NULL_PHASE
+
+    def iterate(
+        self,
+        name: str,  # noqa: ARG002
+        iterable: Iterable[Any],
+    ) -> Iterable[Any]:
+        """Return an iterable timing each item as a phase, here the iterable itself."""
+        return iterable
+
+    def report(self, io: IO) -> None:
+        """Print the time of each phase, here nothing."""
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler(NullProfiler):
+    """Accumulate the exclusive time and the number of calls of each phase of a run.
+
+    Used as a context manager around the run, which also profiles every function with
+    ``cProfile``, or collects collapsed stacks, when given an output file.
+    """
+
+    def __init__(self, output: Path | None = None, *, memory: bool = False) -> None:
+        """Create a profiler.
+
+        Parameters
+        ----------
+        output : Path | None, optional
+            The file to write a ``cProfile`` dump to, or collapsed stacks (for
+            flamegraphs) if it ends with ``COLLAPSED_STACKS_SUFFIX``, by default
+            ``None`` to only time the phases
+        memory : bool, optional
+            Whether to trace memory allocations, by default ``False``
+        """
+        self.elapsed: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+        self.output = output
+
+        # In bytes, relative to the memory in use when the run started
+        self.memory = memory
+        self.allocated: dict[str, int] = {}
+        self.peaks: dict[str, int] = {}
+        self.peak = 0
+        self.top_allocations: list[StatisticDiff] = []
+
+        self._stack: list[str] = []
+        self._start = 0.0
+        self._run_start = 0.0
+        self._total = 0.0
+        self._function_profiler: Any = None
+        self._baseline = 0
+        self._traced = 0
+        self._snapshot: Snapshot | None = None
+        self._started_tracing = False
+
+    def __enter__(self) -> None:
+        if self.memory:
+            self._start_tracing()
+
+        if self.output is not None:
+            if self.output.suffix == COLLAPSED_STACKS_SUFFIX:
+                self._function_profiler = _StackProfiler()
+            else:
+                import cProfile
+
+                self._function_profiler = cProfile.Profile()
+
+            self._function_profiler.enable()
+
+        self._run_start = time.perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._total = time.perf_counter() - self._run_start
+
+        if self._function_profiler is not None:
+            self._function_profiler.disable()
+            self._function_profiler.dump_stats(str(self.output))
+
+        if self.memory:
+            self._stop_tracing()
+
+    def _start_tracing(self) -> None:
+        import tracemalloc
+
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+        self._snapshot = tracemalloc.take_snapshot()
+        self._baseline = self._traced = tracemalloc.get_traced_memory()[0]
+        self._charge_memory()
+
+    def _stop_tracing(self) -> None:
+        import tracemalloc
+
+        self._charge_memory()
+
+        assert self._snapshot is not None
+
+        # Only the allocations of the run, not those of the profiler or of imports
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),  # noqa: FBT003
+            tracemalloc.Filter(False, __file__),  # noqa: FBT003
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*'),  # noqa: FBT003
+        ]
+        statistics = (
+            tracemalloc.take_snapshot()
+            .filter_traces(filters)
+            .compare_to(self._snapshot.filter_traces(filters), 'lineno')
+        )
+        self.top_allocations = [
+            statistic for statistic in statistics if statistic.size_diff > 0
+        ][:TOP_ALLOCATIONS]
+
+        self._snapshot = None
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    def _charge(self, now: float) -> None:
+        # Add the time since the last switch to the innermost phase
+        if self._stack:
+            phase = self._stack[-1]
+            self.elapsed[phase] = self.elapsed.get(phase, 0.0) + now - self._start
+
+        if self.memory:
+            self._charge_memory()
+
+        self._start = now
+
+    def _charge_memory(self) -> None:
+        # Add the memory allocated since the last switch to the innermost phase, and
+        # the highest memory use since then to its peak
+        import tracemalloc
+
+        traced, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak - self._baseline)
+
+        # Python 3.8 only has the peak of the whole run
+        reset_peak = getattr(tracemalloc, 'reset_peak', None)
+
+        if self._stack:
+            phase = self._stack[-1]
+            self.allocated[phase] = self.allocated.get(phase, 0) + traced - self._traced
+            if reset_peak is not None:
+                self.peaks[phase] = max(self.peaks.get(phase, 0), peak - self._baseline)
+
+        if reset_peak is not None:
+            reset_peak()
+
+        self._traced = traced
+
+    @contextmanager
+    def _phase(self, name: str) -> Iterator[None]:
+        self._charge(time.perf_counter())
+        self._stack.append(name)
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+        try:
+            yield
+        finally:
+            self._charge(time.perf_counter())
+            self._stack.pop()
+
+    def phase(self, name: str) -> ContextManager[None]:
+        """Return a context manager timing a phase.
+
+        Parameters
+        ----------
+        name : str
+            The phase, e.g. ``'solve'``
+
+        Returns
+        -------
+        ContextManager[None]
+            The context manager, which pauses the enclosing phase, if any
+        """
+        return self._phase(name)
+
+    def iterate(self, name: str, iterable: Iterable[Any]) -> Iterator[Any]:
+        """Time producing each item of an iterable, e.g. a pipeline stage, as a phase.
+
+        Parameters
+        ----------
+        name : str
+            The phase, e.g. ``'rewrite'``
+        iterable : Iterable[Any]
+            The iterable
+
+        Yields
+        ------
+        Any
+            Each item of the iterable
+        """
+        iterator = iter(iterable)
+
+        while True:
+            with self._phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+
+            yield item
+
+    def report(self, io: IO) -> None:
+        """Print the calls, the time and any memory allocated of each phase.
+
+        Parameters
+        ----------
+        io : IO
+            The ``cleo`` IO to print to
+        """
+        phases = [*self.elapsed, 'other']
+        width = max(len(name) for name in [*phases, 'total'])
+
+        header = f"  {'phase':<{width}}  {'calls':>8}  {'ms':>10}  {'%':>6}"
+        if self.memory:
+            header += f"  {'alloc KiB':>10}  {'peak KiB':>10}"
+
+        line(io=io, message='')  # Cosmetic new line
+        line(io=io, message='Profile:', style=Style.INFO)
+        line(io=io, message=header)
+
+        for name in phases:
+            if name == 'other':
+                calls = ''
+                elapsed = max(self._total - sum(self.elapsed.values()), 0.0)
+                allocated = self._traced - self._baseline - sum(self.allocated.values())
+            else:
+                calls = str(self.calls[name])
+                elapsed = self.elapsed[name]
+                allocated = self.allocated.get(name, 0)
+
+            message = (
+                f'  <c1>{name:<{width}}</>  {calls:>8}  {elapsed * 1e3:>10.2f}'
+                f'  {elapsed / (self._total or 1.0):>6.1%}'
+            )
+            if self.memory:
+                peak = self.peaks.get(name)
+                message += f'  {allocated / 1024:>10.1f}  ' + (
+                    f'{peak / 1024:>10.1f}' if peak is not None else f"{'-':>10}"
+                )
+
+            line(io=io, message=message)
+
+        message = f"  {'total':<{width}}  {'':>8}  {self._total * 1e3:>10.2f}"
+        if self.memory:
+            message += (
+                f"  {'':>6}  {(self._traced - self._baseline) / 1024:>10.1f}"
+                f'  {self.peak / 1024:>10.1f}'
+            )
+
+        line(io=io, message=message)
+
+        if self.top_allocations:
+            line(io=io, message='')  # Cosmetic new line
+            line(io=io, message='Top allocation sites:', style=Style.INFO)
+
+            for statistic in self.top_allocations:
+                line(
+                    io=io,
+                    message=(
+                        f'  {statistic.traceback}: {statistic.size_diff / 1024:+.1f} KiB'
+                        f' ({statistic.count_diff:+d} blocks)'
+                    ),
+                )
+
+        if self.output is not None:
+            line(
+                io=io, message=f"Wrote the profile to '{self.output}'.", style=Style.INFO
+            )
+
+
+def create_profiler(
+    *,
+    enabled: bool,
+    output: Path | None = None,
+    memory: bool = False,
+) -> NullProfiler:
+    """Return a profiler if profiling is enabled, else ``NULL_PROFILER``.
+
+    Parameters
+    ----------
+    enabled : bool
+        Whether to time the phases of the run
+    output : Path | None, optional
+        The file to write a ``cProfile`` dump or collapsed stacks to, which enables
+        profiling, by default ``None``
+    memory : bool, optional
+        Whether to trace memory allocations, which enables profiling, by default
+        ``False``
+
+    Returns
+    -------
+    NullProfiler
+        The profiler
+    """
+    if not enabled and output is None and not memory:
+        return NULL_PROFILER
+
+    return Profiler(output, memory=memory)
+
+
+class _StackProfiler:
+    """Accumulate the self time of each call stack of the current thread.
+
+    The stacks are written in the collapsed format of ``flamegraph.pl`` and
+    ``speedscope``: one ``caller;callee`` stack per line followed by microseconds.
+    """
+
+    def __init__(self) -> None:
+        self.stacks: dict[tuple[str, ...], float] = defaultdict(float)
+        self._stack: list[str] = []
+        self._last = 0.0
+
+    def enable(self) -> None:
+        self._last = time.perf_counter()
+        sys.setprofile(self._profile)
+
+    def disable(self) -> None:
+        sys.setprofile(None)
+
+    def _profile(self, frame: FrameType, event: str, arg: Any) -> None:
+        if self._stack:
+            self.stacks[tuple(self._stack)] += time.perf_counter() - self._last
+
+        if event == 'call':
+            code = frame.f_code
+            self._stack.append(
+                f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})'
+            )
+        elif event == 'c_call':
+            self._stack.append(f"<built-in {getattr(arg, '__qualname__', arg)}>")
+        elif self._stack:
+            # Returns of the frames that were running when profiling started are ignored
+            self._stack.pop()
+
+        self._last = time.perf_counter()
+
+    def dump_stats(self, path: str) -> None:
+        with Path(path).open('w', encoding='utf-8') as file:
+            for stack, elapsed in self.stacks.items():
+                file.write(f"{';'.join(stack)} {round(elapsed * 1e6)}\n")
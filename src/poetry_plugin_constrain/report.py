@@ -0,0 +1,211 @@
+"""Read, write and merge the JSON reports of ``poetry constrain`` runs.
+
+A report maps each project to its exit code and the constraint updates proposed in
+each of its groups::
+
+    {
+        "format": 1,
+        "shard": {"index": 1, "count": 4},
+        "status": 0,
+        "projects": {
+            "packages/a": {
+                "status": 0,
+                "groups": {"main": [{"name": "foo", "old": "^1.2", "new": ">=1.2"}]}
+            }
+        }
+    }
+
+Reports of the shards of one run are merged into a single report, checking that every
+shard is present exactly once.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any, Iterable, NamedTuple
+
+from poetry_plugin_constrain.tracing import span
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from poetry.core.packages.dependency import Dependency
+
+    from poetry_plugin_constrain.sharding import Shard
+
+REPORT_FORMAT_VERSION = 1
+
+
+class InvalidReportError(ValueError):
+    def __init__(
+        self,
+        path: Path,
+    ) -> None:
+        super().__init__(f"'{path}' is not a 'poetry constrain' report.")
+
+
+class InconsistentShardsError(ValueError):
+    def __init__(
+        self,
+        counts: Iterable[int],
+    ) -> None:
+        super().__init__(
+            f'Reports of different shard counts cannot be merged: {sorted(counts)}.',
+        )
+
+
+class MergedReport(NamedTuple):
+    """The merged report and the shards that are missing or were given twice."""
+
+    report: dict[str, Any]
+    missing_shards: list[int]
+    duplicate_shards: list[int]
+
+
+def project_entry(
+    status: int,
+    updated_dependencies: dict[str, list[tuple[str, Dependency]]],
+) -> dict[str, Any]:
+    """Return the report entry of a project.
+
+    Parameters
+    ----------
+    status : int
+        The exit code of the project
+    updated_dependencies : dict[str, list[tuple[str, Dependency]]]
+        The old constraint and the updated dependency, keyed by group name
+
+    Returns
+    -------
+    dict[str, Any]
+        The project entry
+    """
+    return {
+        'status': int(status),
+        'groups': {
+            group: [
+                {
+                    'name': dependency.pretty_name,
+                    'old': old_constraint,
+                    'new': dependency.pretty_constraint,
+                }
+                for old_constraint, dependency in dependencies
+            ]
+            for group, dependencies in updated_dependencies.items()
+        },
+    }
+
+
+def build_report(projects: dict[str, dict[str, Any]], shard: Shard | None) -> dict:
+    """Return a report of many projects.
+
+    Parameters
+    ----------
+    projects : dict[str, dict[str, Any]]
+        The entry of each project keyed by project path
+    shard : Shard | None
+        The shard the projects were run in, if any
+
+    Returns
+    -------
+    dict
+        The report
+    """
+    return {
+        'format': REPORT_FORMAT_VERSION,
+        'shard': shard._asdict() if shard is not None else None,
+        'status': max((entry['status'] for entry in projects.values()), default=0),
+        'projects': dict(sorted(projects.items())),
+    }
+
+
+def write_report(path: Path, report: dict) -> None:
+    """Write a report as JSON.
+
+    Parameters
+    ----------
+    path : Path
+        The file to write
+    report : dict
+        The report
+    """
+    with span('write-report', 'write', path=path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+
+
+def load_report(path: Path) -> dict:
+    """Read a report.
+
+    Parameters
+    ----------
+    path : Path
+        The file to read
+
+    Returns
+    -------
+    dict
+        The report
+
+    Raises
+    ------
+    InvalidReportError
+        If the file is not a report written by ``poetry constrain``
+    """
+    try:
+        report = json.loads(path.read_text(encoding='utf-8'))
+    except ValueError as exc:
+        raise InvalidReportError(path) from exc
+
+    if not isinstance(report, dict) or report.get('format') != REPORT_FORMAT_VERSION:
+        raise InvalidReportError(path)
+
+    return report
+
+
+def merge_reports(reports: Iterable[dict]) -> MergedReport:
+    """Merge the reports of the shards of a run into one report.
+
+    A project run in several shards (i.e. whose groups were sharded) keeps the
+    highest exit code and the updates of every shard.
+
+    Parameters
+    ----------
+    reports : Iterable[dict]
+        The reports to merge
+
+    Returns
+    -------
+    MergedReport
+        The merged report and the shards that are missing or were given twice
+
+    Raises
+    ------
+    InconsistentShardsError
+        If the reports were run with different numbers of shards
+    """
+    projects: dict[str, dict[str, Any]] = {}
+    seen: list[int] = []
+    counts: set[int] = set()
+
+    for report in reports:
+        if report['shard'] is not None:
+            seen.append(report['shard']['index'])
+            counts.add(report['shard']['count'])
+
+        for path, entry in report['projects'].items():
+            merged = projects.setdefault(path, {'status': 0, 'groups': {}})
+            merged['status'] = max(merged['status'], entry['status'])
+            for group, updates in entry['groups'].items():
+                merged['groups'].setdefault(group, []).extend(updates)
+
+    if len(counts) > 1:
+        raise InconsistentShardsError(counts)
+
+    count = counts.pop() if counts else 0
+
+    return MergedReport(
+        report=build_report(projects, shard=None),
+        missing_shards=sorted(set(range(1, count + 1)) - set(seen)),
+        duplicate_shards=sorted({index for index in seen if seen.count(index) > 1}),
+    )
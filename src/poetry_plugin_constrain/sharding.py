@@ -0,0 +1,147 @@
+"""Split projects, or the groups of one project, into balanced shards.
+
+Every CI machine computes the same assignment from the same inputs: items are sorted
+by weight (their number of dependencies) with a stable hash of their name breaking
+ties, and each is given to the shard with the lowest total weight so far. This keeps
+the shards balanced by dependency count rather than by item count.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+from typing import TYPE_CHECKING, NamedTuple
+
+from poetry_plugin_constrain._compat import tomllib
+from poetry_plugin_constrain.utils import deep_get
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class Shard(NamedTuple):
+    """The ``index`` of ``count`` shards, starting at 1."""
+
+    index: int
+    count: int
+
+    def __str__(self) -> str:
+        return f'{self.index}/{self.count}'
+
+
+class InvalidShardError(ValueError):
+    def __init__(
+        self,
+        value: str,
+    ) -> None:
+        super().__init__(
+            f"Invalid shard {value!r}. Expected 'i/N' with 1 <= i <= N, e.g. '1/4'.",
+        )
+
+
+def parse_shard(value: str) -> Shard:
+    """Parse a shard given as ``'i/N'``.
+
+    Parameters
+    ----------
+    value : str
+        The shard, e.g. ``'1/4'`` for the first of four shards
+
+    Returns
+    -------
+    Shard
+        The parsed shard
+
+    Raises
+    ------
+    InvalidShardError
+        If the value is not of the form ``'i/N'`` with ``1 <= i <= N``
+    """
+    index, _, count = value.partition('/')
+
+    if not (index.isdigit() and count.isdigit() and 1 <= int(index) <= int(count)):
+        raise InvalidShardError(value)
+
+    return Shard(int(index), int(count))
+
+
+def _stable_hash(key: str) -> str:
+    # ``hash()`` is salted per process, so it differs between CI machines
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()  # noqa: S324
+
+
+def assign_shards(weights: dict[str, int], count: int) -> dict[str, int]:
+    """Assign weighted items to shards, balancing the total weight of each shard.
+
+    Parameters
+    ----------
+    weights : dict[str, int]
+        The weight of each item keyed by a name that is stable across machines
+    count : int
+        The number of shards
+
+    Returns
+    -------
+    dict[str, int]
+        The shard index (starting at 1) of each item
+    """
+    # Heaviest first, so the lighter items even out the shard totals at the end
+    items = sorted(weights, key=lambda key: (-weights[key], _stable_hash(key)))
+
+    loads = [(0, index) for index in range(1, count + 1)]
+    assignment: dict[str, int] = {}
+
+    for key in items:
+        load, index = heapq.heappop(loads)
+        assignment[key] = index
+        heapq.heappush(loads, (load + weights[key], index))
+
+    return assignment
+
+
+def select_shard(weights: dict[str, int], shard: Shard) -> list[str]:
+    """Return the items assigned to a shard.
+
+    Parameters
+    ----------
+    weights : dict[str, int]
+        The weight of each item keyed by a name that is stable across machines
+    shard : Shard
+        The shard to select
+
+    Returns
+    -------
+    list[str]
+        The items of the shard, in the order of ``weights``
+    """
+    assignment = assign_shards(weights, shard.count)
+    return [key for key in weights if assignment[key] == shard.index]
+
+
+def project_weight(path: Path) -> int:
+    """Return the number of dependencies of a project, counting empty projects as one.
+
+    Parameters
+    ----------
+    path : Path
+        The project directory containing ``pyproject.toml``
+
+    Returns
+    -------
+    int
+        The number of dependencies in all groups
+    """
+    try:
+        with (path / 'pyproject.toml').open('rb') as file:
+            poetry_config = deep_get(tomllib.load(file), ['tool', 'poetry']) or {}
+    except (OSError, tomllib.TOMLDecodeError):
+        return 1
+
+    return max(
+        1,
+        len(poetry_config.get('dependencies', {}))
+        + sum(
+            len(group.get('dependencies', {}))
+            for group in poetry_config.get('group', {}).values()
+        ),
+    )
@@ -0,0 +1,166 @@
+"""Record the overhead of the post-hook, and summarize it with ``constrain stats``.
+
+With the ``hook-stats`` configuration variable set, each run of the post-hook after
+``poetry init``, ``add``, ``check`` or ``update`` appends a record to a JSON lines file
+in the plugin cache directory: the command, the wall time of the hook, whether it was
+skipped (and why) and whether it solved the new constraints. Records are appended in a
+single write, so runs in parallel do not interleave them, and records that cannot be
+parsed (e.g. cut short by a full disk) are ignored when read.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from contextlib import suppress
+from typing import TYPE_CHECKING, Iterable, NamedTuple
+
+from poetry_plugin_constrain.tracing import SpanListener
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from poetry_plugin_constrain.tracing import Span
+
+STATS_FILE_NAME = 'hook-stats.jsonl'
+
+# The span of ``run_installer_update``, which solves the new constraints
+SOLVE_SPAN = 'run-installer-update'
+
+PERCENTILES = (50, 90, 99)
+
+
+class HookRecord(NamedTuple):
+    """A run of the post-hook."""
+
+    # Seconds since the epoch
+    time: float
+    command: str
+    # Seconds
+    elapsed: float
+    skipped: bool
+    reason: str | None
+    solved: bool
+
+    @property
+    def outcome(self) -> str:
+        """Return what the hook did, e.g. ``'solved'`` or ``'skipped (disabled)'``."""
+        if self.skipped:
+            return f'skipped ({self.reason})'
+
+        return 'solved' if self.solved else 'constrained'
+
+
+class HookStats(NamedTuple):
+    """The wall times of the runs of the post-hook with the same command and outcome."""
+
+    command: str
+    outcome: str
+    runs: int
+    # Milliseconds, at each of ``PERCENTILES``
+    percentiles: tuple[float, ...]
+    max: float
+
+
+class SolveListener(SpanListener):
+    """Note whether a run solved the new constraints."""
+
+    def __init__(self) -> None:
+        """Create a listener."""
+        self.solved = False
+
+    def on_end(self, span: Span) -> None:
+        """Note the end of ``run_installer_update``."""
+        if span.name == SOLVE_SPAN:
+            self.solved = True
+
+
+def append_record(path: Path, record: HookRecord) -> None:
+    """Append a record to a stats file, ignoring any error writing it.
+
+    Parameters
+    ----------
+    path : Path
+        The stats file, created if missing
+    record : HookRecord
+        The record
+    """
+    data = record._asdict()
+    data['elapsed'] = round(record.elapsed, 6)
+
+    with suppress(OSError):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('a', encoding='utf-8') as file:
+            file.write(json.dumps(data, separators=(',', ':')) + '\n')
+
+
+def load_records(path: Path) -> list[HookRecord]:
+    """Read the records of a stats file.
+
+    Parameters
+    ----------
+    path : Path
+        The stats file
+
+    Returns
+    -------
+    list[HookRecord]
+        The records that could be parsed, in the order they were appended, else an
+        empty list if the file does not exist
+    """
+    try:
+        text = path.read_text(encoding='utf-8')
+    except FileNotFoundError:
+        return []
+
+    records = []
+
+    for line in text.splitlines():
+        with suppress(ValueError, TypeError):
+            records.append(HookRecord(**json.loads(line)))
+
+    return records
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    # Linearly interpolated between the closest ranks of the sorted values
+    rank = (len(values) - 1) * percentile / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def summarize(records: Iterable[HookRecord]) -> list[HookStats]:
+    """Summarize the wall times of the runs of each command and outcome.
+
+    Parameters
+    ----------
+    records : Iterable[HookRecord]
+        The records
+
+    Returns
+    -------
+    list[HookStats]
+        The statistics, sorted by command and outcome
+    """
+    elapsed: dict[tuple[str, str], list[float]] = defaultdict(list)
+
+    for record in records:
+        elapsed[record.command, record.outcome].append(record.elapsed * 1e3)
+
+    stats = []
+
+    for (command, outcome), values in sorted(elapsed.items()):
+        values.sort()
+        stats.append(
+            HookStats(
+                command=command,
+                outcome=outcome,
+                runs=len(values),
+                percentiles=tuple(_percentile(values, p) for p in PERCENTILES),
+                max=values[-1],
+            ),
+        )
+
+    return stats
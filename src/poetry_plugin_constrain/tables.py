@@ -0,0 +1,111 @@
+"""Read the dependency tables of a ``pyproject.toml`` and compare two versions of them.
+
+Only ``tomllib`` is used, so comparing the tables is cheap enough to decide whether a
+change needs ``poetry constrain`` at all (see ``watch.py`` and ``changes.py``).
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from poetry.core.packages.dependency_group import MAIN_GROUP
+
+from poetry_plugin_constrain._compat import tomllib
+from poetry_plugin_constrain.utils import deep_get
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class TableDiff(NamedTuple):
+    """The dependency entries added, modified or removed, by group."""
+
+    changed: dict[str, dict[str, Any]]
+    removed: dict[str, list[str]]
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.removed)
+
+
+def parse_dependency_tables(document: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Return the dependency tables of a parsed ``pyproject.toml``.
+
+    Parameters
+    ----------
+    document : dict[str, Any]
+        The parsed ``pyproject.toml``
+
+    Returns
+    -------
+    dict[str, dict[str, Any]]
+        The dependencies of each group keyed by name
+    """
+    poetry_config = deep_get(document, ['tool', 'poetry']) or {}
+
+    tables = {MAIN_GROUP: poetry_config.get('dependencies', {})}
+    tables.update(
+        (name, group.get('dependencies', {}))
+        for name, group in poetry_config.get('group', {}).items()
+    )
+
+    return tables
+
+
+def dependency_tables(path: Path) -> dict[str, dict[str, Any]]:
+    """Read the dependency tables of a ``pyproject.toml``.
+
+    Parameters
+    ----------
+    path : Path
+        The ``pyproject.toml`` file
+
+    Returns
+    -------
+    dict[str, dict[str, Any]]
+        The dependencies of each group keyed by name
+
+    Raises
+    ------
+    tomllib.TOMLDecodeError
+        If the file is not valid ``TOML`` (e.g. while it is being edited)
+    """
+    with path.open('rb') as file:
+        return parse_dependency_tables(tomllib.load(file))
+
+
+def diff_tables(
+    old: dict[str, dict[str, Any]],
+    new: dict[str, dict[str, Any]],
+) -> TableDiff:
+    """Return the dependency entries that differ between two versions of the tables.
+
+    Parameters
+    ----------
+    old : dict[str, dict[str, Any]]
+        The previous dependencies of each group
+    new : dict[str, dict[str, Any]]
+        The current dependencies of each group
+
+    Returns
+    -------
+    TableDiff
+        The entries of ``new`` that are not in ``old`` or differ from it, and the
+        names of the entries of ``old`` that are not in ``new``
+    """
+    changed: dict[str, dict[str, Any]] = {}
+    removed: dict[str, list[str]] = {}
+
+    for group, table in new.items():
+        previous = old.get(group, {})
+        entries = {
+            name: spec for name, spec in table.items() if previous.get(name) != spec
+        }
+        if entries:
+            changed[group] = entries
+
+    for group, table in old.items():
+        names = [name for name in table if name not in new.get(group, {})]
+        if names:
+            removed[group] = names
+
+    return TableDiff(changed, removed)
@@ -0,0 +1,293 @@
+"""Find and rewrite the dependency constraints of a ``pyproject.toml`` line by line.
+
+The text is not parsed into a ``TOML`` document. Each line is tokenized on its own (a
+table header, the string value of a key and the ``version`` of inline tables), which is
+enough to find the constraints of the dependency tables written as ``poetry`` and most
+formatters write them, and lets a rewrite keep the rest of the text byte for byte.
+
+This serves the language server (see ``lsp.py``), which only tokenizes again the lines
+an edit touched, and ``poetry constrain filter``, which rewrites documents read from
+``stdin`` without a ``poetry`` project or any file.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Iterable, Iterator, NamedTuple, Sequence
+
+from poetry.core.packages.dependency_group import MAIN_GROUP
+
+from poetry_plugin_constrain.config import TOML_TABLE, get_document_config_variable
+from poetry_plugin_constrain.utils import CONSTRAINT_TYPES, replace_constraint
+
+_HEADER = re.compile(r'^\s*\[\[?\s*([^\]]+?)\s*\]\]?')
+_STRING_ASSIGNMENT = re.compile(
+    r'^\s*(?P<key>"[^"]*"|\'[^\']*\'|[\w.-]+)\s*=\s*'
+    r'(?P<quote>["\'])(?P<value>[^"\']*)(?P=quote)',
+)
+_INLINE_VERSION = re.compile(
+    r'\bversion\s*=\s*(?P<quote>["\'])(?P<value>[^"\']*)(?P=quote)',
+)
+_DEPENDENCY_SECTION = re.compile(
+    r'^tool\.poetry\.(?:group\.(?P<group>[^.]+)\.)?dependencies'
+    r'(?:\.(?P<dependency>.+))?$',
+)
+
+
+class InvalidConstraintTypeError(ValueError):
+    def __init__(
+        self,
+        kind: str,
+        value: str,
+    ) -> None:
+        super().__init__(f"'{kind}' constraint '{value}' is invalid.")
+        self.kind = kind
+
+
+class Token(NamedTuple):
+    """A table header, or a string value of a line of ``TOML``."""
+
+    kind: str  # 'header', 'string' (a key's value) or 'version' (in an inline table)
+    key: str  # The table name for headers
+    value: str
+    start: int
+    end: int
+
+
+def _code(line: str) -> str:
+    """Return a line without its comment."""
+    quote = ''
+    for index, char in enumerate(line):
+        if quote:
+            if char == quote:
+                quote = ''
+        elif char in ('"', "'"):
+            quote = char
+        elif char == '#':
+            return line[:index]
+
+    return line
+
+
+def tokenize(line: str) -> tuple[Token, ...]:
+    """Find the table header, or the string values of a line of ``TOML``.
+
+    Parameters
+    ----------
+    line : str
+        The line
+
+    Returns
+    -------
+    tuple[Token, ...]
+        The header, or the value of the key of the line and the ``version`` values of
+        its inline tables, in order
+    """
+    code = _code(line.rstrip('\r'))
+
+    header = _HEADER.match(code)
+    if header is not None:
+        name = header.group(1).replace('"', '').replace("'", '').replace(' ', '')
+        return (Token('header', name, '', 0, 0),)
+
+    tokens = []
+    end = 0
+
+    assignment = _STRING_ASSIGNMENT.match(code)
+    if assignment is not None:
+        tokens.append(
+            Token(
+                'string',
+                assignment.group('key').strip('"\''),
+                assignment.group('value'),
+                assignment.start('value'),
+                assignment.end('value'),
+            ),
+        )
+        end = assignment.end()
+
+    tokens.extend(
+        Token(
+            'version',
+            'version',
+            match.group('value'),
+            match.start('value'),
+            match.end('value'),
+        )
+        for match in _INLINE_VERSION.finditer(code, end)
+    )
+
+    return tuple(tokens)
+
+
+@lru_cache(maxsize=4096)
+def rewrite_constraint(value: str, old: str, new: str) -> str:
+    """Return a constraint rewritten as ``poetry constrain`` would rewrite it.
+
+    The same constraints recur across documents, so the results are cached.
+
+    Parameters
+    ----------
+    value : str
+        The version constraints, e.g. ``'^1.2'``
+    old : str
+        The type of constraint to replace
+    new : str
+        The type of constraint to replace it with
+
+    Returns
+    -------
+    str
+        The rewritten constraints
+    """
+    return replace_constraint(value, old=old, new=new)
+
+
+def settings(
+    lines: Sequence[tuple[Token, ...]],
+    defaults: dict[str, str] | None = None,
+) -> tuple[str, str]:
+    """Return the ``old`` and ``new`` constraint types configured for a document.
+
+    Parameters
+    ----------
+    lines : Sequence[tuple[Token, ...]]
+        The tokens of each line of the document
+    defaults : dict[str, str] | None, optional
+        The types to use if neither the ``[tool.poetry-plugin-constrain]`` table of the
+        document nor the environment sets them, by default ``caret`` and ``ge``
+
+    Returns
+    -------
+    tuple[str, str]
+        The ``old`` and ``new`` constraint types
+    """
+    defaults = defaults or {}
+    config: dict[str, Any] = {}
+    section = ''
+
+    for tokens in lines:
+        for token in tokens:
+            if token.kind == 'header':
+                section = token.key
+            elif section == f'tool.{TOML_TABLE}' and token.kind == 'string':
+                config[token.key] = token.value
+
+    document = {'tool': {TOML_TABLE: config}}
+
+    return (
+        get_document_config_variable(document, 'old', defaults.get('old', 'caret')),
+        get_document_config_variable(document, 'new', defaults.get('new', 'ge')),
+    )
+
+
+def constraints(lines: Sequence[tuple[Token, ...]]) -> Iterator[tuple[int, str, Token]]:
+    """Yield the constraints of the dependency tables of a document.
+
+    Parameters
+    ----------
+    lines : Sequence[tuple[Token, ...]]
+        The tokens of each line of the document
+
+    Yields
+    ------
+    tuple[int, str, Token]
+        The line number, the group name and the token of each constraint
+    """
+    section = None
+
+    for number, tokens in enumerate(lines):
+        for token in tokens:
+            if token.kind == 'header':
+                section = _DEPENDENCY_SECTION.match(token.key)
+            elif section is None:
+                continue
+            elif section.group('dependency') is None or token.key == 'version':
+                # A dependency table, or the table of a single dependency
+                yield number, section.group('group') or MAIN_GROUP, token
+
+
+def constrain_text(
+    text: str,
+    *,
+    old: str | None = None,
+    new: str | None = None,
+    only: Iterable[str] = (),
+    without: Iterable[str] = (),
+) -> str:
+    """Rewrite the dependency constraints of the text of a ``pyproject.toml``.
+
+    Parameters
+    ----------
+    text : str
+        The ``pyproject.toml``
+    old : str | None, optional
+        The type of constraint to replace, by default as configured in the document
+        or the environment, else ``caret``
+    new : str | None, optional
+        The type of constraint to replace it with, by default as configured in the
+        document or the environment, else ``ge``
+    only : Iterable[str], optional
+        Only rewrite these groups. When given, ``without`` is ignored.
+    without : Iterable[str], optional
+        Do not rewrite these groups
+
+    Returns
+    -------
+    str
+        The ``pyproject.toml`` with its constraints rewritten, otherwise unchanged
+
+    Raises
+    ------
+    InvalidConstraintTypeError
+        If the ``old`` or ``new`` constraint type is invalid
+    """
+    lines = text.split('\n')
+    tokens = [tokenize(line) for line in lines]
+
+    if old is None or new is None:
+        configured_old, configured_new = settings(tokens)
+        old = old or configured_old
+        new = new or configured_new
+
+    for kind, value in (('old', old), ('new', new)):
+        if value not in CONSTRAINT_TYPES:
+            raise InvalidConstraintTypeError(kind, value)
+
+    only = set(only)
+    without = set(without)
+
+    # Rewrite the values of a line from the last, so earlier positions stay valid
+    for number, group, token in sorted(
+        constraints(tokens),
+        key=lambda item: (item[0], -item[2].start),
+    ):
+        if (only and group not in only) or (not only and group in without):
+            continue
+
+        replacement = rewrite_constraint(token.value, old, new)
+        if replacement != token.value:
+            line = lines[number]
+            lines[number] = f'{line[: token.start]}{replacement}{line[token.end :]}'
+
+    return '\n'.join(lines)
+
+
+def constrain_texts(texts: Iterable[str], **kwargs: Any) -> Iterator[str]:
+    """Rewrite the dependency constraints of many ``pyproject.toml`` texts.
+
+    Parameters
+    ----------
+    texts : Iterable[str]
+        The ``pyproject.toml`` texts
+    **kwargs : Any
+        The options of ``constrain_text``
+
+    Yields
+    ------
+    str
+        Each rewritten text, in order
+    """
+    for text in texts:
+        yield constrain_text(text, **kwargs)
@@ -0,0 +1,304 @@
+"""Report the spans of ``poetry constrain`` runs to listeners, e.g. other tooling.
+
+A span times a unit of work: the command, the post-hook, solving the new constraints
+or writing a file. Listeners are told when each span starts and ends, and are created
+for a run by ``load_listeners`` from three sources:
+
+  - the ``poetry_plugin_constrain.tracing`` entry point group of installed packages
+  - the ``trace-listeners`` configuration variable, a comma-separated list of
+    ``module:attribute`` references
+  - the ``trace-output`` configuration variable (or ``--trace-output`` option), a file
+    ``ChromeTraceExporter`` writes the spans to
+
+Each entry point or reference is a ``SpanListener`` subclass, or any other callable
+returning a listener, called without arguments. Entry points are only looked up once
+per process, so packages installed since are not found until the next one.
+``tracing_session`` attaches the listeners until the run ends.
+
+Without listeners, ``span`` returns a shared no-op context manager, so the spans cost a
+function call.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from importlib import import_module
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Iterator
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+ENTRY_POINT_GROUP = 'poetry_plugin_constrain.tracing'
+
+# Replaced by the process id in ``trace-output``, e.g. for the projects of
+# ``--recursive``, each constrained in its own process
+PID_PLACEHOLDER = '{pid}'
+
+_NULL_SPAN = nullcontext()
+
+# The listeners attached, and the sessions open, in this process
+_LISTENERS: list[SpanListener] = []
+_SESSIONS: list[list[SpanListener]] = []
+
+
+class InvalidListenerError(Exception):
+    def __init__(
+        self,
+        reference: str,
+    ) -> None:
+        super().__init__(
+            f"Invalid trace listener {reference!r}: expected 'module:attribute'.",
+        )
+
+
+class Span:
+    """A timed unit of work, used as a context manager around it.
+
+    The times are ``time.perf_counter_ns`` readings, so only differences between them
+    are meaningful.
+    """
+
+    __slots__ = ('attributes', 'category', 'end', 'name', 'start', 'thread')
+
+    def __init__(self, name: str, category: str, attributes: dict[str, Any]) -> None:
+        """Create a span.
+
+        Parameters
+        ----------
+        name : str
+            The unit of work, e.g. ``'solve'``
+        category : str
+            The kind of work, e.g. ``'command'`` or ``'write'``
+        attributes : dict[str, Any]
+            Details of the work, e.g. the file written
+        """
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.start = 0
+        self.end = 0
+        self.thread = threading.get_ident()
+
+    @property
+    def duration(self) -> int:
+        """Return the duration of the span in nanoseconds."""
+        return self.end - self.start
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter_ns()
+
+        for listener in _LISTENERS:
+            listener.on_start(self)
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.end = time.perf_counter_ns()
+
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+
+        for listener in _LISTENERS:
+            listener.on_end(self)
+
+
+class SpanListener:
+    """A listener told when each span starts and ends, here doing nothing."""
+
+    def on_start(self, span: Span) -> None:
+        """Handle the start of a span."""
+
+    def on_end(self, span: Span) -> None:
+        """Handle the end of a span."""
+
+    def close(self) -> None:
+        """Release any resources once the run ends, e.g. write out the spans."""
+
+
+class ChromeTraceExporter(SpanListener):
+    """Write the spans as Chrome trace events, for ``chrome://tracing`` or Perfetto."""
+
+    def __init__(self, path: Path | str) -> None:
+        """Create an exporter.
+
+        Parameters
+        ----------
+        path : Path | str
+            The JSON file to write, ``PID_PLACEHOLDER`` replaced by the process id
+        """
+        self.path = Path(str(path).replace(PID_PLACEHOLDER, str(os.getpid())))
+        self.events: list[dict[str, Any]] = []
+
+    def on_end(self, span: Span) -> None:
+        """Record a span as a complete event, in microseconds."""
+        self.events.append(
+            {
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': span.start / 1e3,
+                'dur': span.duration / 1e3,
+                'pid': os.getpid(),
+                'tid': span.thread,
+                'args': span.attributes,
+            },
+        )
+
+    def close(self) -> None:
+        """Write the events recorded."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps(
+                {'traceEvents': self.events, 'displayTimeUnit': 'ms'},
+                default=str,
+            )
+            + '\n',
+            encoding='utf-8',
+        )
+
+
+def span(
+    name: str, category: str = 'constrain', **attributes: Any
+) -> ContextManager[None]:
+    """Return a context manager reporting a span to the listeners attached.
+
+    Parameters
+    ----------
+    name : str
+        The unit of work, e.g. ``'solve'``
+    category : str, optional
+        The kind of work, by default ``'constrain'``
+    **attributes : Any
+        Details of the work, e.g. the file written
+
+    Returns
+    -------
+    ContextManager[None]
+        The span, or a shared no-op context manager without listeners
+    """
+    if not _LISTENERS:
+        return _NULL_SPAN
+
+    return Span(name, category, attributes)
+
+
+def add_listener(listener: SpanListener) -> None:
+    """Attach a listener, told of every span until removed."""
+    _LISTENERS.append(listener)
+
+
+def remove_listener(listener: SpanListener) -> None:
+    """Detach a listener."""
+    _LISTENERS.remove(listener)
+
+
+def _resolve(reference: str) -> Callable[[], SpanListener]:
+    module, _, attribute = reference.strip().partition(':')
+
+    if not module or not attribute:
+        raise InvalidListenerError(reference)
+
+    target: Any = import_module(module)
+    for name in attribute.split('.'):
+        target = getattr(target, name)
+
+    return target
+
+
+# Scanning the installed packages takes milliseconds, so it is done once per process,
+# e.g. for the command and then for the post-hook, or for every request of the daemon
+@lru_cache(maxsize=None)
+def _entry_point_factories() -> tuple[Callable[[], SpanListener], ...]:
+    from importlib import metadata
+
+    entry_points = metadata.entry_points()
+
+    # ``select`` is new in Python 3.10, before which the entry points are a dict
+    if hasattr(entry_points, 'select'):
+        selected = entry_points.select(group=ENTRY_POINT_GROUP)
+    else:  # pragma: no cover
+        selected = entry_points.get(ENTRY_POINT_GROUP, [])
+
+    return tuple(entry_point.load() for entry_point in selected)
+
+
+def load_listeners(
+    output: str | None = None,
+    listeners: str | None = None,
+) -> list[SpanListener]:
+    """Create the listeners of the entry points and of the configuration.
+
+    None are created while a session is open, e.g. for ``constrain`` run by a
+    post-hook, whose spans are reported to the listeners of that session.
+
+    Parameters
+    ----------
+    output : str | None, optional
+        The file to write a Chrome trace to, by default ``None``
+    listeners : str | None, optional
+        Comma-separated ``module:attribute`` references to listener factories, by
+        default ``None``
+
+    Returns
+    -------
+    list[SpanListener]
+        The listeners
+
+    Raises
+    ------
+    InvalidListenerError
+        If a reference is not of the form ``module:attribute``
+    """
+    if _SESSIONS:
+        return []
+
+    factories = list(_entry_point_factories())
+
+    if listeners:
+        factories.extend(
+            _resolve(reference) for reference in listeners.split(',') if reference.strip()
+        )
+
+    created = [factory() for factory in factories]
+
+    if output:
+        created.append(ChromeTraceExporter(output))
+
+    return created
+
+
+@contextmanager
+def tracing_session(listeners: list[SpanListener]) -> Iterator[None]:
+    """Attach listeners for a run, then detach and close them.
+
+    Parameters
+    ----------
+    listeners : list[SpanListener]
+        The listeners, e.g. of ``load_listeners``
+
+    Yields
+    ------
+    None
+    """
+    _SESSIONS.append(listeners)
+
+    for listener in listeners:
+        add_listener(listener)
+
+    try:
+        yield
+    finally:
+        _SESSIONS.pop()
+
+        for listener in listeners:
+            remove_listener(listener)
+            listener.close()
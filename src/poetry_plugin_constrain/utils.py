@@ -12,7 +12,11 @@ from typing import TYPE_CHECKING, Any, Callable, Generator, Iterable, cast
 from cleo.io.outputs.output import Verbosity
 from poetry.core.constraints.version import VersionConstraint
 
+from poetry_plugin_constrain.tracing import span
+
 if TYPE_CHECKING:
+    from pathlib import Path
+
     from cleo.io.io import IO
     from poetry.core.packages.dependency import Dependency
     from poetry.installation.installer import Installer
@@ -80,6 +84,28 @@ def _patch_io_writes(
         io.write = write  # type: ignore[method-assign]
 
 
+def file_state(path: Path) -> tuple[int, int, int] | None:
+    """Return the inode, modification time and size of a file.
+
+    Parameters
+    ----------
+    path : Path
+        The file
+
+    Returns
+    -------
+    tuple[int, int, int] | None
+        The inode, modification time (in nanoseconds) and size, or ``None`` if the file
+        does not exist. A file replaced or written since has a different state.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
 def run_installer_update(
     poetry: Poetry,
     installer: Installer,
@@ -130,7 +156,7 @@ def run_installer_update(
                 group.remove_dependency(dependency.name)
             group.add_dependency(dependency)
 
-            whitelist.extend(dependency.name)
+            whitelist.append(dependency.name)
 
     installer.whitelist(whitelist)
 
@@ -169,7 +195,14 @@ def run_installer_update(
     else:
         _cmd = _update_messages_for_dry_run
 
-    with _patch_io_writes(
+    # The installer only solves, and locks or installs, when run
+    with span(
+        'run-installer-update',
+        'solve',
+        groups=list(dependencies_by_group),
+        dry_run=dry_run,
+        lock=lockfile_only,
+    ), _patch_io_writes(
         installer._io,
         _cmd,
     ):
@@ -267,6 +300,33 @@ def _replace_constraint(
     return constraint
 
 
+def replace_constraint(
+    constraints: str,
+    old: str = 'caret',
+    new: str = 'ge',
+) -> str:
+    """Replace the old constraint in a constraint string with the new one.
+
+    Parameters
+    ----------
+    constraints : str
+        The version constraints to update
+    old : str, optional
+        The old version constraint, by default 'caret'
+    new : str, optional
+        The new version constraint, by default 'ge'
+
+    Returns
+    -------
+    str
+        The modified version constraints
+    """
+    return mutate_constraint(
+        constraints,
+        partial(_replace_constraint, old=old, new=new),
+    )
+
+
 def replace_constraint_from_dependency(
     dependency: Dependency,
     old: str = 'caret',
@@ -288,10 +348,7 @@ def replace_constraint_from_dependency(
     Dependency
         The modified dependency
     """
-    new_version = mutate_constraint(
-        dependency.pretty_constraint,
-        partial(_replace_constraint, old=old, new=new),
-    )
+    new_version = replace_constraint(dependency.pretty_constraint, old=old, new=new)
 
     # Copy to retain as much info as possible
     new_dependency = copy(dependency)
@@ -302,6 +359,71 @@ def replace_constraint_from_dependency(
     return new_dependency
 
 
+# Longest markers first so e.g. '>=' is not classified as '>'
+_MARKERS_BY_LENGTH = sorted(
+    CONSTRAINT_TYPES.items(),
+    key=lambda item: len(item[1]),
+    reverse=True,
+)
+
+
+def constraint_type(constraint: str) -> str:
+    """Return the type of a single constraint.
+
+    Besides the keys of ``CONSTRAINT_TYPES``, the type may be ``'any'`` (``*``),
+    ``'wildcard'`` (e.g. ``1.2.*``) or ``'compatible'`` (``~=``). Bare versions are
+    ``'exact'``, as in ``poetry``.
+
+    Parameters
+    ----------
+    constraint : str
+        A single version constraint, e.g. ``'^1.2'``
+
+    Returns
+    -------
+    str
+        The constraint type
+    """
+    constraint = constraint.strip()
+
+    if constraint in ('', '*'):
+        return 'any'
+
+    for name, marker in _MARKERS_BY_LENGTH:
+        if constraint.startswith(marker):
+            if name == 'tilde' and constraint.startswith('~='):
+                return 'compatible'
+            if name == 'exact' and constraint.endswith('*'):
+                return 'wildcard'
+            return name
+
+    return 'wildcard' if constraint.endswith('*') else 'exact'
+
+
+def constraint_types(constraints: str) -> list[str]:
+    """Return the type of each single constraint in a constraint string.
+
+    Parameters
+    ----------
+    constraints : str
+        The version constraints, e.g. ``'>=1.2,<2 || ^3'``
+
+    Returns
+    -------
+    list[str]
+        The constraint types, in order
+    """
+    types: list[str] = []
+
+    def _collect(constraint: str) -> str:
+        types.append(constraint_type(constraint))
+        return constraint
+
+    mutate_constraint(constraints, _collect)
+
+    return types
+
+
 def deep_get(data: dict, path: list[str]) -> Any:
     """Get the value from a nested dictionary at the end of a list of keys.
 
@@ -381,3 +503,15 @@ def print_group_header(
 
     io.write_line(title)
     io.write_line('=' * len(title_no_tags))
+
+
+def print_project_header(
+    io: IO,  # pylint: disable=C0103
+    path: Path,
+) -> None:
+    """Pretty print the project directory using ``cleo`` semantics."""
+    title = f'Project: <c1>{path}</c1>'
+    title_no_tags = re.sub(r'<.*?>', '', title)
+
+    io.write_line(title)
+    io.write_line('=' * len(title_no_tags))
@@ -0,0 +1,418 @@
+"""Verify constraint policies against the locked versions of many projects at once.
+
+A *policy* is an ``old``/``new`` pair as accepted by ``poetry constrain`` (e.g. replace
+``caret`` with ``ge``). Verifying a policy means rewriting every dependency constraint
+of every project with the policy and checking whether the version pinned in each
+project's ``poetry.lock`` is still allowed by the rewritten constraint.
+
+Calling ``VersionConstraint.allows`` once per project and package is slow when there
+are hundreds of lock files. Instead, the locked versions are encoded as fixed-width
+integer release tuples and the bounds of each (unique) rewritten constraint are
+compared against all of them at once. When ``numpy`` is installed, the comparisons are
+vectorized; otherwise, an equivalent pure-Python implementation is used.
+
+Only plain releases (no epoch, pre-, post-, dev-release or local segment) can be
+compared by their release tuple alone. Cells involving any other version fall back to
+``VersionConstraint.allows`` so the result is always exact.
+"""
+
+from __future__ import annotations
+
+from functools import reduce
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+from packaging.utils import canonicalize_name
+from poetry.core.constraints.version import Version, VersionUnion, parse_constraint
+
+from poetry_plugin_constrain._compat import tomllib
+from poetry_plugin_constrain.utils import deep_get, replace_constraint
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from poetry.core.constraints.version import VersionConstraint
+
+    # ``(min, include_min, max, include_max)`` of an interval as release tuples
+    _Bounds = Tuple[Optional[Tuple[int, ...]], bool, Optional[Tuple[int, ...]], bool]
+
+HAS_NUMPY = np is not None
+
+# Lexicographic comparisons are reduced to a single dot product with powers of three,
+# which only fits in an ``int64`` for release tuples of up to 39 components.
+_MAX_VECTORIZED_WIDTH = 39
+
+
+class Interval(NamedTuple):
+    """A contiguous range of versions. ``None`` bounds are unbounded."""
+
+    min: Version | None
+    include_min: bool
+    max: Version | None
+    include_max: bool
+
+
+class Project(NamedTuple):
+    """The dependency constraints and locked versions of a single project.
+
+    ``constraints`` maps each canonical package name to one list of constraints per
+    dependency table (``main``, or a group) it is declared in. Each list holds the
+    alternatives of a multiple constraints dependency.
+    """
+
+    name: str
+    constraints: dict[str, list[list[str]]]
+    locked: dict[str, str]
+
+
+class ViolationMatrix:
+    """A project by package matrix of policy violations.
+
+    ``violations[i][j]`` is ``True`` if the version of ``packages[j]`` locked by
+    ``projects[i]`` is not allowed by its rewritten constraint. ``checked[i][j]`` is
+    ``True`` if the project both constrains and locks the package. Both are ``numpy``
+    boolean arrays when ``numpy`` was used, otherwise nested lists.
+    """
+
+    def __init__(
+        self,
+        projects: list[str],
+        packages: list[str],
+        violations: Any,
+        checked: Any,
+        details: dict[tuple[int, int], tuple[str, str]],
+    ) -> None:
+        self.projects = projects
+        self.packages = packages
+        self.violations = violations
+        self.checked = checked
+        self.details = details
+
+    def __len__(self) -> int:
+        return len(self.details)
+
+    def __iter__(self) -> Iterator[tuple[str, str, str, str]]:
+        """Iterate over ``(project, package, locked version, constraint)`` violations."""
+        for (row, column), (locked, constraint) in sorted(self.details.items()):
+            yield self.projects[row], self.packages[column], locked, constraint
+
+
+def constraint_intervals(constraint: VersionConstraint) -> list[Interval]:
+    """Return the disjoint intervals of versions allowed by a constraint.
+
+    Parameters
+    ----------
+    constraint : VersionConstraint
+        The parsed version constraint
+
+    Returns
+    -------
+    list[Interval]
+        The intervals allowed by the constraint; empty if it allows no version.
+    """
+    if constraint.is_empty():
+        return []
+
+    ranges = constraint.ranges if isinstance(constraint, VersionUnion) else [constraint]
+
+    return [
+        Interval(r.min, r.include_min, r.max, r.include_max)  # type: ignore[attr-defined]
+        for r in ranges
+    ]
+
+
+def is_plain_release(version: Version) -> bool:
+    """Return whether a version is fully described by its release tuple."""
+    return (
+        version.epoch == 0
+        and version.pre is None
+        and version.post is None
+        and version.dev is None
+        and version.local is None
+    )
+
+
+def release_tuple(version: Version, width: int) -> tuple[int, ...]:
+    """Return the release segment of a version zero-padded to ``width`` components."""
+    parts = version.release.to_parts()
+    return parts + (0,) * (width - len(parts))
+
+
+def load_project(path: Path) -> Project:
+    """Load the constraints and locked versions of a project (read-only).
+
+    Parameters
+    ----------
+    path : Path
+        The project directory containing ``pyproject.toml`` and ``poetry.lock``
+
+    Returns
+    -------
+    Project
+        The project constraints and locked versions
+
+    Raises
+    ------
+    OSError
+        If ``pyproject.toml`` cannot be read, e.g. if the project does not exist
+    TOMLDecodeError
+        If ``pyproject.toml`` or ``poetry.lock`` is not valid TOML
+    ValueError
+        If a constraint or the locked version of a constrained package is malformed
+    """
+    with (path / 'pyproject.toml').open('rb') as file:
+        poetry_config = deep_get(tomllib.load(file), ['tool', 'poetry']) or {}
+
+    tables = [poetry_config.get('dependencies', {})] + [
+        group.get('dependencies', {}) for group in poetry_config.get('group', {}).values()
+    ]
+
+    constraints: dict[str, list[list[str]]] = {}
+    for table in tables:
+        for name, spec in table.items():
+            canonical_name = canonicalize_name(name)
+            if canonical_name == 'python':
+                continue
+
+            # Support multiple constraint dependencies. Path, url and VCS dependencies
+            # have no version to check.
+            alternatives = [
+                entry.get('version') if isinstance(entry, dict) else entry
+                for entry in (spec if isinstance(spec, list) else [spec])
+            ]
+            if all(alternatives):
+                constraints.setdefault(canonical_name, []).append(alternatives)
+
+    locked: dict[str, str] = {}
+    lock_path = path / 'poetry.lock'
+    if lock_path.exists():
+        with lock_path.open('rb') as file:
+            locked = {
+                canonicalize_name(package['name']): package['version']
+                for package in tomllib.load(file).get('package', [])
+            }
+
+    # Fail here rather than in ``build_violation_matrix``, which checks every project
+    # at once
+    for alternatives in chain.from_iterable(constraints.values()):
+        for constraint in alternatives:
+            parse_constraint(constraint)
+    for name in constraints.keys() & locked.keys():
+        Version.parse(locked[name])
+
+    return Project(str(path), constraints, locked)
+
+
+def _combine(rewritten: tuple[tuple[str, ...], ...]) -> VersionConstraint:
+    # Every dependency table must be satisfied, but only one alternative within each
+    return reduce(
+        lambda a, b: a.intersect(b),
+        (
+            reduce(lambda a, b: a.union(b), (parse_constraint(c) for c in alternatives))
+            for alternatives in rewritten
+        ),
+    )
+
+
+def _allowed_python(
+    versions: list[tuple[int, ...]],
+    bounds: list[list[_Bounds]],
+    keys: list[int],
+) -> list[bool]:
+    return [
+        any(
+            (lo is None or version > lo or (inc_lo and version == lo))
+            and (hi is None or version < hi or (inc_hi and version == hi))
+            for lo, inc_lo, hi, inc_hi in bounds[key]
+        )
+        for version, key in zip(versions, keys)
+    ]
+
+
+def _allowed_numpy(
+    versions: list[tuple[int, ...]],
+    bounds: list[list[_Bounds]],
+    keys: list[int],
+    width: int,
+) -> list[bool]:
+    num_intervals = max(1, *(len(b) for b in bounds))
+    shape = (len(bounds), num_intervals)
+
+    lo = np.zeros((*shape, width), dtype=np.int64)
+    hi = np.zeros((*shape, width), dtype=np.int64)
+    has_lo = np.zeros(shape, dtype=bool)
+    has_hi = np.zeros(shape, dtype=bool)
+    inc_lo = np.zeros(shape, dtype=bool)
+    inc_hi = np.zeros(shape, dtype=bool)
+    valid = np.zeros(shape, dtype=bool)
+
+    for u, intervals in enumerate(bounds):
+        for m, (_lo, _inc_lo, _hi, _inc_hi) in enumerate(intervals):
+            valid[u, m] = True
+            inc_lo[u, m] = _inc_lo
+            inc_hi[u, m] = _inc_hi
+            if _lo is not None:
+                has_lo[u, m] = True
+                lo[u, m] = _lo
+            if _hi is not None:
+                has_hi[u, m] = True
+                hi[u, m] = _hi
+
+    weights = 3 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    index = np.asarray(keys, dtype=np.intp)
+    array = np.asarray(versions, dtype=np.int64)[:, None, :]
+
+    # The sign of the weighted sum of component-wise signs is the sign of the first
+    # non-zero component, i.e. the result of a lexicographic comparison
+    cmp_lo = np.sign(np.sign(array - lo[index]) @ weights)
+    cmp_hi = np.sign(np.sign(array - hi[index]) @ weights)
+
+    lower_ok = ~has_lo[index] | (cmp_lo > 0) | (inc_lo[index] & (cmp_lo == 0))
+    upper_ok = ~has_hi[index] | (cmp_hi < 0) | (inc_hi[index] & (cmp_hi == 0))
+
+    return (valid[index] & lower_ok & upper_ok).any(axis=1).tolist()
+
+
+def build_violation_matrix(  # noqa: C901
+    projects: Sequence[Project],
+    old: str = 'caret',
+    new: str = 'ge',
+    *,
+    use_numpy: bool | None = None,
+) -> ViolationMatrix:
+    """Check a constraint policy against the locked versions of many projects.
+
+    Parameters
+    ----------
+    projects : Sequence[Project]
+        The projects to check
+    old : str, optional
+        The constraint to replace, by default 'caret'
+    new : str, optional
+        The constraint to replace ``old`` with, by default 'ge'
+    use_numpy : bool | None, optional
+        Whether to vectorize the comparisons with ``numpy``. The pure-Python
+        implementation is used if ``numpy`` is not installed. By default, ``numpy`` is
+        used if it is installed.
+
+    Returns
+    -------
+    ViolationMatrix
+        The project by package violation matrix
+    """
+    use_numpy = HAS_NUMPY and use_numpy is not False
+
+    packages = sorted({name for project in projects for name in project.constraints})
+    columns = {name: column for column, name in enumerate(packages)}
+
+    parsed_versions: dict[str, Version] = {}
+    keys: dict[tuple[tuple[str, ...], ...], int] = {}
+    constraints: list[VersionConstraint] = []
+    pretty_constraints: list[str] = []
+
+    # (row, column, locked version, key of the rewritten constraint)
+    cells: list[tuple[int, int, str, int]] = []
+
+    for row, project in enumerate(projects):
+        for name, tables in project.constraints.items():
+            locked = project.locked.get(name)
+            if locked is None:
+                continue
+
+            rewritten = tuple(
+                tuple(replace_constraint(c, old=old, new=new) for c in alternatives)
+                for alternatives in tables
+            )
+            if rewritten not in keys:
+                keys[rewritten] = len(constraints)
+                constraints.append(_combine(rewritten))
+                pretty_constraints.append(
+                    '; '.join(' || '.join(alternatives) for alternatives in rewritten),
+                )
+
+            if locked not in parsed_versions:
+                parsed_versions[locked] = Version.parse(locked)
+
+            cells.append((row, columns[name], locked, keys[rewritten]))
+
+    intervals = [constraint_intervals(constraint) for constraint in constraints]
+    exact = [
+        all(
+            bound is None or is_plain_release(bound)
+            for interval in _intervals
+            for bound in (interval.min, interval.max)
+        )
+        for _intervals in intervals
+    ]
+
+    fast: list[tuple[int, int, str, int]] = []
+    slow: list[tuple[int, int, str, int]] = []
+    for cell in cells:
+        if exact[cell[3]] and is_plain_release(parsed_versions[cell[2]]):
+            fast.append(cell)
+        else:
+            slow.append(cell)
+
+    width = max(
+        [1]
+        + [len(parsed_versions[cell[2]].release.to_parts()) for cell in fast]
+        + [
+            len(bound.release.to_parts())
+            for _intervals in intervals
+            for interval in _intervals
+            for bound in (interval.min, interval.max)
+            if bound is not None
+        ],
+    )
+
+    bounds = [
+        [
+            (
+                None if i.min is None else release_tuple(i.min, width),
+                i.include_min,
+                None if i.max is None else release_tuple(i.max, width),
+                i.include_max,
+            )
+            for i in _intervals
+        ]
+        for _intervals in intervals
+    ]
+    versions = [release_tuple(parsed_versions[cell[2]], width) for cell in fast]
+    cell_keys = [cell[3] for cell in fast]
+
+    if not fast:
+        allowed = []
+    elif use_numpy and width <= _MAX_VECTORIZED_WIDTH:
+        allowed = _allowed_numpy(versions, bounds, cell_keys, width)
+    else:
+        allowed = _allowed_python(versions, bounds, cell_keys)
+
+    allowed += [constraints[key].allows(parsed_versions[v]) for _, _, v, key in slow]
+
+    shape = (len(projects), len(packages))
+    if use_numpy:
+        violations = np.zeros(shape, dtype=bool)
+        checked = np.zeros(shape, dtype=bool)
+    else:
+        violations = [[False] * shape[1] for _ in range(shape[0])]
+        checked = [[False] * shape[1] for _ in range(shape[0])]
+
+    details: dict[tuple[int, int], tuple[str, str]] = {}
+    for (row, column, locked, key), is_allowed in zip(fast + slow, allowed):
+        checked[row][column] = True
+        if not is_allowed:
+            violations[row][column] = True
+            details[row, column] = (locked, pretty_constraints[key])
+
+    return ViolationMatrix(
+        projects=[project.name for project in projects],
+        packages=packages,
+        violations=violations,
+        checked=checked,
+        details=details,
+    )
@@ -0,0 +1,179 @@
+"""Watch a ``pyproject.toml`` and find the dependency entries changed by each save.
+
+On Linux, the directory of the file is watched with ``inotify`` (through ``ctypes``),
+so editors that save by replacing the file are noticed as well. Elsewhere, or if
+``inotify`` is not available, the state of the file is polled.
+
+Each saved version is read with ``tables.dependency_tables`` and compared with the
+previous version, so only the added or modified entries are passed on.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from typing import TYPE_CHECKING
+
+from poetry_plugin_constrain.utils import file_state
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+# See ``inotify(7)``
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Editors often write a file in several steps, so wait for them to settle
+DEBOUNCE_SECONDS = 0.05
+POLL_INTERVAL_SECONDS = 0.5
+
+
+class PollingWatcher:
+    """Notice changes to a file by polling its inode, modification time and size."""
+
+    def __init__(self, path: Path, interval: float = POLL_INTERVAL_SECONDS) -> None:
+        self.path = path
+        self.interval = interval
+        self._state = file_state(path)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for the file to change.
+
+        Parameters
+        ----------
+        timeout : float | None, optional
+            The number of seconds to wait, by default forever
+
+        Returns
+        -------
+        bool
+            ``True`` if the file changed, ``False`` if the timeout expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            state = file_state(self.path)
+            if state != self._state:
+                self._state = state
+                time.sleep(DEBOUNCE_SECONDS)
+                self._state = file_state(self.path)
+                return True
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+            time.sleep(self.interval)
+
+    def close(self) -> None:
+        """Stop watching the file."""
+
+
+class InotifyWatcher:
+    """Notice changes to a file with Linux's ``inotify``."""
+
+    def __init__(self, path: Path) -> None:
+        """Watch the directory of a file.
+
+        Parameters
+        ----------
+        path : Path
+            The file to watch
+
+        Raises
+        ------
+        OSError
+            If ``inotify`` is not available
+        """
+        self.path = path
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'inotify is not available.')
+
+        self._fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed.')
+
+        # Watch the directory, since editors may replace the file when saving it
+        watch = libc.inotify_add_watch(
+            self._fd,
+            os.fsencode(path.parent),
+            _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE,
+        )
+        if watch < 0:
+            os.close(self._fd)
+            raise OSError(ctypes.get_errno(), f"Could not watch '{path.parent}'.")
+
+    def _read_names(self) -> set[bytes]:
+        data = os.read(self._fd, 64 * 1024)
+        names = set()
+
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            names.add(data[offset : offset + length].rstrip(b'\0'))
+            offset += length
+
+        return names
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for the file to change.
+
+        Parameters
+        ----------
+        timeout : float | None, optional
+            The number of seconds to wait, by default forever
+
+        Returns
+        -------
+        bool
+            ``True`` if the file changed, ``False`` if the timeout expired
+        """
+        name = os.fsencode(self.path.name)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not select.select([self._fd], [], [], remaining)[0]:
+                return False
+
+            if name in self._read_names():
+                # Drain the events of the rest of the save
+                while select.select([self._fd], [], [], DEBOUNCE_SECONDS)[0]:
+                    self._read_names()
+                return True
+
+    def close(self) -> None:
+        """Stop watching the file."""
+        os.close(self._fd)
+
+
+def create_watcher(path: Path) -> InotifyWatcher | PollingWatcher:
+    """Return a watcher of a file, using ``inotify`` if available.
+
+    Parameters
+    ----------
+    path : Path
+        The file to watch
+
+    Returns
+    -------
+    InotifyWatcher | PollingWatcher
+        The watcher
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(path)
+        except OSError:
+            pass
+
+    return PollingWatcher(path)
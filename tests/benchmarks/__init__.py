@@ -0,0 +1,3 @@
+"""Benchmarks for ``poetry-constrain-plugin``."""
+
+from __future__ import annotations
@@ -0,0 +1,313 @@
+"""Benchmark configuration file.
+
+Benchmarks are skipped unless ``pytest`` is run with ``--run-benchmarks``, e.g.::
+
+    pytest tests/benchmarks --run-benchmarks --benchmark-json benchmarks.json
+
+Each benchmark times a function with the ``benchmark`` fixture. The results are
+summarized at the end of the run and, with ``--benchmark-json``, written to a file so
+they can be compared from release to release. With ``--benchmark-save``, they are also
+saved to the ``--benchmark-storage`` directory, tagged with the git revision, the
+``python`` and ``poetry`` versions and a fingerprint of the machine, for
+``ci/compare_benchmarks.py`` to compare later runs to.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple
+
+import pytest
+
+if TYPE_CHECKING:
+    from _pytest.terminal import TerminalReporter
+
+    from tests.benchmarks.projects import PhaseTimer
+
+    if sys.version_info >= (3, 10):
+        from typing import TypeAlias
+    else:
+        from typing_extensions import TypeAlias
+
+# See: https://github.com/python/mypy/issues/14158
+if sys.version_info < (3, 10):
+    Benchmark: TypeAlias = 'Callable[..., Any]'
+else:
+    Benchmark: TypeAlias = Callable[..., Any]
+
+BENCHMARKS_PATH = Path(__file__).parent
+
+# The version of the format of the ``--benchmark-json`` file
+FORMAT_VERSION = 1
+
+# The hardware the machine fingerprint is computed from, so results are only compared
+# to results of the same kind of machine
+_CPU_INFO = Path('/proc/cpuinfo')
+
+# Each round runs the function at least this long, in seconds
+MIN_ROUND_TIME = 0.02
+
+
+class Result(NamedTuple):
+    """The timings of a benchmark, in seconds per call."""
+
+    name: str
+    group: str
+    rounds: int
+    loops: int
+    items: int
+    min: float
+    median: float
+    mean: float
+    stdev: float
+    # The mean time per call spent in each phase, for end-to-end benchmarks
+    phases: dict[str, float] | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the result, with the median time per item, for the ``JSON`` file."""
+        result = {**self._asdict(), 'per_item': self.median / self.items}
+        if self.phases is None:
+            del result['phases']
+
+        return result
+
+
+_RESULTS = pytest.StashKey['list[Result]']()
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Register the ``benchmark`` marker and collect the results of the session."""
+    config.addinivalue_line('markers', 'benchmark: a benchmark in tests/benchmarks')
+    config.stash[_RESULTS] = []
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config,
+    items: list[pytest.Item],
+) -> None:
+    """Mark the benchmarks, and skip them unless ``--run-benchmarks`` is given."""
+    skip = pytest.mark.skip(reason="Benchmarks only run with '--run-benchmarks'.")
+
+    for item in items:
+        if BENCHMARKS_PATH not in item.path.parents:
+            continue
+
+        item.add_marker(pytest.mark.benchmark)
+        if not config.getoption('run_benchmarks'):
+            item.add_marker(skip)
+
+
+def _time(function: Callable[[], Any], loops: int) -> tuple[float, Any]:
+    """Return the time ``loops`` calls of a function take, and the last result."""
+    result = None
+    start = time.perf_counter()
+    for _ in range(loops):
+        result = function()
+
+    return time.perf_counter() - start, result
+
+
+@pytest.fixture()
+def benchmark(request: pytest.FixtureRequest) -> Benchmark:
+    """Time a function and record the result.
+
+    The returned callable takes the function to time and, as keywords, the number of
+    ``items`` (e.g. constraints) each call processes, the number of ``rounds`` to time
+    and a ``PhaseTimer`` to break the time of a call down by phase. It returns the
+    result of the last call of the function.
+
+    Parameters
+    ----------
+    request : pytest.FixtureRequest
+        A ``pytest`` fixture that describes the requesting test
+
+    Returns
+    -------
+    Benchmark
+        The benchmark runner
+    """
+
+    def run(
+        function: Callable[[], Any],
+        *,
+        items: int = 1,
+        rounds: int = 5,
+        phases: PhaseTimer | None = None,
+    ) -> Any:
+        # Calls per round, so each round takes at least ``MIN_ROUND_TIME``
+        loops = 1
+        while _time(function, loops)[0] < MIN_ROUND_TIME:
+            loops *= 2
+
+        if phases is not None:
+            phases.reset()
+
+        times = []
+        for _ in range(rounds):
+            elapsed, result = _time(function, loops)
+            times.append(elapsed / loops)
+
+        request.config.stash[_RESULTS].append(
+            Result(
+                name=request.node.name,
+                group=request.node.module.__name__.rpartition('.')[2],
+                rounds=rounds,
+                loops=loops,
+                items=items,
+                min=min(times),
+                median=statistics.median(times),
+                mean=statistics.mean(times),
+                stdev=statistics.stdev(times) if rounds > 1 else 0.0,
+                phases=(
+                    {name: total / (rounds * loops) for name, total in phases}
+                    if phases is not None
+                    else None
+                ),
+            ),
+        )
+
+        return result
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter: TerminalReporter) -> None:
+    """Summarize the benchmark results."""
+    results = terminalreporter.config.stash.get(_RESULTS, [])
+    if not results:
+        return
+
+    terminalreporter.section('benchmarks')
+
+    width = max(len(result.name) for result in results)
+    terminalreporter.write_line(
+        f"{'name':<{width}}  {'median':>12}  {'min':>12}  {'per item':>12}",
+    )
+
+    for result in sorted(results, key=lambda result: (result.group, result.name)):
+        terminalreporter.write_line(
+            f'{result.name:<{width}}'
+            f'  {result.median * 1e6:>10.2f}us'
+            f'  {result.min * 1e6:>10.2f}us'
+            f'  {result.median / result.items * 1e9:>10.0f}ns',
+        )
+
+        if result.phases:
+            terminalreporter.write_line(
+                '  '
+                + ', '.join(
+                    f'{phase}: {elapsed * 1e3:.2f}ms'
+                    for phase, elapsed in result.phases.items()
+                ),
+            )
+
+
+def _git_revision() -> dict[str, Any] | None:
+    """Return the commit checked out and whether the tree has changes, if in git."""
+    try:
+        commit, status = (
+            subprocess.run(  # noqa: S603
+                ['git', *args],  # noqa: S607
+                cwd=BENCHMARKS_PATH,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+            for args in (['rev-parse', 'HEAD'], ['status', '--porcelain'])
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return {'commit': commit, 'dirty': bool(status)}
+
+
+def _cpu_model() -> str:
+    """Return the model of the CPU, if known."""
+    try:
+        cpu_info = _CPU_INFO.read_text(encoding='utf-8')
+    except OSError:
+        return platform.processor()
+
+    for line in cpu_info.splitlines():
+        key, _, value = line.partition(':')
+        if key.strip() == 'model name':
+            return value.strip()
+
+    return platform.processor()
+
+
+def _machine() -> dict[str, Any]:
+    """Return the versions the benchmarks ran with and a fingerprint of the machine."""
+    from importlib.metadata import version
+
+    hardware = {
+        'system': platform.system(),
+        'architecture': platform.machine(),
+        'cpu': _cpu_model(),
+        'cpus': os.cpu_count(),
+    }
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'poetry': version('poetry'),
+        'platform': platform.platform(),
+        **hardware,
+        'fingerprint': hashlib.sha256(
+            json.dumps(hardware, sort_keys=True).encode(),
+        ).hexdigest()[:16],
+    }
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    """Write the benchmark results to the ``--benchmark-json`` file, if given.
+
+    With ``--benchmark-save``, also save them to the ``--benchmark-storage`` directory,
+    named after the time of the run and the commit.
+    """
+    config = session.config
+    path = config.getoption('benchmark_json')
+    save = config.getoption('benchmark_save')
+    results = config.stash.get(_RESULTS, [])
+
+    if (path is None and not save) or not results:
+        return
+
+    created = datetime.now(timezone.utc)
+    revision = _git_revision()
+    text = (
+        json.dumps(
+            {
+                'version': FORMAT_VERSION,
+                'created': created.isoformat(),
+                'revision': revision,
+                'machine': _machine(),
+                'benchmarks': [result.as_dict() for result in results],
+            },
+            indent=2,
+        )
+        + '\n'
+    )
+
+    if path is not None:
+        Path(path).write_text(text)
+
+    if save:
+        storage = Path(config.getoption('benchmark_storage'))
+        if not storage.is_absolute():
+            storage = config.rootpath / storage
+
+        commit = revision['commit'][:12] if revision is not None else 'unknown'
+        storage.mkdir(parents=True, exist_ok=True)
+        (storage / f"{created.strftime('%Y%m%dT%H%M%SZ')}-{commit}.json").write_text(
+            text,
+        )
@@ -0,0 +1,88 @@
+"""Synthetic corpora of version constraints for the benchmarks.
+
+Every corpus is generated from a fixed seed, so runs time the same constraints.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Any, Callable
+
+SEED = 20231019
+
+OPERATORS = ['^', '~', '>=', '>', '<=', '<', '==', '!=']
+
+
+def _version(rng: random.Random) -> str:
+    return '.'.join(str(rng.randint(0, 30)) for _ in range(rng.randint(1, 3)))
+
+
+def simple_carets(count: int) -> list[str]:
+    """Return caret constraints, e.g. ``'^1.2.3'``."""
+    rng = random.Random(SEED)  # noqa: S311  # Not for cryptography
+    return [f'^{_version(rng)}' for _ in range(count)]
+
+
+def chains(count: int, length: int = 20) -> list[str]:
+    """Return long ``||`` chains of ``,`` and space separated constraints.
+
+    E.g. ``'^1.2,<2 || >=3 <4 || ~5.1'``.
+    """
+    rng = random.Random(SEED)  # noqa: S311  # Not for cryptography
+    return [
+        ' || '.join(
+            rng.choice([',', ', ', ' ']).join(
+                f'{rng.choice(OPERATORS)}{_version(rng)}'
+                for _ in range(rng.randint(1, 3))
+            )
+            for _ in range(length)
+        )
+        for _ in range(count)
+    ]
+
+
+def multiple_constraints(count: int, length: int = 4) -> list[list[dict[str, str]]]:
+    """Return multiple constraints dependencies, one constraint per ``python`` version.
+
+    E.g. ``[{'version': '^4', 'python': '>=3.10'}, {'version': '^3.5', ...}]``.
+    """
+    rng = random.Random(SEED)  # noqa: S311  # Not for cryptography
+    return [
+        [
+            {
+                'version': f'{rng.choice(OPERATORS)}{_version(rng)}',
+                'python': f'>=3.{minor}',
+            }
+            for minor in range(length)
+        ]
+        for _ in range(count)
+    ]
+
+
+def pathological_whitespace(count: int) -> list[str]:
+    """Return constraints padded and separated by runs of whitespace.
+
+    E.g. ``'   ^1.0 ,    <2.0   ||     ~3.1   '``.
+    """
+    rng = random.Random(SEED)  # noqa: S311  # Not for cryptography
+
+    def _space() -> str:
+        return ' ' * rng.randint(0, 8)
+
+    def _constraints() -> str:
+        return f'{_space()}||{_space()}'.join(
+            f'{_space()},{_space()}'.join(
+                f'{rng.choice(OPERATORS)}{_version(rng)}'
+                for _ in range(rng.randint(1, 3))
+            )
+            for _ in range(rng.randint(1, 4))
+        )
+
+    return [f'{_space()}{_constraints()}{_space()} ' for _ in range(count)]
+
+
+CORPORA: dict[str, Callable[[int], Any]] = {
+    'simple-carets': simple_carets,
+    'chains': chains,
+    'pathological-whitespace': pathological_whitespace,
+}
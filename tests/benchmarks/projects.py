@@ -0,0 +1,189 @@
+"""Synthetic ``poetry`` projects for the end-to-end benchmarks.
+
+``generate_pyproject`` writes projects of any number of dependencies and groups, and
+``repository`` holds a package for each of their dependencies, so the solver runs
+without any network access. ``PhaseTimer`` breaks the time of a command down into the
+phases of a run.
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+from poetry.core.packages.package import Package
+from poetry.repositories import Repository, RepositoryPool
+
+if TYPE_CHECKING:
+    import pytest
+
+# Packages that are not dependencies of a generated project, e.g. to ``poetry add``
+EXTRA_PACKAGES = 10
+
+
+def package_name(index: int) -> str:
+    """Return the name of a dependency of a generated project."""
+    return f'package-{index}'
+
+
+def extra_package_name(index: int) -> str:
+    """Return the name of a package that no generated project depends on."""
+    return f'extra-{index}'
+
+
+def package_version(index: int) -> str:
+    """Return the version of a dependency, and of its package in the repository."""
+    return f'{index % 7 + 1}.{index % 11}.{index % 5}'
+
+
+def _specification(index: int) -> str:
+    version = package_version(index)
+    major = version.partition('.')[0]
+
+    return [
+        f'"^{version}"',
+        f'"~{version}"',
+        f'">={version},<{int(major) + 1}"',
+        f'{{ version = "^{version}" }}',
+        f'"^{version}"  # Comment',
+    ][index % 5]
+
+
+def generate_pyproject(dependencies: int, groups: int = 1) -> str:
+    """Return a ``pyproject.toml`` with dependencies spread evenly across groups.
+
+    Most constraints are carets, the others are tildes, ranges, inline tables and
+    carets followed by a comment.
+
+    Parameters
+    ----------
+    dependencies : int
+        The number of dependencies, in all groups
+    groups : int, optional
+        The number of groups, including the main group, by default 1
+
+    Returns
+    -------
+    str
+        The ``pyproject.toml``
+    """
+    tables: list[list[str]] = [[] for _ in range(groups)]
+    for index in range(dependencies):
+        tables[index % groups].append(f'{package_name(index)} = {_specification(index)}')
+
+    lines = [
+        '[tool.poetry]',
+        'name = "benchmark"',
+        'version = "0.1.0"',
+        'description = ""',
+        'authors = ["<author@test.com>"]',
+        '',
+        '[tool.poetry.dependencies]',
+        # Not rewritten, so the solver is not given ``python`` as a package to find
+        'python = ">=3.7"',
+        *tables[0],
+    ]
+
+    for group, table in enumerate(tables[1:], start=1):
+        lines.extend(['', f'[tool.poetry.group.group-{group}.dependencies]', *table])
+
+    return '\n'.join(lines) + '\n'
+
+
+def repository(dependencies: int) -> RepositoryPool:
+    """Return a pool holding the packages of a generated project, and a few extras.
+
+    Parameters
+    ----------
+    dependencies : int
+        The number of dependencies of the generated project
+
+    Returns
+    -------
+    RepositoryPool
+        The pool of a single in-memory repository
+    """
+    packages = [
+        Package(package_name(index), package_version(index))
+        for index in range(dependencies)
+    ] + [Package(extra_package_name(index), '1.2.3') for index in range(EXTRA_PACKAGES)]
+
+    return RepositoryPool([Repository('benchmark', packages)])
+
+
+class PhaseTimer:
+    """Accumulate the time spent in functions, each the measure of a phase of a run.
+
+    Phases may nest, e.g. the post-hook phase includes the solve it runs.
+    """
+
+    def __init__(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        phases: dict[str, list[str]],
+    ) -> None:
+        """Wrap the functions of each phase.
+
+        Parameters
+        ----------
+        monkeypatch : pytest.MonkeyPatch
+            A ``pytest`` fixture that restores the functions after the test
+        phases : dict[str, list[str]]
+            The dotted paths of the functions (or methods) of each phase
+        """
+        self.elapsed: dict[str, float] = defaultdict(float)
+        self._depth: dict[str, int] = defaultdict(int)
+
+        for phase, targets in phases.items():
+            self.elapsed[phase] = 0.0
+            for target in targets:
+                owner, name = _resolve(target)
+                monkeypatch.setattr(owner, name, self._wrap(phase, getattr(owner, name)))
+
+    def _wrap(self, phase: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # Only the outermost call of a phase counts, e.g. for recursive calls
+            self._depth[phase] += 1
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._depth[phase] -= 1
+                if not self._depth[phase]:
+                    self.elapsed[phase] += time.perf_counter() - start
+
+        return wrapper
+
+    def reset(self) -> None:
+        """Discard the time accumulated so far, e.g. while calibrating."""
+        for phase in self.elapsed:
+            self.elapsed[phase] = 0.0
+
+    def __iter__(self) -> Iterator[tuple[str, float]]:
+        return iter(self.elapsed.items())
+
+
+def _resolve(target: str) -> tuple[Any, str]:
+    """Return the object holding a function and the name of the function.
+
+    Parameters
+    ----------
+    target : str
+        The dotted path of a function of a module, or of a method of a class
+
+    Returns
+    -------
+    tuple[Any, str]
+        The module or class, and the name of the function
+    """
+    path, _, name = target.rpartition('.')
+
+    try:
+        return importlib.import_module(path), name
+    except ModuleNotFoundError:
+        module, _, owner = path.rpartition('.')
+        return getattr(importlib.import_module(module), owner), name
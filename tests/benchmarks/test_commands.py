@@ -0,0 +1,214 @@
+"""Benchmark ``poetry constrain`` and its hooks end to end on synthetic projects.
+
+Each call loads the project again, as each ``poetry`` invocation does, and the time of
+a call is broken down into the phases of ``PHASES``.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable
+
+import pytest
+
+from tests.benchmarks.projects import PhaseTimer, generate_pyproject, repository
+from tests.helpers import print_output
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from cleo.testers.application_tester import ApplicationTester
+
+    from ..conftest import PoetryTesterFactory, ProjectFactory
+    from .conftest import Benchmark
+
+# The functions timed as each phase of a run
+PHASES = {
+    'load': ['poetry.factory.Factory.create_poetry'],
+    'read': [
+        'poetry_plugin_constrain.config.read_pyproject',
+        'poetry_plugin_constrain.commands.read_pyproject',
+    ],
+    'solve': ['poetry.installation.installer.Installer.run'],
+    'write': ['poetry.toml.file.TOMLFile.write'],
+    'pre-hook': ['poetry_plugin_constrain.plugins.ConstrainPlugin._pre_add_hook'],
+    'post-hook': ['poetry_plugin_constrain.plugins.ConstrainPlugin._constrain_hook'],
+}
+
+ROUNDS = 3
+
+# Projects whose new constraints are solved, smaller as the solver dominates the time
+SOLVED = [(10, 1), (100, 10), (300, 50)]
+
+
+@pytest.fixture()
+def run_factory(
+    project_factory: ProjectFactory,
+    poetry_tester_factory: PoetryTesterFactory,
+    tmp_path: Path,
+) -> Callable[[int, int, str], Callable[[], ApplicationTester]]:
+    """Return a factory of runs of a command on a generated project.
+
+    Parameters
+    ----------
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+
+    Returns
+    -------
+    Callable[[int, int, str], Callable[[], ApplicationTester]]
+        Given the number of dependencies and groups of the project and the command line
+        arguments, a function that creates the project and runs the command
+    """
+
+    def factory(
+        dependencies: int,
+        groups: int,
+        argv: str,
+    ) -> Callable[[], ApplicationTester]:
+        path = tmp_path / f'pyproject-{dependencies}-{groups}.toml'
+        path.write_text(generate_pyproject(dependencies, groups))
+        pool = repository(dependencies)
+
+        def run() -> ApplicationTester:
+            # An absolute path replaces the fixture directory
+            project = project_factory(str(path))
+            project.set_pool(pool)
+
+            poetry_tester = poetry_tester_factory(project)
+            status_code = poetry_tester.execute(argv)
+
+            if status_code != 0:
+                print_output(poetry_tester)
+
+            assert status_code == 0
+
+            return poetry_tester
+
+        return run
+
+    return factory
+
+
+@pytest.mark.parametrize(
+    ('dependencies', 'groups'),
+    [
+        (10, 1),
+        (100, 1),
+        (100, 10),
+        (1000, 1),
+        (1000, 10),
+        (1000, 50),
+        (10000, 1),
+        (10000, 50),
+    ],
+)
+def test_constrain_dry_run(
+    benchmark: Benchmark,
+    run_factory: Callable[[int, int, str], Callable[[], ApplicationTester]],
+    monkeypatch: pytest.MonkeyPatch,
+    dependencies: int,
+    groups: int,
+) -> None:
+    """Benchmark ``poetry constrain --dry-run``, which only reads the project.
+
+    Parameters
+    ----------
+    benchmark : Benchmark
+        A ``poetry_plugin_constrain`` fixture that times a function
+    run_factory : Callable[[int, int, str], Callable[[], ApplicationTester]]
+        A ``poetry_plugin_constrain`` fixture that creates runs of a command
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to wrap the functions of each phase
+    dependencies : int
+        The number of dependencies of the project
+    groups : int
+        The number of groups of the project
+    """
+    poetry_tester = benchmark(
+        run_factory(dependencies, groups, 'constrain --dry-run'),
+        items=dependencies,
+        rounds=ROUNDS,
+        phases=PhaseTimer(monkeypatch, PHASES),
+    )
+
+    assert 'Total: Proposing updates to' in poetry_tester.io.fetch_output()
+
+
+@pytest.mark.parametrize(('dependencies', 'groups'), SOLVED)
+def test_constrain_check(
+    benchmark: Benchmark,
+    run_factory: Callable[[int, int, str], Callable[[], ApplicationTester]],
+    monkeypatch: pytest.MonkeyPatch,
+    dependencies: int,
+    groups: int,
+) -> None:
+    """Benchmark ``poetry constrain --check``, which solves the new constraints.
+
+    Parameters
+    ----------
+    benchmark : Benchmark
+        A ``poetry_plugin_constrain`` fixture that times a function
+    run_factory : Callable[[int, int, str], Callable[[], ApplicationTester]]
+        A ``poetry_plugin_constrain`` fixture that creates runs of a command
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to wrap the functions of each phase
+    dependencies : int
+        The number of dependencies of the project
+    groups : int
+        The number of groups of the project
+    """
+    poetry_tester = benchmark(
+        run_factory(dependencies, groups, 'constrain --check'),
+        items=dependencies,
+        rounds=ROUNDS,
+        phases=PhaseTimer(monkeypatch, PHASES),
+    )
+
+    assert 'Dependency check successful.' in poetry_tester.io.fetch_output()
+
+
+@pytest.mark.parametrize('argv', ['add extra-0 --lock', 'update package-0 --lock'])
+@pytest.mark.parametrize(('dependencies', 'groups'), SOLVED)
+def test_hooks(
+    benchmark: Benchmark,
+    run_factory: Callable[[int, int, str], Callable[[], ApplicationTester]],
+    monkeypatch: pytest.MonkeyPatch,
+    argv: str,
+    dependencies: int,
+    groups: int,
+) -> None:
+    """Benchmark ``poetry add`` and ``poetry update`` with the plugin hooks.
+
+    Parameters
+    ----------
+    benchmark : Benchmark
+        A ``poetry_plugin_constrain`` fixture that times a function
+    run_factory : Callable[[int, int, str], Callable[[], ApplicationTester]]
+        A ``poetry_plugin_constrain`` fixture that creates runs of a command
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to wrap the functions of each phase
+    argv : str
+        Commandline arguments
+    dependencies : int
+        The number of dependencies of the project
+    groups : int
+        The number of groups of the project
+    """
+    poetry_tester = benchmark(
+        run_factory(dependencies, groups, argv),
+        items=dependencies,
+        rounds=ROUNDS,
+        phases=PhaseTimer(monkeypatch, PHASES),
+    )
+
+    pyproject = poetry_tester.application.poetry.pyproject.path.read_text()
+
+    # The hooks rewrote the caret constraint of the added or updated package
+    assert ('extra-0 = ">=1.2.3"' if 'add' in argv else 'package-0 = ">=1.0.0"') in (
+        pyproject
+    )
@@ -0,0 +1,205 @@
+"""Benchmark the constraint rewrite hot path."""
+
+from __future__ import annotations
+
+from functools import partial
+from typing import TYPE_CHECKING
+
+import pytest
+import tomlkit
+from poetry.core.factory import Factory
+
+from poetry_plugin_constrain._compat import tomllib
+from poetry_plugin_constrain.config import get_config_variable
+from poetry_plugin_constrain.utils import (
+    _replace_constraint,
+    deep_get,
+    mutate_constraint,
+    replace_constraint_from_dependency,
+)
+from tests.benchmarks.corpora import CORPORA, multiple_constraints, simple_carets
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from ..conftest import ProjectFactory
+    from .conftest import Benchmark
+
+# The number of constraints (or dependencies) of each corpus
+SIZE = 1000
+
+
+@pytest.mark.parametrize('corpus', CORPORA)
+def test_mutate_constraint(benchmark: Benchmark, corpus: str) -> None:
+    """Benchmark splitting constraints and joining them back with ``mutate_constraint``.
+
+    Parameters
+    ----------
+    benchmark : Benchmark
+        A ``poetry_plugin_constrain`` fixture that times a function
+    corpus : str
+        The name of the corpus of constraints
+    """
+    constraints = CORPORA[corpus](SIZE)
+    callback = partial(_replace_constraint, old='caret', new='ge')
+
+    results = benchmark(
+        lambda: [mutate_constraint(constraint, callback) for constraint in constraints],
+        items=len(constraints),
+    )
+
+    assert len(results) == SIZE
+
+
+def test_replace_single_constraint(benchmark: Benchmark) -> None:
+    """Benchmark ``_replace_constraint``, called for each part of the constraints.
+
+    Parameters
+    ----------
+    benchmark : Benchmark
+        A ``poetry_plugin_constrain`` fixture that times a function
+    """
+    constraints = simple_carets(SIZE)
+
+    results = benchmark(
+        lambda: [_replace_constraint(constraint) for constraint in constraints],
+        items=len(constraints),
+    )
+
+    assert all(result.startswith('>=') for result in results)
+
+
+@pytest.mark.parametrize('corpus', ['simple-carets', 'multiple-constraints'])
+def test_replace_constraint_from_dependency(benchmark: Benchmark, corpus: str) -> None:
+    """Benchmark ``replace_constraint_from_dependency``, which parses the new constraint.
+
+    Parameters
+    ----------
+    benchmark : Benchmark
+        A ``poetry_plugin_constrain`` fixture that times a function
+    corpus : str
+        The name of the corpus of dependencies
+    """
+    if corpus == 'simple-carets':
+        specifications = [[constraint] for constraint in simple_carets(SIZE)]
+    else:
+        specifications = multiple_constraints(SIZE // 4)
+
+    dependencies = [
+        Factory.create_dependency(f'package-{index}', specification)
+        for index, constraints in enumerate(specifications)
+        for specification in constraints
+    ]
+
+    results = benchmark(
+        lambda: [
+            replace_constraint_from_dependency(dependency) for dependency in dependencies
+        ],
+        items=len(dependencies),
+    )
+
+    assert len(results) == SIZE
+
+
+@pytest.mark.parametrize('found', [True, False], ids=['found', 'missing'])
+def test_deep_get(benchmark: Benchmark, found: bool) -> None:  # noqa: FBT001
+    """Benchmark ``deep_get`` on the path of each group's dependencies.
+
+    Parameters
+    ----------
+    benchmark : Benchmark
+        A ``poetry_plugin_constrain`` fixture that times a function
+    found : bool
+        Whether the paths exist
+    """
+    document = {
+        'tool': {
+            'poetry': {
+                'group': {
+                    f'group-{index}': {'dependencies': {'foo': '^1.0'}}
+                    for index in range(50)
+                },
+            },
+        },
+    }
+    table = 'dependencies' if found else 'dev-dependencies'
+    paths = [
+        ['tool', 'poetry', 'group', f'group-{index}', table] for index in range(SIZE)
+    ]
+
+    results = benchmark(
+        lambda: [deep_get(document, path) for path in paths],
+        items=len(paths),
+    )
+
+    assert (results[0] is not None) is found
+
+
+@pytest.mark.parametrize('source', ['pyproject', 'environment', 'default'])
+def test_get_config_variable(
+    benchmark: Benchmark,
+    project_factory: ProjectFactory,
+    monkeypatch: pytest.MonkeyPatch,
+    source: str,
+) -> None:
+    """Benchmark ``get_config_variable`` for a variable found in each of its sources.
+
+    Parameters
+    ----------
+    benchmark : Benchmark
+        A ``poetry_plugin_constrain`` fixture that times a function
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    source : str
+        Where the variable is set
+    """
+    project = project_factory('test_config_enable_post_hooks_false.toml')
+    name = 'enable-post-hooks' if source == 'pyproject' else 'old'
+
+    if source == 'environment':
+        monkeypatch.setenv('POETRY_PLUGIN_CONSTRAIN_OLD', 'tilde')
+
+    result = benchmark(lambda: get_config_variable(project, name, default='caret'))
+
+    assert (
+        result == {'pyproject': False, 'environment': 'tilde', 'default': 'caret'}[source]
+    )
+
+
+@pytest.mark.parametrize('parser', ['tomllib', 'tomlkit'])
+def test_parse_pyproject(benchmark: Benchmark, fixture_dir: Path, parser: str) -> None:
+    """Benchmark reading the dependencies of a large ``pyproject.toml``.
+
+    ``tomllib`` reads ``pyproject.toml`` unless it is going to be written, with the
+    style-preserving ``tomlkit`` document.
+
+    Parameters
+    ----------
+    benchmark : Benchmark
+        A ``poetry_plugin_constrain`` fixture that times a function
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    parser : str
+        The ``TOML`` library
+    """
+    constraints = simple_carets(SIZE)
+    text = (
+        (fixture_dir / 'test_constrain_command.toml')
+        .read_text()
+        .replace(
+            '[tool.poetry.group.test]\n',
+            ''.join(
+                f'package-{index} = "{constraint}"  # Comment\n'
+                for index, constraint in enumerate(constraints)
+            )
+            + '\n[tool.poetry.group.test]\n',
+        )
+    )
+    loads = tomllib.loads if parser == 'tomllib' else tomlkit.parse
+
+    dependencies = benchmark(lambda: loads(text)['tool']['poetry']['dependencies'])
+
+    assert len(dependencies) > SIZE
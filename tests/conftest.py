@@ -44,6 +44,55 @@ else:
 # Exclude certain dirs/files from being collected by the ``pytest`` runner.
 collect_ignore: list[str] = ['__init__.py']
 
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the options of the benchmarks in ``tests/benchmarks`` and the import budget.
+
+    Benchmarks take longer than the unit tests, so they only run when asked to.
+
+    Parameters
+    ----------
+    parser : pytest.Parser
+        The ``pytest`` command line parser
+    """
+    group = parser.getgroup('benchmarks')
+    group.addoption(
+        '--run-benchmarks',
+        action='store_true',
+        default=False,
+        help='Run the benchmarks in tests/benchmarks, which are skipped by default.',
+    )
+    group.addoption(
+        '--benchmark-json',
+        metavar='PATH',
+        default=None,
+        help='Write the benchmark results to a JSON file.',
+    )
+    group.addoption(
+        '--benchmark-save',
+        action='store_true',
+        default=False,
+        help=(
+            'Also save the benchmark results to the --benchmark-storage directory, to'
+            ' compare later runs to with ci/compare_benchmarks.py.'
+        ),
+    )
+    group.addoption(
+        '--benchmark-storage',
+        metavar='PATH',
+        default='.benchmarks',
+        help='The directory of saved benchmark results (default: .benchmarks).',
+    )
+    parser.addini(
+        'import_time_budget_ms',
+        help=(
+            'The time importing the plugin may add to every poetry command, in'
+            ' milliseconds.'
+        ),
+        default='100',
+    )
+
+
 # Several of the helpers and fixtures below were adopted from poetry 1.6. Specifically,
 # these are located in:
 #   - tests/conftest.py
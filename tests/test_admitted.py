@@ -0,0 +1,130 @@
+"""Test ``admitted.py``."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+from poetry.core.constraints.version import Version, parse_constraint
+from poetry.utils.cache import FileCache
+
+from poetry_plugin_constrain.admitted import load_cached_versions, newly_admitted
+from tests.helpers import print_output
+
+DEBUG = False
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+
+def _cache_releases(directory: Path, name: str, versions: list[str]) -> None:
+    cache: FileCache[dict[str, str]] = FileCache(path=directory)
+    for version in versions:
+        cache.put(f'{name}:{version}', {'name': name, 'version': version})
+
+
+@pytest.mark.parametrize(
+    ('old', 'new', 'expected_versions'),
+    [
+        ('^1.2', '>=1.2', ['2.0', '2.1', '3.0']),
+        ('~1.2', '>=1.2', ['1.3', '2.0', '2.1', '3.0']),
+        ('^1.2', '^1.2', []),
+        ('^1.2', '==1.2', []),
+        ('^1.2 || ^3.0', '>=1.2', ['2.0', '2.1']),
+        ('<2', '<=2.0', ['2.0']),
+    ],
+)
+def test_newly_admitted(
+    old: str,
+    new: str,
+    expected_versions: list[str],
+) -> None:
+    """Test ``newly_admitted`` bisects the versions allowed by each constraint.
+
+    Parameters
+    ----------
+    old : str
+        The constraint before the rewrite
+    new : str
+        The constraint after the rewrite
+    expected_versions : list[str]
+        The versions expected to be newly admitted
+    """
+    versions = [
+        Version.parse(v) for v in ['1.0', '1.2', '1.2.5', '1.3', '2.0', '2.1', '3.0']
+    ]
+
+    admitted = newly_admitted(versions, parse_constraint(old), parse_constraint(new))
+
+    assert admitted == [Version.parse(v) for v in expected_versions]
+
+
+def test_load_cached_versions(tmp_path: Path) -> None:
+    """Test ``load_cached_versions`` sorts the cached versions and reuses its index.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    repository = tmp_path / 'repositories' / 'PyPI'
+    index_path = tmp_path / 'index.json'
+
+    _cache_releases(repository, 'Foo', ['1.10.0', '1.2.0', '1.9.0'])
+    _cache_releases(repository / '_http', 'bar', ['1.0'])
+
+    assert load_cached_versions([repository], index_path) == {
+        'foo': ['1.2.0', '1.9.0', '1.10.0'],
+    }
+
+    # The index is reused as long as the release cache is unchanged
+    index = json.loads(index_path.read_text())
+    index['repositories'][str(repository)]['packages']['foo'] = ['0.1']
+    index_path.write_text(json.dumps(index))
+
+    assert load_cached_versions([repository], index_path) == {'foo': ['0.1']}
+
+    # ... and rebuilt when it changes
+    _cache_releases(repository, 'foo', ['2.0.0'])
+
+    assert load_cached_versions([repository], index_path) == {
+        'foo': ['1.2.0', '1.9.0', '1.10.0', '2.0.0'],
+    }
+
+
+def test_constrain_reports_admitted_versions(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+) -> None:
+    """Test ``poetry constrain --admitted`` reports versions from the local cache.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    """
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+
+    _cache_releases(
+        project.config.repository_cache_directory / 'PyPI',
+        'foo',
+        ['0.0.9', '0.1.0', '0.1.5', '0.2.0', '1.0.0', '1.1.0a1'],
+    )
+
+    status_code = poetry_tester.execute('constrain --dry-run --admitted')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    output = poetry_tester.io.fetch_output()
+
+    assert status_code == 0
+    assert 'foo: ^0.1.0 --> >=0.1.0: 2 of 5 cached versions (0.2.0, 1.0.0)' in output
+    assert 'coverage: ^6.4 --> >=6.4: no cached versions' in output
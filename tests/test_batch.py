@@ -0,0 +1,266 @@
+"""Test ``batch.py``."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_constrain.batch import (
+    discover_projects,
+    projects_from_files,
+    run_projects,
+)
+from poetry_plugin_constrain.commands import Error
+from tests.helpers import print_output
+
+DEBUG = False
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+CONFIGURED_TOML = """
+[tool.poetry-plugin-constrain]
+dry-run = "true"
+"""
+
+
+def _write_repository(root: Path, fixture_dir: Path) -> dict[str, Path]:
+    content = (fixture_dir / 'test_constrain_command.toml').read_text()
+    projects = {
+        'a': (root / 'packages' / 'a', content),
+        'b': (root / 'packages' / 'nested' / 'b', content + CONFIGURED_TOML),
+        'hidden': (root / '.venv' / 'hidden', content),
+        'not-poetry': (root / 'tools' / 'not-poetry', '[tool.black]\n'),
+    }
+
+    for path, text in projects.values():
+        path.mkdir(parents=True)
+        (path / 'pyproject.toml').write_text(text)
+
+    return {name: path for name, (path, _) in projects.items()}
+
+
+def test_discover_projects(tmp_path: Path, fixture_dir: Path) -> None:
+    """Test ``discover_projects`` skips hidden directories and non-poetry projects.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    """
+    projects = _write_repository(tmp_path, fixture_dir)
+
+    assert discover_projects(tmp_path) == [projects['a'], projects['b']]
+
+
+def test_projects_from_files(tmp_path: Path, fixture_dir: Path) -> None:
+    """Test ``projects_from_files`` deduplicates projects and skips non-poetry files.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    """
+    projects = _write_repository(tmp_path, fixture_dir)
+
+    files = [
+        projects['b'] / 'pyproject.toml',
+        projects['not-poetry'] / 'pyproject.toml',
+        projects['a'] / 'pyproject.toml',
+        projects['a'],
+    ]
+
+    assert projects_from_files(files) == [projects['a'], projects['b']]
+
+
+def test_run_projects_reports_failures(tmp_path: Path, fixture_dir: Path) -> None:
+    """Test a project that cannot be loaded fails without affecting the others.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    """
+    projects = _write_repository(tmp_path, fixture_dir)
+    (projects['b'] / 'pyproject.toml').write_text('[tool.poetry\n')
+
+    results = {
+        result.path: result
+        for result in run_projects([projects['a'], projects['b']], ['--dry-run'], jobs=1)
+    }
+
+    assert results[projects['a']].status == 0
+    assert 'Skipped modifying pyproject.toml' in results[projects['a']].output
+    assert results[projects['b']].status != 0
+    assert results[projects['b']].error
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_constrain_recursive(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+    fixture_dir: Path,
+    jobs: int,
+) -> None:
+    """Test ``poetry constrain --recursive`` constrains every project under a root.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    jobs : int
+        The number of worker processes
+    """
+    projects = _write_repository(tmp_path, fixture_dir)
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute(
+        f'constrain --recursive {tmp_path} --jobs {jobs} --without docs',
+    )
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    output = poetry_tester.io.fetch_output()
+
+    assert status_code == 0
+    assert f'Project: {projects["a"]}' in output
+    assert f'Project: {projects["b"]}' in output
+    assert 'Constrained 2 projects: 2 succeeded, 0 failed.' in output
+
+    # Options are forwarded, and each project's own configuration applies
+    a_toml = (projects['a'] / 'pyproject.toml').read_text()
+    b_toml = (projects['b'] / 'pyproject.toml').read_text()
+
+    assert 'foo = ">=0.1.0"' in a_toml
+    assert 'foo = "^0.1.0"' in b_toml
+    assert '{ version = "^4", python = ">=3.10" }' in a_toml
+    assert 'foo = "^0.1.0"' in (projects['hidden'] / 'pyproject.toml').read_text()
+
+
+def test_constrain_recursive_aggregates_exit_codes(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+    fixture_dir: Path,
+) -> None:
+    """Test ``poetry constrain --recursive`` exits with the highest project exit code.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    """
+    projects = _write_repository(tmp_path, fixture_dir)
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute(
+        f'constrain --recursive {tmp_path} --jobs 2 --dry-run --only missing',
+    )
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code != 0
+    assert 'Constrained 2 projects: 0 succeeded, 2 failed.' in (
+        poetry_tester.io.fetch_output()
+    )
+    assert str(projects['a']) in poetry_tester.io.fetch_error()
+
+    status_code = poetry_tester.execute(
+        f'constrain --recursive {tmp_path / "tools"} --dry-run',
+    )
+
+    assert status_code == Error.NO_PROJECTS_FOUND
+
+    status_code = poetry_tester.execute(f'constrain --recursive {tmp_path} --jobs 0')
+
+    assert status_code == Error.INVALID_JOBS
+
+
+def test_constrain_files(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+    fixture_dir: Path,
+) -> None:
+    """Test ``poetry constrain files`` constrains only the projects of the given files.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    """
+    projects = _write_repository(tmp_path, fixture_dir)
+    untouched = tmp_path / 'packages' / 'untouched'
+    untouched.mkdir()
+    (untouched / 'pyproject.toml').write_text(
+        (projects['a'] / 'pyproject.toml').read_text(),
+    )
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute(
+        f"constrain files --without docs {projects['a'] / 'pyproject.toml'}"
+        f" {projects['not-poetry'] / 'pyproject.toml'}",
+    )
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == 0
+    assert 'Constrained 1 projects: 1 succeeded, 0 failed.' in (
+        poetry_tester.io.fetch_output()
+    )
+    assert 'foo = ">=0.1.0"' in (projects['a'] / 'pyproject.toml').read_text()
+    assert (
+        '{ version = "^4", python = ">=3.10" }'
+        in (projects['a'] / 'pyproject.toml').read_text()
+    )
+    assert 'foo = "^0.1.0"' in (untouched / 'pyproject.toml').read_text()
+
+    status_code = poetry_tester.execute('constrain files')
+
+    assert status_code == 0
@@ -0,0 +1,187 @@
+"""Test ``changes.py``."""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_constrain.changes import GitError, changed_entries
+from poetry_plugin_constrain.commands import Error
+from tests.helpers import print_output
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+DEBUG = False
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='Requires git')
+
+
+def _git(directory: Path, *args: str) -> None:
+    subprocess.run(  # noqa: S603
+        [  # noqa: S607
+            'git',
+            '-c',
+            'user.name=test',
+            '-c',
+            'user.email=test@test.com',
+            *args,
+        ],
+        cwd=directory,
+        check=True,
+        capture_output=True,
+    )
+
+
+def _commit(path: Path, text: str) -> None:
+    path.write_text(text)
+    _git(path.parent, 'add', path.name)
+    _git(path.parent, 'commit', '-q', '-m', 'Update')
+
+
+@pytest.fixture()
+def repository(tmp_path: Path) -> Path:
+    """Return the ``pyproject.toml`` of a new ``git`` repository.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+
+    Returns
+    -------
+    Path
+        The committed ``pyproject.toml``
+    """
+    _git(tmp_path, 'init', '-q')
+
+    path = tmp_path / 'pyproject.toml'
+    _commit(
+        path,
+        '[tool.poetry]\nversion = "0.1.0"\n\n'
+        '[tool.poetry.dependencies]\nfoo = "^1.0"\nbar = "^2.0"\n',
+    )
+
+    return path
+
+
+def test_changed_entries_since(repository: Path) -> None:
+    """Test only dependency changes since a revision are reported.
+
+    Parameters
+    ----------
+    repository : Path
+        The committed ``pyproject.toml``
+    """
+    text = repository.read_text()
+
+    # A version bump changes no dependency
+    repository.write_text(text.replace('0.1.0', '0.2.0'))
+    assert not changed_entries(repository, since='HEAD')
+
+    repository.write_text(text.replace('bar = "^2.0"', 'bar = "^2.1"\nbaz = "^3"'))
+    assert changed_entries(repository, since='HEAD').changed == {
+        'main': {'bar': '^2.1', 'baz': '^3'},
+    }
+
+    _commit(repository, repository.read_text())
+    assert not changed_entries(repository, since='HEAD')
+    assert changed_entries(repository, since='HEAD~1').changed == {
+        'main': {'bar': '^2.1', 'baz': '^3'},
+    }
+
+    with pytest.raises(GitError, match='unknown revision'):
+        changed_entries(repository, since='missing')
+
+
+def test_changed_entries_staged(repository: Path) -> None:
+    """Test only staged dependency changes are reported.
+
+    Parameters
+    ----------
+    repository : Path
+        The committed ``pyproject.toml``
+    """
+    text = repository.read_text()
+
+    repository.write_text(text.replace('foo = "^1.0"', 'foo = "^1.1"'))
+    assert not changed_entries(repository, staged=True)
+
+    _git(repository.parent, 'add', repository.name)
+    repository.write_text(text)
+
+    assert changed_entries(repository, staged=True).changed == {'main': {'foo': '^1.1'}}
+
+
+def test_changed_entries_outside_repository(tmp_path: Path) -> None:
+    """Test a ``pyproject.toml`` outside a ``git`` repository is an error.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    path = tmp_path / 'pyproject.toml'
+    path.write_text('')
+
+    with pytest.raises(GitError):
+        changed_entries(path, since='HEAD')
+
+
+def test_constrain_since(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+) -> None:
+    """Test ``poetry constrain --since`` only constrains changed dependency entries.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    """
+    project = project_factory('test_constrain_command.toml')
+    path = project.pyproject.path
+    original = path.read_text()
+
+    _git(path.parent, 'init', '-q')
+    _commit(path, original.replace('foo = "^0.1.0"', 'foo = "^0.0.9"'))
+    path.write_text(original)
+
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute('constrain --since HEAD --without docs')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    text = path.read_text()
+
+    assert status_code == 0
+    assert 'foo = ">=0.1.0"' in text
+    # Unchanged entries are left alone
+    assert 'bar = "~1.2.3"' in text
+    assert 'coverage = { extras = ["toml"], version = "^6.4" }' in text
+
+    _commit(path, text)
+
+    status_code = poetry_tester.execute('constrain --since HEAD')
+
+    assert status_code == 0
+    assert 'No dependency entries changed. Skipping.' in poetry_tester.io.fetch_output()
+
+    status_code = poetry_tester.execute('constrain --since missing')
+
+    assert status_code == Error.GIT_DIFF_FAILED
+    assert 'unknown revision' in poetry_tester.io.fetch_error()
+
+    status_code = poetry_tester.execute('constrain --since HEAD --staged')
+
+    assert status_code == Error.INCOMPATIBLE_OPTIONS
@@ -0,0 +1,189 @@
+"""Test ``client.py``."""
+
+from __future__ import annotations
+
+import socket
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_constrain.client import (
+    SOCKET_ENV_VAR,
+    TIMEOUT_ENV_VAR,
+    DaemonTimeoutError,
+    DaemonUnavailableError,
+    is_read_only,
+    is_supported,
+    main,
+    request,
+    runs_in_process,
+    socket_path,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+    from .conftest import ProjectFactory
+
+
+def test_socket_path(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test the socket can be chosen with an environment variable.
+
+    Parameters
+    ----------
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    monkeypatch.setenv(SOCKET_ENV_VAR, str(tmp_path / 'custom.sock'))
+    assert socket_path() == tmp_path / 'custom.sock'
+
+    monkeypatch.delenv(SOCKET_ENV_VAR)
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+    assert socket_path() == tmp_path / 'poetry-plugin-constrain.sock'
+
+
+def test_main_runs_in_process_without_daemon(
+    project_factory: ProjectFactory,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test the client runs ``poetry constrain`` itself when no daemon is running.
+
+    Parameters
+    ----------
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    project = project_factory('test_constrain_command.toml')
+    path = tmp_path / 'missing.sock'
+
+    monkeypatch.setenv(SOCKET_ENV_VAR, str(path))
+    monkeypatch.chdir(project.pyproject.path.parent)
+    monkeypatch.setattr(sys.stdout, 'isatty', lambda: False)
+
+    with pytest.raises(DaemonUnavailableError):
+        request({'ping': True}, path)
+
+    assert main(['--without', 'docs']) == 0
+    assert 'foo = ">=0.1.0"' in project.pyproject.path.read_text()
+
+
+@pytest.mark.parametrize(
+    ('args', 'expected'),
+    [
+        (['--watch'], True),
+        (['filter'], True),
+        (['-v', 'filter', '--old', 'tilde'], True),
+        (['daemon', '--stop'], True),
+        (['--dry-run'], False),
+        (['verify', 'filter'], False),
+        ([], False),
+    ],
+)
+def test_runs_in_process(args: list[str], *, expected: bool) -> None:
+    """Test requests that would block the daemon or read its input run in the client.
+
+    Parameters
+    ----------
+    args : list[str]
+        The arguments passed to ``poetry constrain``
+    expected : bool
+        Whether the request must run in the client
+    """
+    assert runs_in_process(args) is expected
+
+
+def test_main_runs_watch_and_filter_in_process(mocker: MockerFixture) -> None:
+    """Test ``--watch`` and ``filter`` are never sent to the daemon.
+
+    Parameters
+    ----------
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    """
+    send = mocker.patch('poetry_plugin_constrain.client.request')
+    run = mocker.patch('poetry_plugin_constrain.client.run_in_process', return_value=0)
+
+    assert main(['--watch']) == 0
+    assert main(['filter']) == 0
+
+    send.assert_not_called()
+    assert [call.args for call in run.call_args_list] == [(['--watch'],), (['filter'],)]
+
+
+@pytest.mark.parametrize(
+    ('args', 'expected'),
+    [
+        (['--dry-run'], True),
+        (['--dry-run', '--lock'], True),
+        (['--check'], True),
+        (['--check', '--lock'], False),
+        (['--check', '--update'], False),
+        (['--lock'], False),
+        ([], False),
+    ],
+)
+def test_is_read_only(args: list[str], *, expected: bool) -> None:
+    """Test which requests cannot write the project.
+
+    Parameters
+    ----------
+    args : list[str]
+        The arguments passed to ``poetry constrain``
+    expected : bool
+        Whether the request cannot write the project
+    """
+    assert is_read_only(args) is expected
+
+
+@pytest.mark.skipif(not is_supported(), reason='Requires Unix sockets')
+def test_main_on_timeout(
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    tmp_path: Path,
+) -> None:
+    """Test only read-only requests run in the client when the daemon does not answer.
+
+    Parameters
+    ----------
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    capsys : pytest.CaptureFixture[str]
+        A ``pytest`` fixture that captures the output
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    path = tmp_path / 'stuck.sock'
+    run = mocker.patch('poetry_plugin_constrain.client.run_in_process', return_value=0)
+
+    monkeypatch.setenv(SOCKET_ENV_VAR, str(path))
+    monkeypatch.setenv(TIMEOUT_ENV_VAR, '0.1')
+
+    # Accepts connections, but never answers
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stuck:
+        stuck.bind(str(path))
+        stuck.listen()
+
+        with pytest.raises(DaemonTimeoutError):
+            request({'ping': True}, path)
+
+        assert main(['--dry-run']) == 0
+        assert 'Running in this process instead' in capsys.readouterr().err
+
+        # The daemon may still be writing the project
+        assert main(['--lock']) != 0
+        assert 'ERROR:' in capsys.readouterr().err
+
+    run.assert_called_once_with(['--dry-run'])
@@ -14,6 +14,7 @@ DEBUG = False
 if TYPE_CHECKING:
     from pathlib import Path
 
+    from poetry.utils.env import MockEnv
     from pytest_mock import MockerFixture
 
     from .conftest import PoetryTesterFactory, ProjectFactory
@@ -394,3 +395,199 @@ def test_empty_group(
 
     assert status_code == expected_status_code
     assert expected_message in poetry_tester.io.fetch_output()
+
+
+def test_constrain_packages(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    mocker: MockerFixture,
+) -> None:
+    """Test ``--package`` only rewrites and locks the given dependencies.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    """
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+
+    mock_update = mocker.patch(
+        'poetry_plugin_constrain.commands.run_installer_update',
+        return_value=0,
+    )
+
+    status_code = poetry_tester.execute('constrain --lock --package FOO,sphinx')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    output = poetry_tester.io.fetch_output()
+    pyproject = project.pyproject.path.read_text()
+
+    assert status_code == 0
+    assert "Checking constraints in group 'test'" not in output
+    assert {
+        group: {dependency.name for dependency in dependencies}
+        for group, dependencies in mock_update.call_args.kwargs[
+            'dependencies_by_group'
+        ].items()
+    } == {'docs': {'sphinx'}, 'main': {'foo'}}
+    assert 'foo = ">=0.1.0"' in pyproject
+    assert '{ version = ">=4", python = ">=3.10" }' in pyproject
+    assert 'python = "^3.8"' in pyproject
+    assert 'version = "^6.4"' in pyproject
+
+
+@pytest.mark.parametrize(
+    ('argv', 'expected_calls'),
+    [
+        ('constrain --dry-run', 0),
+        ('constrain --dry-run --admitted', 0),
+        ('constrain --check', 1),
+    ],
+)
+def test_environment_found_lazily(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    mocker: MockerFixture,
+    env: MockEnv,
+    argv: str,
+    expected_calls: int,
+) -> None:
+    """Test the environment is only found when the installer runs.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    env : MockEnv
+        A ``poetry_plugin_constrain`` fixture that returns a mock virtual environment
+    argv : str
+        Commandline arguments
+    expected_calls : int
+        The number of times the environment is expected to be found
+    """
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+
+    create_venv = mocker.patch(
+        'poetry.utils.env.EnvManager.create_venv', return_value=env
+    )
+    mocker.patch('poetry_plugin_constrain.commands.run_installer_update', return_value=0)
+
+    status_code = poetry_tester.execute(argv)
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == 0
+    assert create_venv.call_count == expected_calls
+
+
+@pytest.mark.parametrize(
+    ('argv', 'loaded'),
+    [
+        ('constrain --dry-run', False),
+        ('constrain --dry-run --check', False),
+        ('constrain', True),
+    ],
+)
+def test_style_preserving_document_loaded_to_write(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    mocker: MockerFixture,
+    argv: str,
+    loaded: bool,  # noqa: FBT001
+) -> None:
+    """Test the ``tomlkit`` document is only loaded when ``pyproject.toml`` is written.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    argv : str
+        Commandline arguments
+    loaded : bool
+        Whether the document is expected to be loaded
+    """
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+
+    mocker.patch('poetry_plugin_constrain.commands.run_installer_update', return_value=0)
+
+    status_code = poetry_tester.execute(argv)
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == 0
+    assert (project.pyproject._toml_document is not None) is loaded
+
+
+@pytest.mark.parametrize('argv', ['constrain --dry-run', 'constrain --dry-run --check'])
+def test_updates_printed_after_total(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    mocker: MockerFixture,
+    argv: str,
+) -> None:
+    """Test the updates are printed by group after the total, streamed or not.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    argv : str
+        Commandline arguments
+    """
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+
+    mocker.patch('poetry_plugin_constrain.commands.run_installer_update', return_value=0)
+
+    status_code = poetry_tester.execute(f'{argv} --without docs')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    output = poetry_tester.io.fetch_output()
+
+    assert status_code == 0
+    # The last header of each group is the one above its updates
+    positions = [
+        output.rindex(text)
+        for text in (
+            'Total: Proposing updates to 3 dependencies.',
+            "Group: 'main'",
+            'Updated python: ^3.8 --> >=3.8',
+            'Updated foo: ^0.1.0 --> >=0.1.0',
+            "Group: 'test'",
+            'Updated coverage: ^6.4 --> >=6.4',
+            'Skipped modifying pyproject.toml due to dry-run flag.',
+        )
+    ]
+
+    assert positions == sorted(positions)
+    assert output.count('Updated') == 3
+    assert output.index('Total:') < output.index('Updated')
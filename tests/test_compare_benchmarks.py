@@ -0,0 +1,206 @@
+"""Test ``ci/compare_benchmarks.py``."""
+
+from __future__ import annotations
+
+import json
+import math
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from ci.compare_benchmarks import (
+    InvalidResultsError,
+    NoSavedRunError,
+    compare,
+    find_baseline,
+    load_results,
+    main,
+    slowdown_p_value,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _results(
+    created: str,
+    fingerprint: str = 'machine',
+    **means: float,
+) -> dict[str, Any]:
+    """Return results with a benchmark of 1000 items, 5 rounds and 1% deviation each."""
+    return {
+        'version': 1,
+        'created': created,
+        'revision': {'commit': 'a' * 40, 'dirty': False},
+        'machine': {'fingerprint': fingerprint},
+        'benchmarks': [
+            {
+                'name': name,
+                'group': 'test_rewrite',
+                'rounds': 5,
+                'loops': 1,
+                'items': 1000,
+                'min': mean,
+                'median': mean,
+                'mean': mean,
+                'stdev': mean / 100,
+                'per_item': mean / 1000,
+            }
+            for name, mean in means.items()
+        ],
+    }
+
+
+def _save(path: Path, results: dict[str, Any]) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results))
+    return path
+
+
+@pytest.mark.parametrize('t', [0.5, 1.0, 3.0])
+def test_slowdown_p_value(t: float) -> None:
+    """Test the p-value follows the t distribution, here with 2 degrees of freedom.
+
+    Parameters
+    ----------
+    t : float
+        The t statistic of the slowdown
+    """
+    # Two runs of two rounds with the same variance have 2 degrees of freedom
+    stdev = math.sqrt(2) / math.sqrt(2 / 2 + 2 / 2)
+    p_value = slowdown_p_value((0.0, stdev, 2), (t, stdev, 2))
+
+    assert p_value == pytest.approx(0.5 - t / (2 * math.sqrt(2 + t * t)))
+    assert slowdown_p_value((t, stdev, 2), (0.0, stdev, 2)) == pytest.approx(
+        1 - p_value,
+    )
+
+
+def test_slowdown_p_value_without_variance() -> None:
+    """Test runs without variance are significantly slower if slower at all."""
+    assert slowdown_p_value((1.0, 0.0, 5), (1.1, 0.0, 5)) == 0.0
+    assert slowdown_p_value((1.0, 0.0, 5), (1.0, 0.0, 5)) == 1.0
+
+
+def test_compare() -> None:
+    """Test regressions must both exceed the threshold and be significant."""
+    baseline = _results(
+        '2024-01-01',
+        regressed=1.0,
+        improved=1.0,
+        small=1.0,
+        noisy=1.0,
+        missing=1.0,
+    )
+    current = _results('2024-01-02', regressed=1.2, improved=0.8, small=1.02, new=1.0)
+
+    # A slowdown within the noise of the rounds
+    current['benchmarks'].append(
+        {**baseline['benchmarks'][3], 'mean': 1.3, 'stdev': 1.0},
+    )
+
+    verdicts = {
+        comparison.name.partition('::')[2]: comparison.verdict
+        for comparison in compare(baseline, current, threshold=0.05, alpha=0.05)
+    }
+
+    assert verdicts == {
+        'regressed': 'regressed',
+        'improved': 'improved',
+        'small': 'unchanged',
+        'noisy': 'unchanged',
+        'missing': 'missing',
+        'new': 'new',
+    }
+
+
+def test_find_baseline(tmp_path: Path) -> None:
+    """Test the baseline is the latest earlier run saved on the same machine.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    storage = tmp_path / '.benchmarks'
+    expected = _save(storage / '1.json', _results('2024-01-01', a=1.0))
+    _save(storage / '2.json', _results('2024-01-02', 'other', a=1.0))
+    current = _save(storage / '3.json', _results('2024-01-03', a=1.0))
+    _save(storage / '4.json', _results('2024-01-04', a=1.0))
+
+    assert find_baseline(storage, current) == expected
+
+    with pytest.raises(NoSavedRunError):
+        find_baseline(storage, expected)
+
+
+def test_load_results_invalid(tmp_path: Path) -> None:
+    """Test files that are not benchmark results in a known format are rejected.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    path = tmp_path / 'results.json'
+
+    for text in ('{', '{"version": 2}', '[]'):
+        path.write_text(text)
+        with pytest.raises(InvalidResultsError):
+            load_results(path)
+
+
+@pytest.mark.parametrize(
+    ('current', 'threshold', 'exit_code'),
+    [(1.0, '5', 0), (1.2, '5', 1), (1.2, '25', 0)],
+)
+def test_main(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    current: float,
+    threshold: str,
+    exit_code: int,
+) -> None:
+    """Test the script exits with 1 on regressions beyond the threshold.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    capsys : pytest.CaptureFixture[str]
+        A ``pytest`` fixture that captures the output
+    current : float
+        The mean time of the current run
+    threshold : str
+        The threshold, in percent
+    exit_code : int
+        The expected exit code
+    """
+    storage = tmp_path / '.benchmarks'
+    _save(storage / '1.json', _results('2024-01-01', mutate=1.0))
+    _save(storage / '2.json', _results('2024-01-02', mutate=current))
+
+    assert main(['--storage', str(storage), '--threshold', threshold]) == exit_code
+
+    stdout = capsys.readouterr().out
+    assert f'{exit_code} of 1 benchmarks regressed' in stdout
+    assert 'test_rewrite::mutate' in stdout
+
+
+def test_main_without_baseline(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Test the script fails when there is nothing to compare to.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    capsys : pytest.CaptureFixture[str]
+        A ``pytest`` fixture that captures the output
+    """
+    current = _save(tmp_path / 'benchmarks.json', _results('2024-01-01', a=1.0))
+
+    assert main([str(current), '--storage', str(tmp_path / '.benchmarks')]) == 2
+    assert 'No benchmark run saved' in capsys.readouterr().err
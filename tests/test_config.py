@@ -11,10 +11,12 @@ from poetry_plugin_constrain.config import (
     TruthValueError,
     _strtobool,
     get_config_variable,
+    read_pyproject,
 )
 
 if TYPE_CHECKING:
     import sys
+    from pathlib import Path
 
     from poetry.poetry import Poetry
 
@@ -67,3 +69,58 @@ def test_get_config_variable_toml(
         ),
     ):
         get_config_variable(project, 'dummy-var')
+
+
+def test_read_pyproject(project_factory: ProjectFactory) -> None:
+    """Test ``read_pyproject`` parses a file again only once it changed.
+
+    Parameters
+    ----------
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    """
+    project = project_factory('test_config_enable_post_hooks_false.toml')
+    path: Path = project.pyproject.path
+
+    document = read_pyproject(path)
+
+    assert document['tool']['poetry-plugin-constrain']['enable-post-hooks'] is False
+    assert read_pyproject(path) is document
+    # ``poetry``'s style-preserving document is not loaded
+    assert project.pyproject._toml_document is None
+
+    path.write_text(path.read_text().replace('= false', '= true'))
+
+    assert read_pyproject(path)['tool']['poetry-plugin-constrain']['enable-post-hooks']
+    assert read_pyproject(path.with_name('missing.toml')) == {}
+
+
+def test_read_pyproject_evicts_least_recently_used(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test ``read_pyproject`` only keeps the most recently read documents.
+
+    Parameters
+    ----------
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    monkeypatch.setattr('poetry_plugin_constrain.config.DOCUMENT_CACHE_SIZE', 2)
+
+    paths = [tmp_path / f'{name}.toml' for name in 'abc']
+    for path in paths:
+        path.write_text(f'name = "{path.stem}"\n')
+
+    first = read_pyproject(paths[0])
+    second = read_pyproject(paths[1])
+
+    # Reading ``a`` again makes ``b`` the least recently used document
+    assert read_pyproject(paths[0]) is first
+    read_pyproject(paths[2])
+
+    assert read_pyproject(paths[0]) is first
+    assert read_pyproject(paths[1]) is not second
+    assert read_pyproject(paths[1]) == second
@@ -0,0 +1,171 @@
+"""Test ``daemon.py``."""
+
+from __future__ import annotations
+
+import socket
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_constrain.client import is_supported, request
+from poetry_plugin_constrain.commands import Error
+
+if TYPE_CHECKING:
+    from .conftest import ProjectFactory
+
+pytestmark = pytest.mark.skipif(not is_supported(), reason='Requires Unix sockets')
+
+
+def test_project_cache(project_factory: ProjectFactory, tmp_path: Path) -> None:
+    """Test cached projects are reused until their files or their locker change.
+
+    Parameters
+    ----------
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    from poetry_plugin_constrain.daemon import ProjectCache
+
+    project = project_factory('test_constrain_command.toml')
+    root = project.pyproject.path.parent
+
+    cache = ProjectCache()
+    poetry = cache.get(root)
+
+    assert poetry is not None
+    assert cache.get(root) is poetry
+    assert cache.get(tmp_path) is None
+
+    # A subdirectory belongs to the same project
+    (root / 'src').mkdir(exist_ok=True)
+    assert cache.get(root / 'src') is poetry
+
+    pyproject = root / 'pyproject.toml'
+    pyproject.write_text(pyproject.read_text() + '\n')
+
+    reloaded = cache.get(root)
+    assert reloaded is not poetry
+    assert cache.get(root) is reloaded
+
+    # e.g. the installer run by ``--check``
+    reloaded.set_locker(reloaded.locker.__class__(reloaded.locker.lock, {}))
+    cache.discard_modified()
+
+    assert len(cache) == 0
+
+
+def test_project_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    """Test the cache keeps at most ``maxsize`` projects.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    from poetry_plugin_constrain.daemon import ProjectCache
+
+    cache = ProjectCache(maxsize=2)
+    roots = []
+
+    for name in ('a', 'b', 'c'):
+        root = tmp_path / name
+        root.mkdir()
+        (root / 'pyproject.toml').write_text(
+            f'[tool.poetry]\nname = "{name}"\nversion = "0.1.0"\ndescription = ""\n'
+            'authors = []\n',
+        )
+        roots.append(root)
+
+    first = cache.get(roots[0])
+    cache.get(roots[1])
+    assert cache.get(roots[0]) is first
+
+    cache.get(roots[2])
+
+    assert len(cache) == 2
+    assert cache.get(roots[0]) is first
+
+
+def test_daemon(
+    project_factory: ProjectFactory,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test the daemon runs requests in the client's directory until it is stopped.
+
+    Parameters
+    ----------
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    from poetry_plugin_constrain.daemon import (
+        ConstrainDaemon,
+        DaemonAlreadyRunningError,
+        _RequestHandler,
+        stop_daemon,
+    )
+
+    monkeypatch.setattr(_RequestHandler, 'timeout', 0.1)
+
+    project = project_factory('test_constrain_command.toml')
+    root = project.pyproject.path.parent
+    path = tmp_path / 'daemon.sock'
+
+    daemon = ConstrainDaemon(path)
+    thread = threading.Thread(target=daemon.serve)
+    thread.start()
+
+    try:
+        cwd = Path.cwd()
+
+        response = request({'cwd': str(root), 'args': ['--dry-run']}, path)
+
+        assert response['status'] == 0
+        assert 'Skipped modifying pyproject.toml' in response['output']
+        assert 'foo = "^0.1.0"' in (root / 'pyproject.toml').read_text()
+        assert Path.cwd() == cwd
+
+        response = request({'cwd': str(root), 'args': ['--without', 'docs']}, path)
+
+        assert response['status'] == 0
+        assert 'foo = ">=0.1.0"' in (root / 'pyproject.toml').read_text()
+
+        # The rewritten pyproject.toml is parsed again
+        response = request({'cwd': str(root), 'args': ['--without', 'docs']}, path)
+
+        assert response['status'] == 0
+        assert 'No dependency constraints to change.' in response['output']
+
+        response = request({'cwd': str(tmp_path), 'args': []}, path)
+
+        assert response['status'] != 0
+
+        # A client sending nothing is dropped, so it does not block the daemon
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as silent:
+            silent.connect(str(path))
+
+            assert request({'ping': True}, path, timeout=10)['status'] == 0
+
+        # Would block the daemon, which must keep serving other clients
+        response = request({'cwd': str(root), 'args': ['--watch']}, path)
+
+        assert response['status'] == Error.INCOMPATIBLE_OPTIONS
+        assert 'cannot be run by the daemon' in response['error']
+
+        with pytest.raises(DaemonAlreadyRunningError):
+            ConstrainDaemon(path)
+    finally:
+        assert stop_daemon(path)
+        thread.join(timeout=10)
+        daemon.server_close()
+
+    assert not path.exists()
+    assert not stop_daemon(path)
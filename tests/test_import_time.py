@@ -0,0 +1,122 @@
+"""Test importing the plugin does not slow down every ``poetry`` command."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+import pytest
+
+import poetry_plugin_constrain
+
+PLUGIN_MODULE = 'poetry_plugin_constrain.plugins'
+
+# The modules ``poetry`` has imported when it loads its application plugins
+POETRY_MODULES = ['poetry.console.application', 'poetry.plugins.plugin_manager']
+
+RUNS = 3
+
+
+class ImportTime(NamedTuple):
+    """A line of ``python -X importtime``, in microseconds."""
+
+    module: str
+    exclusive: int
+    cumulative: int
+
+
+def _parse_import_times(stderr: str) -> list[ImportTime]:
+    """Return the modules imported by the plugin, the plugin last.
+
+    ``-X importtime`` prints each module once imported, after the modules it imports,
+    so the plugin's modules are those printed since the previous top-level import.
+    Modules ``poetry`` already imported are not imported again, so are not listed.
+    """
+    times = []
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '[us]' in line:
+            continue
+
+        exclusive, cumulative, name = line[len('import time:') :].split('|')
+        module = name.lstrip()
+
+        # Top-level modules are indented by a single space
+        if len(name) - len(module) == 1 and module != PLUGIN_MODULE:
+            times = []
+        else:
+            times.append(ImportTime(module, int(exclusive), int(cumulative)))
+
+        if module == PLUGIN_MODULE:
+            return times
+
+    pytest.fail(f'{PLUGIN_MODULE!r} was not imported:\n{stderr}')
+
+
+def _import_plugin(tmp_path: Path) -> list[ImportTime]:
+    """Import the plugin after ``poetry`` in a new interpreter and time each module."""
+    env = {
+        **os.environ,
+        'PYTHONPATH': os.pathsep.join(
+            [str(Path(poetry_plugin_constrain.__file__).parents[1]), *sys.path],
+        ),
+        # Installed packages are compiled, so time loading the bytecode instead of
+        # compiling the sources each run
+        'PYTHONPYCACHEPREFIX': str(tmp_path / 'pycache'),
+    }
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    process = subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            '-X',
+            'importtime',
+            '-c',
+            f"import {', '.join(POETRY_MODULES)}; import {PLUGIN_MODULE}",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+
+    return _parse_import_times(process.stderr)
+
+
+def test_import_time(request: pytest.FixtureRequest, tmp_path: Path) -> None:
+    """Test the modules the plugin imports beyond ``poetry``'s fit in the budget.
+
+    The budget is the ``import_time_budget_ms`` ``pytest`` setting. The fastest of a
+    few imports is compared, after a first import that compiles the modules.
+
+    Parameters
+    ----------
+    request : pytest.FixtureRequest
+        A ``pytest`` fixture that describes the requesting test
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    budget = float(request.config.getini('import_time_budget_ms')) * 1000
+
+    _import_plugin(tmp_path)
+    times = min(
+        (_import_plugin(tmp_path) for _ in range(RUNS)),
+        key=lambda times: times[-1].cumulative,
+    )
+
+    total = times[-1].cumulative
+    slowest = sorted(times, key=lambda time: time.exclusive, reverse=True)[:15]
+
+    assert total <= budget, (
+        f'Importing {PLUGIN_MODULE!r} takes {total / 1000:.1f} ms beyond poetry, over'
+        f' the {budget / 1000:.0f} ms budget. Import the slowest modules when they'
+        ' are needed:\n'
+        + '\n'.join(
+            f'  {time.module}: {time.exclusive / 1000:.1f} ms'
+            f' ({time.cumulative / 1000:.1f} ms with its imports)'
+            for time in slowest
+        )
+    )
@@ -0,0 +1,136 @@
+"""Test ``inventory.py``."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_constrain.commands import Error
+from poetry_plugin_constrain.inventory import scan_project, scan_projects
+from tests.helpers import print_output
+
+DEBUG = False
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+
+def _write_projects(root: Path, fixture_dir: Path, count: int) -> list[Path]:
+    content = (fixture_dir / 'test_constrain_command.toml').read_text()
+    paths = []
+
+    for i in range(count):
+        path = root / f'project-{i:04}'
+        path.mkdir(parents=True)
+        (path / 'pyproject.toml').write_text(content)
+        paths.append(path)
+
+    return paths
+
+
+def test_scan_project(tmp_path: Path, fixture_dir: Path) -> None:
+    """Test ``scan_project`` counts the constraint types of each group.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    """
+    (path,) = _write_projects(tmp_path, fixture_dir, 1)
+
+    inventory = scan_project(path)
+
+    assert inventory.error is None
+    assert inventory.groups == {
+        'main': {'caret': 2, 'tilde': 1, 'ne': 2, 'ge': 1, 'gt': 1, 'le': 1, 'lt': 1},
+        'test': {'caret': 1},
+        'docs': {'caret': 2, 'lt': 1},
+    }
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_scan_projects(tmp_path: Path, fixture_dir: Path, jobs: int) -> None:
+    """Test ``scan_projects`` aggregates the counts of many projects.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    jobs : int
+        The number of worker processes
+    """
+    paths = _write_projects(tmp_path, fixture_dir, 20)
+    (paths[3] / 'pyproject.toml').write_text('[tool.poetry\n')
+
+    inventory = scan_projects(paths, jobs=jobs)
+
+    assert [project.path for project in inventory.projects] == paths
+    assert [project.path for project in inventory.errors] == [paths[3]]
+    assert inventory.totals['caret'] == 19 * 5
+    assert inventory.by_group['docs'] == {'caret': 19 * 2, 'lt': 19}
+    assert inventory.project_counts['tilde'] == 19
+
+
+def test_inventory_command(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+    fixture_dir: Path,
+) -> None:
+    """Test ``poetry constrain inventory`` prints totals and per-project counts.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    """
+    paths = _write_projects(tmp_path / 'repo', fixture_dir, 3)
+    pyproject_before = (paths[0] / 'pyproject.toml').read_text()
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute(f'constrain inventory {tmp_path / "repo"}')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    output = poetry_tester.io.fetch_output()
+
+    assert status_code == 0
+    assert 'Scanned 3 projects.' in output
+    assert 'caret: 15 dependencies in 3 projects' in output
+    assert f'Project: {paths[2]}' in output
+    assert '  docs: caret 2, lt 1' in output
+    assert (paths[0] / 'pyproject.toml').read_text() == pyproject_before
+
+    status_code = poetry_tester.execute(f'constrain inventory --json {tmp_path}')
+
+    assert status_code == 0
+    data = json.loads(poetry_tester.io.fetch_output())
+    assert data['totals']['caret'] == 15
+    assert data['projects'][str(paths[1])]['test'] == {'caret': 1}
+
+    (paths[0] / 'pyproject.toml').write_text('[tool.poetry\n')
+    status_code = poetry_tester.execute(f'constrain inventory {tmp_path}')
+
+    assert status_code == Error.INVALID_PYPROJECT
+    assert str(paths[0]) in poetry_tester.io.fetch_error()
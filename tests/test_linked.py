@@ -0,0 +1,311 @@
+"""Test ``linked.py``."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from poetry_plugin_constrain import commands
+from poetry_plugin_constrain.commands import Error
+from poetry_plugin_constrain.linked import (
+    DependencyCycleError,
+    Snapshot,
+    build_graph,
+    downstream_closure,
+    topological_levels,
+)
+from tests.helpers import print_output
+
+DEBUG = False
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+PYPROJECT_TOML = """\
+[tool.poetry]
+name = "{name}"
+version = "0.1.0"
+description = ""
+authors = ["<author@test.com>"]
+
+[tool.poetry.dependencies]
+python = "{python}"
+{dependencies}
+"""
+
+
+def _write_project(
+    root: Path,
+    name: str,
+    *path_dependencies: str,
+    python: str = '^3.8',
+) -> Path:
+    path = root / name
+    path.mkdir(parents=True)
+    (path / 'pyproject.toml').write_text(
+        PYPROJECT_TOML.format(
+            name=name,
+            python=python,
+            dependencies='\n'.join(
+                f'{dependency} = {{ path = "../{dependency}", develop = true }}'
+                for dependency in path_dependencies
+            ),
+        ),
+    )
+    return path
+
+
+def _write_repository(root: Path) -> dict[str, Path]:
+    return {
+        'lib': _write_project(root, 'lib'),
+        'app': _write_project(root, 'app', 'lib'),
+        'tool': _write_project(root, 'tool', 'app', 'lib'),
+        'other': _write_project(root, 'other', python='>=3.8'),
+    }
+
+
+def test_topological_levels(tmp_path: Path) -> None:
+    """Test projects are grouped into levels after the projects they depend on.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    projects = _write_repository(tmp_path)
+
+    graph = build_graph(projects.values())
+
+    assert graph[projects['tool']] == {projects['app'], projects['lib']}
+    assert topological_levels(graph) == [
+        [projects['lib'], projects['other']],
+        [projects['app']],
+        [projects['tool']],
+    ]
+    assert downstream_closure(graph, [projects['app']]) == {
+        projects['app'],
+        projects['tool'],
+    }
+
+
+def test_topological_levels_detects_cycles(tmp_path: Path) -> None:
+    """Test path dependencies forming a cycle are rejected.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    projects = [_write_project(tmp_path, 'a', 'b'), _write_project(tmp_path, 'b', 'a')]
+
+    with pytest.raises(DependencyCycleError):
+        topological_levels(build_graph(projects))
+
+
+def test_snapshot_restore(tmp_path: Path) -> None:
+    """Test ``Snapshot.restore`` restores changed files and removes new ones.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    project = _write_project(tmp_path, 'lib')
+    pyproject = (project / 'pyproject.toml').read_text()
+
+    snapshot = Snapshot([project])
+    (project / 'pyproject.toml').write_text('changed')
+    (project / 'poetry.lock').write_text('created')
+
+    assert snapshot.changed(project)
+
+    snapshot.restore()
+
+    assert (project / 'pyproject.toml').read_text() == pyproject
+    assert not (project / 'poetry.lock').exists()
+    assert not snapshot.changed(project)
+
+
+def test_constrain_linked(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+) -> None:
+    """Test ``poetry constrain --recursive --linked`` locks each changed project once.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    root = tmp_path / 'repo'
+    projects = _write_repository(root)
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute(f'constrain --recursive {root} --linked -j 1')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    output = poetry_tester.io.fetch_output()
+
+    assert status_code == 0
+    assert 'Locking 3 projects in dependency order...' in output
+    for name in ('lib', 'app', 'tool'):
+        assert 'python = ">=3.8"' in (projects[name] / 'pyproject.toml').read_text()
+        assert (projects[name] / 'poetry.lock').exists()
+
+    # Unchanged projects without changed path dependencies are not locked
+    assert not (projects['other'] / 'poetry.lock').exists()
+    assert output.index(f'Project: {projects["lib"]}\n', output.index('Locking')) < (
+        output.index(f'Project: {projects["app"]}\n', output.index('Locking'))
+    )
+
+
+def test_constrain_linked_restores_projects_on_failure(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+) -> None:
+    """Test every project is left untouched when any lock fails.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    root = tmp_path / 'repo'
+    projects = _write_repository(root)
+    projects['broken'] = _write_project(root, 'broken', 'missing')
+
+    pyprojects = {
+        name: (path / 'pyproject.toml').read_text() for name, path in projects.items()
+    }
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute(f'constrain --recursive {root} --linked -j 1')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code != 0
+    assert 'Restored every project since locking failed.' in (
+        poetry_tester.io.fetch_error()
+    )
+    for name, path in projects.items():
+        assert (path / 'pyproject.toml').read_text() == pyprojects[name]
+        assert not (path / 'poetry.lock').exists()
+
+    _write_project(root, 'cycle-a', 'cycle-b')
+    _write_project(root, 'cycle-b', 'cycle-a')
+
+    status_code = poetry_tester.execute(f'constrain --recursive {root} --linked')
+
+    assert status_code == Error.DEPENDENCY_CYCLE_FOUND
+
+
+def test_constrain_linked_rejects_check(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+) -> None:
+    """Test ``--check`` is rejected rather than ignored, leaving every project as is.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    root = tmp_path / 'repo'
+    projects = _write_repository(root)
+    pyproject = (projects['lib'] / 'pyproject.toml').read_text()
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute(f'constrain --recursive {root} --linked --check')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == Error.INCOMPATIBLE_OPTIONS
+    assert "'--check' cannot be used with '--linked'" in poetry_tester.io.fetch_error()
+    assert (projects['lib'] / 'pyproject.toml').read_text() == pyproject
+
+
+def test_constrain_linked_restores_projects_on_interrupt(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    mocker: MockerFixture,
+    tmp_path: Path,
+) -> None:
+    """Test every project is restored when the run is interrupted while locking.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    root = tmp_path / 'repo'
+    projects = _write_repository(root)
+
+    pyprojects = {
+        name: (path / 'pyproject.toml').read_text() for name, path in projects.items()
+    }
+
+    run_batch = commands._run_batch
+
+    def _run_batch(*args: Any, **kwargs: Any) -> list[tuple[Path, int]]:
+        if kwargs.get('name') == 'lock':
+            raise KeyboardInterrupt
+        return run_batch(*args, **kwargs)
+
+    mocker.patch('poetry_plugin_constrain.commands._run_batch', side_effect=_run_batch)
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    # ``cleo`` handles the interrupt once every project is restored
+    status_code = poetry_tester.execute(f'constrain --recursive {root} --linked -j 1')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code != 0
+    assert 'Restored every project since constraining was aborted.' in (
+        poetry_tester.io.fetch_error()
+    )
+    for name, path in projects.items():
+        assert (path / 'pyproject.toml').read_text() == pyprojects[name]
+        assert not (path / 'poetry.lock').exists()
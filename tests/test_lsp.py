@@ -0,0 +1,315 @@
+"""Test ``lsp.py``."""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import poetry_plugin_constrain
+from poetry_plugin_constrain import lsp
+from poetry_plugin_constrain.lsp import Document, LanguageServer
+from poetry_plugin_constrain.text import Token, tokenize
+
+if TYPE_CHECKING:
+    import pytest
+
+URI = 'file:///project/pyproject.toml'
+
+PYPROJECT_TOML = """\
+[tool.poetry]
+version = "1.0.0"  # ^1.0 in a comment
+
+[tool.poetry.dependencies]
+python = "^3.8"
+foo = "^1.2"  # ^9
+bar = { version = "~2.0", optional = true }
+baz = [
+    { version = "^1.0", python = "<3.10" },
+    { version = ">=2.0", python = ">=3.10" },
+]
+
+[tool.poetry.dependencies.qux]
+version = "^0.3"
+python = "^3.9"
+
+[tool.poetry.group.dev.dependencies]
+pytest = ">=7"
+"""
+
+
+def test_diagnostics() -> None:
+    """Test only the constraints of dependency tables using the old type are reported."""
+    document = Document(URI, PYPROJECT_TOML)
+
+    diagnostics = document.diagnostics('caret', 'ge')
+
+    assert [
+        (diagnostic['range']['start']['line'], diagnostic['data']['replacement'])
+        for diagnostic in diagnostics
+    ] == [(4, '>=3.8'), (5, '>=1.2'), (8, '>=1.0'), (13, '>=0.3')]
+    assert diagnostics[1]['range'] == {
+        'start': {'line': 5, 'character': 7},
+        'end': {'line': 5, 'character': 11},
+    }
+
+    assert [
+        diagnostic['data']['replacement']
+        for diagnostic in document.diagnostics('tilde', 'exact')
+    ] == ['==2.0']
+
+
+def test_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the document configuration takes precedence over the environment.
+
+    Parameters
+    ----------
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    """
+    monkeypatch.delenv('POETRY_PLUGIN_CONSTRAIN_OLD', raising=False)
+    monkeypatch.delenv('POETRY_PLUGIN_CONSTRAIN_NEW', raising=False)
+
+    document = Document(URI, PYPROJECT_TOML)
+
+    assert document.settings({}) == ('caret', 'ge')
+    assert document.settings({'new': 'gt'}) == ('caret', 'gt')
+
+    monkeypatch.setenv('POETRY_PLUGIN_CONSTRAIN_NEW', 'exact')
+    assert document.settings({'new': 'gt'}) == ('caret', 'exact')
+
+    document = Document(
+        URI,
+        f'{PYPROJECT_TOML}\n[tool.poetry-plugin-constrain]\nold = "tilde"\n',
+    )
+    assert document.settings({}) == ('tilde', 'exact')
+
+
+def test_incremental_change(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test an edit only tokenizes the lines it touched.
+
+    Parameters
+    ----------
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    """
+    document = Document(URI, PYPROJECT_TOML)
+
+    tokenized: list[str] = []
+
+    def _tokenize(line: str) -> tuple[Token, ...]:
+        tokenized.append(line)
+        return tokenize(line)
+
+    monkeypatch.setattr(lsp, 'tokenize', _tokenize)
+
+    # Type '^' before the constraint of 'pytest'
+    document.apply_change(
+        {
+            'range': {
+                'start': {'line': 17, 'character': 10},
+                'end': {'line': 17, 'character': 12},
+            },
+            'text': '^',
+        },
+    )
+
+    assert tokenized == ['pytest = "^7"']
+    assert document.diagnostics('caret', 'ge')[-1]['data']['replacement'] == '>=7'
+
+    # Replace two lines with three
+    tokenized.clear()
+    document.apply_change(
+        {
+            'range': {
+                'start': {'line': 4, 'character': 0},
+                'end': {'line': 5, 'character': 18},
+            },
+            'text': 'python = ">=3.8"\nfoo = "~1.2"\nnew = "^2"',
+        },
+    )
+
+    assert tokenized == ['python = ">=3.8"', 'foo = "~1.2"', 'new = "^2"']
+    assert document.text.splitlines()[4:7] == tokenized
+    assert document.text.splitlines()[7] == 'bar = { version = "~2.0", optional = true }'
+    assert [
+        diagnostic['data']['replacement']
+        for diagnostic in document.diagnostics('caret', 'ge')
+    ] == ['>=2', '>=1.0', '>=0.3', '>=7']
+
+
+def test_non_ascii_positions() -> None:
+    """Test positions are counted in UTF-16 code units, as in the protocol."""
+    document = Document(URI, '[tool.poetry.dependencies]\n"\U0001d523oo" = "^1"')
+
+    assert document.diagnostics('caret', 'ge')[0]['range']['start'] == {
+        'line': 1,
+        'character': 10,
+    }
+
+    document.apply_change(
+        {
+            'range': {
+                'start': {'line': 1, 'character': 10},
+                'end': {'line': 1, 'character': 11},
+            },
+            'text': '~',
+        },
+    )
+
+    assert document.lines[1] == '"\U0001d523oo" = "~1"'
+
+
+def _frame(message: dict[str, Any]) -> bytes:
+    body = json.dumps({'jsonrpc': '2.0', **message}).encode('utf-8')
+    return f'Content-Length: {len(body)}\r\n\r\n'.encode('ascii') + body
+
+
+def _messages(data: bytes) -> list[dict[str, Any]]:
+    messages = []
+    while data:
+        header, _, data = data.partition(b'\r\n\r\n')
+        length = int(header.split(b':')[1])
+        messages.append(json.loads(data[:length]))
+        data = data[length:]
+    return messages
+
+
+def test_language_server() -> None:
+    """Test a session publishing diagnostics and offering fixes."""
+    requests = [
+        {'id': 1, 'method': 'initialize', 'params': {'initializationOptions': {}}},
+        {'method': 'initialized', 'params': {}},
+        {
+            'method': 'textDocument/didOpen',
+            'params': {'textDocument': {'uri': URI, 'text': PYPROJECT_TOML}},
+        },
+        {
+            'method': 'textDocument/didChange',
+            'params': {
+                'textDocument': {'uri': URI},
+                'contentChanges': [
+                    {
+                        'range': {
+                            'start': {'line': 4, 'character': 10},
+                            'end': {'line': 4, 'character': 11},
+                        },
+                        'text': '>=',
+                    },
+                ],
+            },
+        },
+        {
+            'id': 2,
+            'method': 'textDocument/codeAction',
+            'params': {
+                'textDocument': {'uri': URI},
+                'range': {
+                    'start': {'line': 5, 'character': 8},
+                    'end': {'line': 5, 'character': 8},
+                },
+                'context': {'diagnostics': []},
+            },
+        },
+        {'id': 3, 'method': 'textDocument/hover', 'params': {}},
+        {'method': 'textDocument/didClose', 'params': {'textDocument': {'uri': URI}}},
+        {'id': 4, 'method': 'shutdown'},
+        {'method': 'exit'},
+    ]
+
+    reader = io.BytesIO(b''.join(map(_frame, requests)))
+    writer = io.BytesIO()
+
+    assert LanguageServer(reader, writer).serve() == 0
+
+    responses = _messages(writer.getvalue())
+    initialize, opened, changed, actions, hover, closed, shutdown = responses
+
+    assert initialize['result']['capabilities']['textDocumentSync']['change'] == 2
+    assert len(opened['params']['diagnostics']) == 4
+    assert len(changed['params']['diagnostics']) == 3
+
+    quick_fix, fix_all, check = actions['result']
+
+    assert quick_fix['kind'] == 'quickfix'
+    assert quick_fix['edit']['changes'][URI] == [
+        {
+            'range': {
+                'start': {'line': 5, 'character': 7},
+                'end': {'line': 5, 'character': 11},
+            },
+            'newText': '>=1.2',
+        },
+    ]
+    assert fix_all['kind'] == 'source.fixAll'
+    assert len(fix_all['edit']['changes'][URI]) == 3
+    assert check['command']['command'] == lsp.CHECK_COMMAND
+
+    assert hover['error']['code'] == -32601
+    assert closed['params'] == {'uri': URI, 'diagnostics': []}
+    assert shutdown == {'jsonrpc': '2.0', 'id': 4, 'result': None}
+
+
+def test_check_command(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test the solver check runs ``poetry constrain`` for the project of a document.
+
+    Parameters
+    ----------
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    calls: list[tuple[Path, list[str]]] = []
+
+    def execute(cache: Any, cwd: Path, args: list[str]) -> dict[str, Any]:  # noqa: ARG001
+        calls.append((cwd, args))
+        return {'status': 5, 'output': 'Checking...\n', 'error': 'Cannot solve'}
+
+    monkeypatch.setattr('poetry_plugin_constrain.daemon.execute', execute)
+
+    writer = io.BytesIO()
+    server = LanguageServer(io.BytesIO(), writer)
+    server.handle(
+        {
+            'id': 1,
+            'method': 'workspace/executeCommand',
+            'params': {
+                'command': lsp.CHECK_COMMAND,
+                'arguments': [(tmp_path / 'pyproject.toml').as_uri()],
+            },
+        },
+    )
+
+    message, response = _messages(writer.getvalue())
+
+    assert calls == [(tmp_path, ['--dry-run', '--check'])]
+    assert message['method'] == 'window/showMessage'
+    assert message['params'] == {'type': 1, 'message': 'Checking...\nCannot solve'}
+    assert response == {'jsonrpc': '2.0', 'id': 1, 'result': 5}
+
+
+def test_does_not_load_poetry() -> None:
+    """Test publishing diagnostics does not import ``poetry`` itself."""
+    code = (
+        'import sys\n'
+        'from poetry_plugin_constrain.lsp import Document\n'
+        f'Document("", {PYPROJECT_TOML!r}).diagnostics("caret", "ge")\n'
+        'print([name for name in sys.modules if name.startswith("poetry.")'
+        ' and not name.startswith("poetry.core")])\n'
+    )
+    source = Path(poetry_plugin_constrain.__file__).parents[1]
+
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, '-c', code],
+        env={**os.environ, 'PYTHONPATH': str(source)},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    assert output.strip() == '[]'
@@ -0,0 +1,172 @@
+"""Test ``pipeline.py``."""
+
+from __future__ import annotations
+
+import tracemalloc
+from typing import TYPE_CHECKING
+
+import pytest
+import tomlkit
+from poetry.factory import Factory
+
+from poetry_plugin_constrain.pipeline import discover, group_table, patch, rewrite
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .conftest import PoetryTesterFactory
+
+PYPROJECT_TOML = """\
+[tool.poetry]
+name = "scaling"
+version = "0.1.0"
+description = ""
+authors = ["<author@test.com>"]
+
+[tool.poetry.dependencies]
+python = "^3.8"
+{dependencies}
+"""
+
+DEPENDENCIES_TOML = """\
+[tool.poetry.dependencies]
+foo = "^1.2"
+bar = { version = "~2.0", optional = true }
+baz = [
+    { version = "^1.0", python = "<3.10" },
+    { version = "^2.0", python = ">=3.10" },
+]
+local = { path = "../local" }
+
+[tool.poetry.group.dev.dependencies]
+qux = "^0.3"
+"""
+
+
+@pytest.fixture()
+def poetry_config() -> dict:
+    """Return the ``[tool.poetry]`` table of a ``pyproject.toml`` document.
+
+    Returns
+    -------
+    dict
+        The ``tomlkit`` table
+    """
+    return tomlkit.parse(DEPENDENCIES_TOML)['tool']['poetry']
+
+
+def test_group_table(poetry_config: dict) -> None:
+    """Test ``group_table`` finds the main and the other groups.
+
+    Parameters
+    ----------
+    poetry_config : dict
+        The ``[tool.poetry]`` table
+    """
+    assert list(group_table(poetry_config, 'main')) == ['foo', 'bar', 'baz', 'local']
+    assert list(group_table(poetry_config, 'dev')) == ['qux']
+    assert group_table(poetry_config, 'missing') is None
+
+
+def test_discover_and_rewrite(poetry_config: dict) -> None:
+    """Test every constraint of a group flows through the rewrite, changed or not.
+
+    Parameters
+    ----------
+    poetry_config : dict
+        The ``[tool.poetry]`` table
+    """
+    rewritten = [
+        (dependency.pretty_name, old_constraint, dependency.pretty_constraint)
+        for old_constraint, dependency in rewrite(
+            discover(group_table(poetry_config, 'main')),
+            old='caret',
+            new='ge',
+        )
+    ]
+
+    assert rewritten == [
+        ('foo', '^1.2', '>=1.2'),
+        ('bar', '~2.0', '~2.0'),
+        ('baz', '^1.0', '>=1.0'),
+        ('baz', '^2.0', '>=2.0'),
+        ('local', '*', '*'),
+    ]
+
+
+def test_patch(poetry_config: dict) -> None:
+    """Test ``patch`` writes strings, tables and multiple constraint dependencies.
+
+    Parameters
+    ----------
+    poetry_config : dict
+        The ``[tool.poetry]`` table
+    """
+    table = group_table(poetry_config, 'main')
+
+    for old_constraint, dependency in rewrite(discover(table), old='caret', new='ge'):
+        if old_constraint != dependency.pretty_constraint:
+            patch(table, old_constraint, dependency)
+
+    for old_constraint, dependency in rewrite(discover(table), old='tilde', new='ge'):
+        if old_constraint != dependency.pretty_constraint:
+            patch(table, old_constraint, dependency)
+
+    assert table['foo'] == '>=1.2'
+    assert table['bar'] == {'version': '>=2.0', 'optional': True}
+    assert [entry['version'] for entry in table['baz']] == ['>=1.0', '>=2.0']
+    assert table['local'] == {'path': '../local'}
+
+
+def _peak_memory(
+    poetry_tester_factory: PoetryTesterFactory,
+    path: Path,
+    num_dependencies: int,
+) -> int:
+    path.mkdir()
+    (path / 'pyproject.toml').write_text(
+        PYPROJECT_TOML.format(
+            dependencies='\n'.join(
+                f'package-{ndx} = "^{ndx % 10}.1.0"' for ndx in range(num_dependencies)
+            ),
+        ),
+    )
+
+    poetry = Factory().create_poetry(path)
+    poetry_tester = poetry_tester_factory(poetry)
+
+    # The document itself grows with the project, so parse it before tracing
+    assert poetry.pyproject.data
+
+    tracemalloc.start()
+    try:
+        assert poetry_tester.execute('constrain --dry-run --quiet') == 0
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def test_peak_memory_is_flat(
+    poetry_tester_factory: PoetryTesterFactory,
+    tmp_path: Path,
+) -> None:
+    """Test the memory used by ``poetry constrain`` does not grow with the dependencies.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    # Warm up imports and caches
+    _peak_memory(poetry_tester_factory, tmp_path / 'warm-up', 50)
+
+    small = _peak_memory(poetry_tester_factory, tmp_path / 'small', 500)
+    large = _peak_memory(poetry_tester_factory, tmp_path / 'large', 2000)
+
+    # Keeping every dependency alive until the end takes about 2 KiB each
+    assert (large - small) / 1500 < 256
@@ -25,14 +25,17 @@ if TYPE_CHECKING:
     [
         ('init', 'constrain'),
         ('init --name=test --description=dummy', 'constrain'),
-        ('add foobar', 'constrain'),
-        ('add foobar --dry-run', 'constrain --dry-run'),
-        ('add foobar --lock', 'constrain --lock'),
+        ('add foobar', 'constrain --package foobar'),
+        ('add foobar --dry-run', 'constrain --dry-run --package foobar'),
+        ('add foobar --lock', 'constrain --lock --package foobar'),
         ('update', 'constrain'),
         ('update --dry-run', 'constrain --dry-run'),
         ('update --lock', 'constrain --lock'),
         ('update --only=baz', 'constrain --only baz'),
         ('update --without=buz', 'constrain --without buz'),
+        ('update foo Bar_baz', 'constrain --package foo,Bar_baz'),
+        ('add foo@^1.0 bar[extra]>=2', 'constrain --package foo,bar'),
+        ('add ./path/to/foo', 'constrain'),
         ('check', 'constrain'),
         ('check --lock', 'constrain --lock'),
     ],
@@ -313,3 +316,110 @@ def test_post_hooks_disabled_with_environment_variable(
 
         assert debug_message in poetry_tester.io.fetch_output()
         assert mock_run_with.call_count == 0
+
+
+@pytest.mark.parametrize(
+    ('pre_add_hook', 'expected_runs'),
+    [
+        (None, 1),
+        ('false', 2),
+    ],
+)
+def test_pre_add_hook(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    mocker: MockerFixture,
+    pre_add_hook: str | None,
+    expected_runs: int,
+) -> None:
+    """Test ``poetry add`` writes the new constraint before it locks.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    pre_add_hook : str | None
+        The plugin ``pre-add-hook`` configuration
+    expected_runs : int
+        The number of times the dependencies are resolved
+    """
+    _environ = (
+        {'POETRY_PLUGIN_CONSTRAIN_PRE_ADD_HOOK': pre_add_hook} if pre_add_hook else {}
+    )
+
+    with mock.patch.dict('os.environ', _environ):
+        mocker.patch(
+            f'{COMMANDS_NAMESPACE}.add.AddCommand._find_best_version_for_package',
+            return_value=('foobar', '^1.2.3'),
+        )
+        mock_run = mocker.patch(
+            'poetry.installation.installer.Installer.run',
+            return_value=0,
+        )
+
+        project = project_factory('test_constrain_command_expected.toml')
+        poetry_tester = poetry_tester_factory(project)
+
+        status_code = poetry_tester.execute(args='add foobar --lock', interactive=False)
+
+        if DEBUG:
+            print_output(poetry_tester)
+
+        assert status_code == 0
+        assert 'foobar = ">=1.2.3"' in project.pyproject.path.read_text()
+        assert mock_run.call_count == expected_runs
+
+
+def test_pre_add_hook_determine_requirements() -> None:
+    """Test ``poetry add`` still determines its requirements as the pre-add hook expects.
+
+    The hook wraps the private ``_determine_requirements`` of ``poetry add``. If this
+    fails after upgrading ``poetry``, update the hook to the new signature.
+    """
+    import inspect
+
+    from poetry.console.commands.add import AddCommand
+
+    parameters = inspect.signature(AddCommand._determine_requirements).parameters
+    assert list(parameters)[:2] == ['self', 'requires']
+
+
+def test_pre_add_hook_without_determine_requirements(
+    project_factory: ProjectFactory,
+    mocker: MockerFixture,
+) -> None:
+    """Test the pre-add hook leaves ``poetry add`` to the post-hook if it cannot wrap it.
+
+    Parameters
+    ----------
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    """
+    from cleo.events.console_command_event import ConsoleCommandEvent
+    from cleo.io.buffered_io import BufferedIO
+
+    from poetry_plugin_constrain.plugins import ConstrainPlugin
+
+    project = project_factory('test_constrain_command_expected.toml')
+
+    # As if a later ``poetry`` renamed the method
+    command = mocker.Mock(spec=['name', 'poetry'], poetry=project)
+    command.name = 'add'
+
+    io = BufferedIO()
+    io.set_verbosity(Verbosity.DEBUG)
+
+    ConstrainPlugin()._pre_add_hook(
+        ConsoleCommandEvent(command, io),
+        'console.command',
+        mocker.Mock(),
+    )
+
+    assert "has no '_determine_requirements' method" in io.fetch_output()
@@ -0,0 +1,247 @@
+"""Test ``profiling.py``."""
+
+from __future__ import annotations
+
+import pstats
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_constrain import commands
+from poetry_plugin_constrain.profiling import (
+    NULL_PROFILER,
+    Profiler,
+    create_profiler,
+)
+from tests.benchmarks.projects import generate_pyproject
+from tests.helpers import print_output
+
+DEBUG = False
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+
+def test_profiler_disabled() -> None:
+    """Test nothing is wrapped or timed unless profiling is enabled."""
+    profiler = create_profiler(enabled=False)
+    items = [1, 2, 3]
+
+    assert profiler is NULL_PROFILER
+    assert profiler.iterate('discover', items) is items
+    assert profiler.phase('config') is profiler.phase('solve')
+
+
+def test_profiler_times_phases_exclusively(mocker: MockerFixture) -> None:
+    """Test a nested phase pauses the phase it is nested in.
+
+    Parameters
+    ----------
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    """
+    # Each reading of the clock advances it by one second
+    mocker.patch(
+        'poetry_plugin_constrain.profiling.time.perf_counter',
+        side_effect=range(100),
+    )
+
+    profiler = Profiler()
+
+    with profiler:
+        with profiler.phase('rewrite'), profiler.phase('discover'):
+            pass
+        with profiler.phase('rewrite'):
+            pass
+
+    assert profiler.calls == {'rewrite': 2, 'discover': 1}
+    # One second before and after the nested phase, and one in the second call
+    assert profiler.elapsed == {'rewrite': 3.0, 'discover': 1.0}
+
+
+def test_profiler_iterate() -> None:
+    """Test ``iterate`` yields every item and times producing each one as a phase."""
+    profiler = Profiler()
+
+    with profiler:
+        items = list(
+            profiler.iterate('rewrite', profiler.iterate('discover', iter('abc'))),
+        )
+
+    assert items == ['a', 'b', 'c']
+    # The last call of each stage finds the stage exhausted
+    assert profiler.calls == {'rewrite': 4, 'discover': 4}
+
+
+def test_profiler_traces_memory() -> None:
+    """Test the memory each phase allocates, and its peak, are attributed to it."""
+    size = 1024 * 1024
+    profiler = Profiler(memory=True)
+
+    with profiler:
+        with profiler.phase('kept'):
+            kept = bytearray(size)
+        with profiler.phase('freed'):
+            freed = bytearray(size)
+            del freed
+
+    assert len(kept) == size
+    assert profiler.allocated['kept'] >= size
+    assert profiler.allocated['freed'] < size
+    assert profiler.peak >= 2 * size
+    assert any(__file__ in str(stat.traceback) for stat in profiler.top_allocations)
+
+    # Python 3.8 cannot reset the peak between phases
+    if sys.version_info >= (3, 9):
+        assert profiler.peaks['freed'] >= 2 * size
+        assert profiler.peaks['kept'] < 2 * size
+
+
+@pytest.mark.parametrize(
+    ('argv', 'output'),
+    [
+        ('constrain --dry-run --profile', None),
+        ('constrain --dry-run --profile-output {output}', 'constrain.prof'),
+        ('constrain --dry-run --profile-output {output}', 'constrain.folded'),
+        ('constrain --dry-run --trace-memory', None),
+        ('constrain --dry-run', None),
+    ],
+)
+def test_constrain_profile(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+    argv: str,
+    output: str | None,
+) -> None:
+    """Test ``--profile`` prints the time of each phase and writes any profile.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    argv : str
+        Commandline arguments
+    output : str | None
+        The name of the profile file, if any
+    """
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+    path = tmp_path / output if output else None
+
+    status_code = poetry_tester.execute(argv.format(output=path))
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    stdout = poetry_tester.io.fetch_output()
+
+    assert status_code == 0
+
+    if argv == 'constrain --dry-run':
+        assert 'Profile:' not in stdout
+        return
+
+    assert 'Profile:' in stdout
+    for phase in ('config', 'groups', 'discover', 'rewrite', 'other', 'total'):
+        assert f'  {phase} ' in stdout
+
+    assert ('alloc KiB' in stdout) is ('--trace-memory' in argv)
+    assert ('Top allocation sites:' in stdout) is ('--trace-memory' in argv)
+
+    if path is None:
+        return
+
+    assert path.exists()
+
+    if path.suffix == '.prof':
+        assert pstats.Stats(str(path)).total_calls > 0
+    else:
+        stacks = path.read_text().splitlines()
+        assert any('rewrite' in stack and ';' in stack for stack in stacks)
+        assert all(stack.rpartition(' ')[2].isdigit() for stack in stacks)
+
+
+def test_constrain_profile_configured(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test profiling is enabled by the ``profile`` configuration variable.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    """
+    monkeypatch.setenv('POETRY_PLUGIN_CONSTRAIN_PROFILE', 'true')
+
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute('constrain --dry-run')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == 0
+    assert 'Profile:' in poetry_tester.io.fetch_output()
+
+
+def test_memory_grows_linearly(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    mocker: MockerFixture,
+    tmp_path: Path,
+) -> None:
+    """Test the peak memory of a run grows at most linearly with the dependencies.
+
+    When the number of dependencies doubles, the peak memory may grow by about twice
+    as much as it did the time before if it grows linearly, or four times if it grows
+    quadratically.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    create_profiler = mocker.spy(commands, 'create_profiler')
+    peaks = []
+
+    for dependencies in (250, 500, 1000):
+        path = tmp_path / f'pyproject-{dependencies}.toml'
+        path.write_text(generate_pyproject(dependencies, groups=5))
+
+        poetry_tester = poetry_tester_factory(project_factory(str(path)))
+        status_code = poetry_tester.execute('constrain --trace-memory')
+
+        if DEBUG:
+            print_output(poetry_tester)
+
+        assert status_code == 0
+
+        peaks.append(create_profiler.spy_return.peak)
+
+    assert 0 < peaks[2] - peaks[1] <= 3 * (peaks[1] - peaks[0])
@@ -0,0 +1,115 @@
+"""Test ``report.py``."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_constrain.commands import Error
+from poetry_plugin_constrain.report import (
+    InconsistentShardsError,
+    build_report,
+    merge_reports,
+    write_report,
+)
+from poetry_plugin_constrain.sharding import Shard
+from tests.helpers import print_output
+
+DEBUG = False
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+
+def _entry(status: int, group: str, *names: str) -> dict:
+    return {
+        'status': status,
+        'groups': {
+            group: [{'name': name, 'old': '^1', 'new': '>=1'} for name in names],
+        },
+    }
+
+
+def test_merge_reports() -> None:
+    """Test ``merge_reports`` combines projects and detects missing shards."""
+    reports = [
+        build_report({'a': _entry(0, 'main', 'foo')}, Shard(1, 3)),
+        build_report(
+            {'a': _entry(0, 'dev', 'bar'), 'b': _entry(5, 'main')},
+            Shard(3, 3),
+        ),
+    ]
+
+    merged = merge_reports(reports)
+
+    assert merged.missing_shards == [2]
+    assert merged.duplicate_shards == []
+    assert merged.report['status'] == 5
+    assert merged.report['projects']['a']['groups'] == {
+        'main': [{'name': 'foo', 'old': '^1', 'new': '>=1'}],
+        'dev': [{'name': 'bar', 'old': '^1', 'new': '>=1'}],
+    }
+
+    merged = merge_reports([*reports, reports[0]])
+
+    assert merged.duplicate_shards == [1]
+
+    with pytest.raises(InconsistentShardsError):
+        merge_reports([*reports, build_report({}, Shard(2, 4))])
+
+
+def test_merge_command(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+) -> None:
+    """Test ``poetry constrain merge`` gives one verdict for all shards.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    shards = [tmp_path / f'shard-{i}.json' for i in (1, 2)]
+    write_report(shards[0], build_report({'a': _entry(0, 'main', 'foo')}, Shard(1, 2)))
+    write_report(shards[1], build_report({'b': _entry(0, 'main', 'bar')}, Shard(2, 2)))
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    merged_path = tmp_path / 'merged.json'
+    status_code = poetry_tester.execute(
+        f'constrain merge --report-json {merged_path} {shards[0]} {shards[1]}',
+    )
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == 0
+    assert 'Merged 2 reports: 2 projects, 2 proposed updates, 0 failed.' in (
+        poetry_tester.io.fetch_output()
+    )
+    assert merged_path.exists()
+
+    status_code = poetry_tester.execute(f'constrain merge {shards[0]}')
+
+    assert status_code == Error.INCOMPLETE_SHARDS
+    assert 'Missing shards: 2.' in poetry_tester.io.fetch_error()
+
+    write_report(shards[1], build_report({'b': _entry(1, 'main')}, Shard(2, 2)))
+    status_code = poetry_tester.execute(f'constrain merge {shards[0]} {shards[1]}')
+
+    assert status_code == 1
+
+    shards[1].write_text('{}')
+    status_code = poetry_tester.execute(f'constrain merge {shards[0]} {shards[1]}')
+
+    assert status_code == Error.INVALID_REPORT
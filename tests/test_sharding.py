@@ -0,0 +1,178 @@
+"""Test ``sharding.py``."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_constrain.commands import Error
+from poetry_plugin_constrain.sharding import (
+    InvalidShardError,
+    Shard,
+    assign_shards,
+    parse_shard,
+    select_shard,
+)
+from tests.helpers import print_output
+
+DEBUG = False
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+
+@pytest.mark.parametrize(
+    ('value', 'expected_shard'),
+    [
+        ('1/1', Shard(1, 1)),
+        ('2/4', Shard(2, 4)),
+        ('0/4', None),
+        ('5/4', None),
+        ('1', None),
+        ('a/b', None),
+    ],
+)
+def test_parse_shard(value: str, expected_shard: Shard | None) -> None:
+    """Test ``parse_shard`` accepts 'i/N' with 1 <= i <= N only.
+
+    Parameters
+    ----------
+    value : str
+        The shard to parse
+    expected_shard : Shard | None
+        The expected shard, or ``None`` if the value is invalid
+    """
+    if expected_shard is None:
+        with pytest.raises(InvalidShardError):
+            parse_shard(value)
+    else:
+        assert parse_shard(value) == expected_shard
+
+
+def test_assign_shards_balances_weights() -> None:
+    """Test ``assign_shards`` balances dependency counts, not item counts."""
+    weights = {'huge': 100, **{f'small-{i}': 10 for i in range(10)}}
+
+    assignment = assign_shards(weights, 2)
+
+    loads = {1: 0, 2: 0}
+    for key, index in assignment.items():
+        loads[index] += weights[key]
+
+    assert loads == {1: 100, 2: 100}
+    assert [key for key, index in assignment.items() if index == 1] == ['huge']
+
+
+def test_select_shard_is_a_partition() -> None:
+    """Test every item is in exactly one shard, whatever the order of the input."""
+    weights = {f'project-{i}': (i * 7) % 13 + 1 for i in range(50)}
+    reversed_weights = dict(reversed(weights.items()))
+
+    shards = [select_shard(weights, Shard(i, 4)) for i in range(1, 5)]
+
+    assert sorted(key for shard in shards for key in shard) == sorted(weights)
+    for i, shard in enumerate(shards, start=1):
+        assert set(select_shard(reversed_weights, Shard(i, 4))) == set(shard)
+
+
+def test_constrain_shards_groups(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+) -> None:
+    """Test ``poetry constrain --shard`` splits the groups of a single project.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+
+    groups: dict[str, list[str]] = {}
+    for i in (1, 2):
+        report_path = tmp_path / f'shard-{i}.json'
+        status_code = poetry_tester.execute(
+            f'constrain --dry-run --shard {i}/2 --report-json {report_path}',
+        )
+
+        if DEBUG:
+            print_output(poetry_tester)
+
+        assert status_code == 0
+
+        report = json.loads(report_path.read_text())
+        assert report['shard'] == {'index': i, 'count': 2}
+        (entry,) = report['projects'].values()
+        groups[str(i)] = sorted(entry['groups'])
+
+    # 'main' has the most dependencies, so the two optional groups share a shard
+    assert groups == {'1': ['main'], '2': ['docs', 'test']}
+
+    status_code = poetry_tester.execute('constrain --shard 3/2')
+
+    assert status_code == Error.INVALID_SHARD
+
+
+def test_constrain_recursive_shards_projects(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+    fixture_dir: Path,
+) -> None:
+    """Test ``poetry constrain --recursive --shard`` runs each project in one shard.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    """
+    root = tmp_path / 'repo'
+    content = (fixture_dir / 'test_constrain_command.toml').read_text()
+    for i in range(5):
+        (root / f'p{i}').mkdir(parents=True)
+        (root / f'p{i}' / 'pyproject.toml').write_text(content)
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    projects: list[str] = []
+    for i in (1, 2, 3):
+        report_path = tmp_path / f'shard-{i}.json'
+        status_code = poetry_tester.execute(
+            f'constrain --recursive {root} --jobs 1 --dry-run --shard {i}/3'
+            f' --report-json {report_path}',
+        )
+
+        if DEBUG:
+            print_output(poetry_tester)
+
+        assert status_code == 0
+
+        report = json.loads(report_path.read_text())
+        projects.extend(report['projects'])
+        for entry in report['projects'].values():
+            assert {update['name'] for update in entry['groups']['main']} == {
+                'python',
+                'foo',
+            }
+
+    assert sorted(projects) == [f'p{i}' for i in range(5)]
@@ -0,0 +1,263 @@
+"""Test ``stats.py`` and ``poetry constrain stats``."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from poetry_plugin_constrain.config import TOML_TABLE
+from poetry_plugin_constrain.stats import (
+    STATS_FILE_NAME,
+    HookRecord,
+    append_record,
+    load_records,
+    summarize,
+)
+from poetry_plugin_constrain.tracing import span
+from tests.helpers import print_output
+
+DEBUG = False
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+
+def _record(command: str, elapsed: float, reason: str | None = None) -> HookRecord:
+    return HookRecord(
+        time=0.0,
+        command=command,
+        elapsed=elapsed,
+        skipped=reason is not None,
+        reason=reason,
+        solved=reason is None and command != 'check',
+    )
+
+
+def test_append_and_load_records(tmp_path: Path) -> None:
+    """Test records are appended one per line, and unreadable lines are ignored.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    path = tmp_path / 'stats' / STATS_FILE_NAME
+    records = [_record('add', 0.1234567), _record('update', 0.002, 'disabled')]
+
+    append_record(path, records[0])
+    with path.open('a') as file:
+        file.write('{"time": 0.0, "command": "ad\n')
+    append_record(path, records[1])
+
+    assert len(path.read_text().splitlines()) == 3
+    assert load_records(path) == [records[0]._replace(elapsed=0.123457), records[1]]
+    assert load_records(tmp_path / 'missing.jsonl') == []
+
+
+def test_summarize() -> None:
+    """Test the percentiles of each command and outcome are interpolated."""
+    records = [_record('add', elapsed / 1e3) for elapsed in range(1, 102)]
+    records += [
+        _record('check', 0.05),
+        _record('add', 0.001, 'failed'),
+        _record('add', 0.003, 'failed'),
+    ]
+
+    stats = {(row.command, row.outcome): row for row in summarize(records)}
+
+    assert list(stats) == [
+        ('add', 'skipped (failed)'),
+        ('add', 'solved'),
+        ('check', 'constrained'),
+    ]
+
+    assert stats['add', 'solved'].runs == 101
+    assert stats['add', 'solved'].percentiles == pytest.approx((51.0, 91.0, 100.0))
+    assert stats['add', 'solved'].max == pytest.approx(101.0)
+    assert stats['add', 'skipped (failed)'].percentiles == pytest.approx((2.0, 2.8, 2.98))
+    assert stats['check', 'constrained'].percentiles == pytest.approx((50.0,) * 3)
+
+
+@pytest.mark.parametrize(
+    ('environ', 'reason', 'solved'),
+    [
+        ({'POETRY_PLUGIN_CONSTRAIN_HOOK_STATS': '1'}, None, True),
+        (
+            {
+                'POETRY_PLUGIN_CONSTRAIN_HOOK_STATS': '1',
+                'POETRY_PLUGIN_CONSTRAIN_ENABLE_POST_HOOKS': '0',
+            },
+            'disabled',
+            False,
+        ),
+        ({}, None, None),
+    ],
+)
+def test_post_hook_records_stats(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    config_cache_dir: Path,
+    environ: dict[str, str],
+    reason: str | None,
+    *,
+    solved: bool | None,
+) -> None:
+    """Test the post-hook records its wall time and outcome with ``hook-stats``.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    config_cache_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``cache-dir`` of the
+        ``poetry`` configuration of the project
+    environ : dict[str, str]
+        The plugin configuration
+    reason : str | None
+        The reason the hook is skipped, if any
+    solved : bool | None
+        Whether the hook solves, or ``None`` if nothing is recorded
+    """
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+
+    def _run_with(*args: Any) -> None:  # noqa: ARG001
+        # Like ``constrain --lock``, which solves
+        with span('constrain', 'command'), span('run-installer-update', 'solve'):
+            pass
+
+    mocker.patch(
+        'poetry.console.commands.update.UpdateCommand.handle',
+        return_value=0,
+    )
+    mocker.patch(
+        'poetry_plugin_constrain.plugins.ConstrainPlugin._run_with',
+        side_effect=_run_with,
+    )
+
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute('update --lock')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == 0
+
+    records = load_records(config_cache_dir / TOML_TABLE / STATS_FILE_NAME)
+
+    if solved is None:
+        assert records == []
+        return
+
+    (record,) = records
+    assert record.command == 'update'
+    assert record.elapsed > 0
+    assert (record.skipped, record.reason, record.solved) == (
+        reason is not None,
+        reason,
+        solved,
+    )
+
+
+@pytest.mark.parametrize('argv', ['constrain stats', 'constrain stats --json'])
+def test_constrain_stats(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+    argv: str,
+) -> None:
+    """Test ``constrain stats`` prints the percentiles of each command and outcome.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    argv : str
+        Commandline arguments
+    """
+    path = tmp_path / STATS_FILE_NAME
+    for elapsed in (0.01, 0.02, 0.03):
+        append_record(path, _record('add', elapsed))
+    append_record(path, _record('init', 0.001, 'failed'))
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute(f'{argv} --file {path}')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == 0
+
+    stdout = poetry_tester.io.fetch_output()
+
+    if '--json' in argv:
+        stats = json.loads(stdout)
+        assert stats['runs'] == 4
+        assert stats['stats'][0] == {
+            'command': 'add',
+            'outcome': 'solved',
+            'runs': 3,
+            'p50': pytest.approx(20.0),
+            'p90': pytest.approx(28.0),
+            'p99': pytest.approx(29.8),
+            'max': pytest.approx(30.0),
+        }
+        return
+
+    assert 'Post-hook wall time of 4 runs, in ms:' in stdout
+    assert '  add      solved                 3      20.0      28.0' in stdout
+    assert '  init     skipped (failed)       1       1.0       1.0' in stdout
+
+
+def test_constrain_stats_clear(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+) -> None:
+    """Test ``constrain stats --clear`` deletes the records.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    path = tmp_path / STATS_FILE_NAME
+    append_record(path, _record('add', 0.01))
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    assert poetry_tester.execute(f'constrain stats --clear --file {path}') == 0
+    assert not path.exists()
+
+    assert poetry_tester.execute(f'constrain stats --file {path}') == 0
+    assert 'No post-hook runs recorded' in poetry_tester.io.fetch_output()
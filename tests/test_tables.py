@@ -0,0 +1,42 @@
+"""Test ``tables.py``."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from poetry_plugin_constrain.tables import TableDiff, dependency_tables, diff_tables
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_dependency_tables(tmp_path: Path) -> None:
+    """Test the dependency tables of every group are read.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    path = tmp_path / 'pyproject.toml'
+    path.write_text(
+        '[tool.poetry.dependencies]\nfoo = "^1.0"\n\n'
+        '[tool.poetry.group.dev.dependencies]\nbar = { version = "~2.0" }\n',
+    )
+
+    assert dependency_tables(path) == {
+        'main': {'foo': '^1.0'},
+        'dev': {'bar': {'version': '~2.0'}},
+    }
+
+
+def test_diff_tables() -> None:
+    """Test only added, modified and removed entries are reported."""
+    old = {'main': {'foo': '^1.0', 'bar': '~2.0', 'baz': '^3.0'}, 'dev': {'qux': '^0.1'}}
+    new = {'main': {'foo': '^1.0', 'bar': '~2.1', 'new': '^4.0'}, 'docs': {'doc': '^1'}}
+
+    assert diff_tables(old, new) == TableDiff(
+        changed={'main': {'bar': '~2.1', 'new': '^4.0'}, 'docs': {'doc': '^1'}},
+        removed={'main': ['baz'], 'dev': ['qux']},
+    )
+    assert not diff_tables(new, new)
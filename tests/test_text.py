@@ -0,0 +1,225 @@
+"""Test ``text.py``."""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from poetry_plugin_constrain.commands import Error
+from poetry_plugin_constrain.text import (
+    InvalidConstraintTypeError,
+    Token,
+    constrain_text,
+    constrain_texts,
+    tokenize,
+)
+from tests.helpers import print_output
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+DEBUG = False
+
+
+@pytest.fixture(autouse=True)
+def _unset_constraint_env_vars(monkeypatch: pytest.MonkeyPatch) -> None:
+    for name in ('OLD', 'NEW'):
+        monkeypatch.delenv(f'POETRY_PLUGIN_CONSTRAIN_{name}', raising=False)
+
+
+@pytest.mark.parametrize(
+    ('line', 'expected'),
+    [
+        (
+            '[tool.poetry.group."dev".dependencies]  # x',
+            [('header', 'tool.poetry.group.dev.dependencies', '', 0, 0)],
+        ),
+        ('foo = "^1.2"  # "^9"', [('string', 'foo', '^1.2', 7, 11)]),
+        (
+            'bar = { version = "~2.0", optional = true }',
+            [('version', 'version', '~2.0', 19, 23)],
+        ),
+        (
+            '    { version = "^1", python = "<3" },',
+            [('version', 'version', '^1', 17, 19)],
+        ),
+        ('# foo = "^1.2"', []),
+        ('', []),
+    ],
+)
+def test_tokenize(line: str, expected: list[tuple[Any, ...]]) -> None:
+    """Test headers, string values and inline table versions are found.
+
+    Parameters
+    ----------
+    line : str
+        A line of ``TOML``
+    expected : list[tuple[Any, ...]]
+        The expected tokens
+    """
+    assert tokenize(line) == tuple(Token(*token) for token in expected)
+
+
+def test_constrain_text(fixture_dir: Path) -> None:
+    """Test the rewrite matches ``poetry constrain`` and keeps the rest of the text.
+
+    Parameters
+    ----------
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    """
+    text = (fixture_dir / 'test_constrain_command.toml').read_text()
+    expected = (fixture_dir / 'test_constrain_command_expected.toml').read_text()
+
+    assert constrain_text(text) == expected
+    assert constrain_text(expected) == expected
+
+
+def test_constrain_text_options() -> None:
+    """Test the groups and constraint types can be chosen."""
+    text = (
+        '[tool.poetry.dependencies]\n'
+        'foo = "^1.0 || ~2.0"\n'
+        '\n'
+        '[tool.poetry.group.dev.dependencies]\n'
+        'bar = { version = "^3.0", extras = ["x"] }  # ^4\n'
+        '\n'
+        '[tool.poetry-plugin-constrain]\n'
+        'new = "gt"\n'
+    )
+
+    assert constrain_text(text).splitlines()[1:5] == [
+        'foo = ">1.0 || ~2.0"',
+        '',
+        '[tool.poetry.group.dev.dependencies]',
+        'bar = { version = ">3.0", extras = ["x"] }  # ^4',
+    ]
+    assert constrain_text(text, old='tilde', new='ge').splitlines()[1] == (
+        'foo = "^1.0 || >=2.0"'
+    )
+    assert constrain_text(text, only=['dev']).splitlines()[1] == 'foo = "^1.0 || ~2.0"'
+    assert '"^3.0"' in constrain_text(text, without=['dev']).splitlines()[4]
+    # '--only' takes precedence over '--without'
+    assert '">3.0"' in constrain_text(text, only=['dev'], without=['dev']).splitlines()[4]
+
+    with pytest.raises(InvalidConstraintTypeError) as exc_info:
+        constrain_text(text, old='hat')
+
+    assert exc_info.value.kind == 'old'
+
+
+def test_constrain_texts_throughput(fixture_dir: Path) -> None:
+    """Test many documents are rewritten in a batch without reading any file.
+
+    Parameters
+    ----------
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    """
+    text = (fixture_dir / 'test_constrain_command.toml').read_text()
+    texts = [text.replace('0.1.0', f'0.{ndx}.0') for ndx in range(1000)]
+
+    start = time.perf_counter()
+    results = list(constrain_texts(texts, old='caret', new='ge'))
+    elapsed = time.perf_counter() - start
+
+    assert results[123].count('>=0.123.0') == 1
+    # Far below the target of thousands of documents per second, to stay reliable
+    assert len(results) / elapsed > 200
+
+
+def test_constrain_filter(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    fixture_dir: Path,
+) -> None:
+    """Test ``poetry constrain filter`` rewrites ``stdin`` to ``stdout``.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    fixture_dir : Path
+        A ``poetry_plugin_constrain`` fixture that returns the ``Path`` to the
+        ``pyproject.toml`` file fixtures.
+    """
+    project = project_factory('test_constrain_command.toml')
+    original = project.pyproject.path.read_text()
+    poetry_tester = poetry_tester_factory(project)
+
+    text = (fixture_dir / 'test_constrain_command.toml').read_text()
+
+    status_code = poetry_tester.execute('constrain filter --only test', inputs=text)
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    output = poetry_tester.io.fetch_output()
+
+    assert status_code == 0
+    assert output == constrain_text(text, only=['test'])
+    assert 'coverage = { extras = ["toml"], version = ">=6.4" }' in output
+    assert 'foo = "^0.1.0"' in output
+    # The project is neither read nor written
+    assert project.pyproject.path.read_text() == original
+
+    status_code = poetry_tester.execute('constrain filter --new hat', inputs=text)
+
+    assert status_code == Error.INVALID_NEW_CONSTRAINT
+    assert "'new' constraint 'hat' is invalid." in poetry_tester.io.fetch_error()
+
+
+def test_constrain_filter_document_config(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+) -> None:
+    """Test ``poetry constrain filter`` uses the configuration in the document.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    """
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+
+    text = """\
+[tool.poetry.dependencies]
+foo = "~1.2"
+bar = "^2.0"
+
+[tool.poetry-plugin-constrain]
+old = "tilde"
+"""
+
+    status_code = poetry_tester.execute('constrain filter', inputs=text)
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    output = poetry_tester.io.fetch_output()
+
+    assert status_code == 0
+    assert 'foo = ">=1.2"' in output
+    assert 'bar = "^2.0"' in output
+
+    # The options take precedence over the document
+    status_code = poetry_tester.execute('constrain filter --old caret', inputs=text)
+
+    output = poetry_tester.io.fetch_output()
+
+    assert status_code == 0
+    assert 'foo = "~1.2"' in output
+    assert 'bar = ">=2.0"' in output
@@ -0,0 +1,396 @@
+"""Test ``tracing.py``."""
+
+from __future__ import annotations
+
+import json
+from importlib import metadata
+from typing import TYPE_CHECKING, Any, ClassVar, Iterator
+
+import pytest
+
+from poetry_plugin_constrain import tracing
+from poetry_plugin_constrain.commands import Error
+from poetry_plugin_constrain.tracing import (
+    ENTRY_POINT_GROUP,
+    ChromeTraceExporter,
+    InvalidListenerError,
+    Span,
+    SpanListener,
+    load_listeners,
+    span,
+    tracing_session,
+)
+from tests.benchmarks.projects import generate_pyproject, repository
+from tests.helpers import print_output
+
+DEBUG = False
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+
+class RecordingListener(SpanListener):
+    """Record the events of the spans, and every listener created."""
+
+    instances: ClassVar[list[RecordingListener]] = []
+
+    def __init__(self) -> None:
+        self.events: list[tuple[str, str]] = []
+        self.closed = False
+        self.instances.append(self)
+
+    def on_start(self, span: Span) -> None:
+        """Record the start of a span."""
+        self.events.append(('start', span.name))
+
+    def on_end(self, span: Span) -> None:
+        """Record the end of a span."""
+        self.events.append(('end', span.name))
+
+    def close(self) -> None:
+        """Record the listener was closed."""
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def _reset_instances() -> Iterator[None]:
+    RecordingListener.instances.clear()
+
+    # Entry points are mocked by some tests, and only looked up once per process
+    tracing._entry_point_factories.cache_clear()
+    yield
+    tracing._entry_point_factories.cache_clear()
+
+
+def _read_trace(path: Path) -> list[dict[str, Any]]:
+    return json.loads(path.read_text())['traceEvents']
+
+
+def test_span_without_listeners() -> None:
+    """Test spans are a shared no-op context manager without listeners."""
+    assert span('solve') is span('write-pyproject', 'write', path='pyproject.toml')
+
+    with span('solve'):
+        pass
+
+
+def test_tracing_session() -> None:
+    """Test listeners are told of nested spans, then detached and closed."""
+    listener = RecordingListener()
+
+    with tracing_session([listener]):
+        with span('constrain', 'command'), span('solve'):
+            pass
+
+        with pytest.raises(RuntimeError), span('write-pyproject'):
+            raise RuntimeError
+
+    assert listener.events == [
+        ('start', 'constrain'),
+        ('start', 'solve'),
+        ('end', 'solve'),
+        ('end', 'constrain'),
+        ('start', 'write-pyproject'),
+        ('end', 'write-pyproject'),
+    ]
+    assert listener.closed
+    assert span('solve') is span('constrain')
+
+
+def test_chrome_trace_exporter(tmp_path: Path) -> None:
+    """Test the spans are written as complete trace events, in microseconds.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    exporter = ChromeTraceExporter(tmp_path / 'trace-{pid}.json')
+
+    with tracing_session([exporter]), span('constrain', 'command'):
+        with span('write-report', 'write', path=tmp_path):
+            pass
+
+        with pytest.raises(ValueError, match='invalid'), span('solve'):
+            raise ValueError('invalid')
+
+    assert '{pid}' not in exporter.path.name
+
+    events = {event['name']: event for event in _read_trace(exporter.path)}
+
+    assert set(events) == {'constrain', 'write-report', 'solve'}
+    assert {event['ph'] for event in events.values()} == {'X'}
+    assert events['write-report']['args'] == {'path': str(tmp_path)}
+    assert events['solve']['args'] == {'error': 'ValueError'}
+
+    outer, inner = events['constrain'], events['write-report']
+    assert outer['ts'] <= inner['ts']
+    assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+
+
+def test_load_listeners(tmp_path: Path) -> None:
+    """Test listeners are created from references and a trace output file.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    listeners = load_listeners(
+        output=str(tmp_path / 'trace.json'),
+        listeners='tests.test_tracing:RecordingListener, tests.test_tracing:SpanListener',
+    )
+
+    assert [type(listener) for listener in listeners] == [
+        RecordingListener,
+        SpanListener,
+        ChromeTraceExporter,
+    ]
+
+    # A session is open, whose listeners are told of the spans of nested runs
+    with tracing_session(listeners):
+        assert load_listeners(output=str(tmp_path / 'nested.json')) == []
+
+
+@pytest.mark.parametrize(
+    ('reference', 'exception'),
+    [
+        ('tests.test_tracing', InvalidListenerError),
+        ('tests.test_tracing:MissingListener', AttributeError),
+        ('tests.missing_module:RecordingListener', ImportError),
+    ],
+)
+def test_load_listeners_invalid(reference: str, exception: type[Exception]) -> None:
+    """Test invalid references raise.
+
+    Parameters
+    ----------
+    reference : str
+        A reference to a listener factory
+    exception : type[Exception]
+        The expected exception
+    """
+    with pytest.raises(exception):
+        load_listeners(listeners=reference)
+
+
+@pytest.mark.skipif(
+    not hasattr(metadata, 'EntryPoints'),
+    reason='Entry points cannot be built before Python 3.10',
+)
+def test_load_listeners_entry_points(mocker: MockerFixture) -> None:
+    """Test listeners are created from the entry points of installed packages.
+
+    Parameters
+    ----------
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    """
+    mocker.patch(
+        'importlib.metadata.entry_points',
+        return_value=metadata.EntryPoints(
+            [
+                metadata.EntryPoint(
+                    name='recording',
+                    value='tests.test_tracing:RecordingListener',
+                    group=ENTRY_POINT_GROUP,
+                ),
+            ],
+        ),
+    )
+
+    assert [type(listener) for listener in load_listeners()] == [RecordingListener]
+
+
+def test_load_listeners_scans_entry_points_once(mocker: MockerFixture) -> None:
+    """Test the entry points are only looked up by the first run of the process.
+
+    Parameters
+    ----------
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    """
+    entry_points = mocker.spy(metadata, 'entry_points')
+
+    assert load_listeners() == []
+    assert load_listeners(listeners='tests.test_tracing:RecordingListener') != []
+    assert load_listeners() == []
+
+    assert entry_points.call_count == 1
+
+
+@pytest.mark.parametrize('argv', ['constrain', 'constrain --lock', 'constrain --dry-run'])
+def test_constrain_trace_output(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+    argv: str,
+) -> None:
+    """Test ``--trace-output`` writes the spans of the run as a Chrome trace.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    argv : str
+        Commandline arguments
+    """
+    pyproject = tmp_path / 'pyproject.toml'
+    pyproject.write_text(generate_pyproject(10, groups=1))
+
+    # An absolute path replaces the fixture directory
+    project = project_factory(str(pyproject))
+    project.set_pool(repository(10))
+
+    poetry_tester = poetry_tester_factory(project)
+    path = tmp_path / 'trace.json'
+
+    status_code = poetry_tester.execute(f'{argv} --trace-output {path}')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == 0
+
+    names = [event['name'] for event in _read_trace(path)]
+
+    # Spans are reported as they end
+    assert names[-1] == 'constrain'
+    assert ('run-installer-update' in names) is ('--lock' in argv)
+    assert ('write-pyproject' in names) is ('--dry-run' not in argv)
+
+
+def test_constrain_trace_listeners_configured(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test the ``trace-listeners`` configuration variable attaches listeners.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    """
+    monkeypatch.setenv(
+        'POETRY_PLUGIN_CONSTRAIN_TRACE_LISTENERS',
+        'tests.test_tracing:RecordingListener',
+    )
+
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute('constrain --dry-run')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == 0
+
+    (listener,) = RecordingListener.instances
+    assert listener.events == [('start', 'constrain'), ('end', 'constrain')]
+    assert listener.closed
+
+
+def test_constrain_trace_listeners_invalid(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test an invalid listener reference fails the run before constraining.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    """
+    monkeypatch.setenv('POETRY_PLUGIN_CONSTRAIN_TRACE_LISTENERS', 'tests.test_tracing')
+
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute('constrain --dry-run')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == Error.INVALID_TRACE_LISTENER
+    assert 'Invalid trace listener' in poetry_tester.io.fetch_error()
+
+
+def test_post_hook_trace_output(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test the post-hook traces the ``constrain`` run it starts.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    mocker: MockerFixture
+        A ``pytest-mock`` fixture that creates a mock instance
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    path = tmp_path / 'trace.json'
+    monkeypatch.setenv('POETRY_PLUGIN_CONSTRAIN_TRACE_OUTPUT', str(path))
+
+    def _run_with(*args: Any) -> None:  # noqa: ARG001
+        # Like ``constrain``, which reports to the listeners of the post-hook
+        assert load_listeners(output=str(tmp_path / 'nested.json')) == []
+
+        with span('constrain', 'command'):
+            pass
+
+    mocker.patch(
+        'poetry.console.commands.update.UpdateCommand.handle',
+        return_value=0,
+    )
+    mocker.patch(
+        'poetry_plugin_constrain.plugins.ConstrainPlugin._run_with',
+        side_effect=_run_with,
+    )
+
+    project = project_factory('test_constrain_command.toml')
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute('update --lock')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == 0
+
+    events = _read_trace(path)
+
+    assert [event['name'] for event in events] == ['constrain', 'post-hook']
+    assert events[1]['args'] == {'command': 'update', 'argv': 'constrain --lock'}
+    assert not (tmp_path / 'nested.json').exists()
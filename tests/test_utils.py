@@ -13,6 +13,7 @@ from poetry.installation.executor import Executor as BaseExecutor
 from poetry_plugin_constrain.utils import (
     Style,
     _patch_io_writes,
+    constraint_types,
     deep_get,
     line,
     line_error,
@@ -302,6 +303,37 @@ def test_deep_get(
     assert deep_get(data, path) == expected_result
 
 
+@pytest.mark.parametrize(
+    ('constraints', 'expected_types'),
+    [
+        ('^1.2', ['caret']),
+        ('~1.2', ['tilde']),
+        ('~=1.2', ['compatible']),
+        ('>=1.2,<2', ['ge', 'lt']),
+        ('> 1.2, <= 2', ['gt', 'le']),
+        ('==1.2 || !=1.3', ['exact', 'ne']),
+        ('1.2.3', ['exact']),
+        ('1.2.*', ['wildcard']),
+        ('==1.2.*', ['wildcard']),
+        ('*', ['any']),
+    ],
+)
+def test_constraint_types(
+    constraints: str,
+    expected_types: list[str],
+) -> None:
+    """Test the ``constraint_types`` function.
+
+    Parameters
+    ----------
+    constraints : str
+        The version constraints to classify
+    expected_types : list[str]
+        The expected type of each single constraint
+    """
+    assert constraint_types(constraints) == expected_types
+
+
 @pytest.mark.parametrize(
     ('message', 'style', 'expected_output'),
     [
@@ -0,0 +1,295 @@
+"""Test ``verify.py``."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_constrain.commands import Error
+from poetry_plugin_constrain.verify import (
+    HAS_NUMPY,
+    Project,
+    build_violation_matrix,
+    load_project,
+)
+from tests.helpers import print_output
+
+DEBUG = False
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+BACKENDS = [
+    False,
+    pytest.param(
+        True,
+        marks=pytest.mark.skipif(not HAS_NUMPY, reason='numpy is not installed'),
+    ),
+]
+
+PYPROJECT_TOML = """\
+[tool.poetry]
+name = "{name}"
+version = "0.1.0"
+description = ""
+authors = ["<author@test.com>"]
+
+[tool.poetry.dependencies]
+python = "^3.8"
+foo = "{foo}"
+bar = {{ version = "~1.2", extras = ["baz"] }}
+local = {{ path = "../local" }}
+"""
+
+POETRY_LOCK = """\
+[[package]]
+name = "foo"
+version = "{foo}"
+
+[[package]]
+name = "bar"
+version = "{bar}"
+"""
+
+
+def _write_project(
+    path: Path,
+    foo_constraint: str,
+    foo_locked: str,
+    bar_locked: str,
+) -> Path:
+    path.mkdir()
+    (path / 'pyproject.toml').write_text(
+        PYPROJECT_TOML.format(name=path.name, foo=foo_constraint),
+    )
+    (path / 'poetry.lock').write_text(POETRY_LOCK.format(foo=foo_locked, bar=bar_locked))
+    return path
+
+
+def test_load_project(tmp_path: Path) -> None:
+    """Test ``load_project`` reads versioned constraints and locked versions.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    path = _write_project(tmp_path / 'a', '^1.2', '1.5.0', '1.2.7')
+
+    project = load_project(path)
+
+    assert project.constraints == {'foo': [['^1.2']], 'bar': [['~1.2']]}
+    assert project.locked == {'foo': '1.5.0', 'bar': '1.2.7'}
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+@pytest.mark.parametrize(
+    ('old', 'new', 'constraints', 'locked', 'expected_violations'),
+    [
+        ('caret', 'ge', {'foo': [['^1.2']]}, {'foo': '1.5.0'}, []),
+        ('caret', 'ge', {'foo': [['^1.2']]}, {'foo': '1.1.9'}, ['foo']),
+        ('caret', 'lt', {'foo': [['^1.2']]}, {'foo': '1.2.0'}, ['foo']),
+        ('caret', 'le', {'foo': [['^1.2']]}, {'foo': '1.2'}, []),
+        ('tilde', 'ge', {'foo': [['~1.2,<1.5']]}, {'foo': '1.5.0'}, ['foo']),
+        ('caret', 'ge', {'foo': [['^1.2 || ^3.0']]}, {'foo': '2.1'}, []),
+        ('caret', 'exact', {'foo': [['^1.2 || ^3.0']]}, {'foo': '2.1'}, ['foo']),
+        ('caret', 'ge', {'foo': [['<1', '^2']]}, {'foo': '2.5'}, []),
+        ('caret', 'ge', {'foo': [['^1'], ['<2']]}, {'foo': '2.0'}, ['foo']),
+        ('caret', 'ge', {'foo': [['^1.2']]}, {'foo': '1.2.0rc1'}, ['foo']),
+        ('caret', 'ge', {'foo': [['^1.2']]}, {'foo': '1.2.0.post1'}, []),
+        ('caret', 'ge', {'foo': [['!=1.2.*']]}, {'foo': '1.2.3'}, ['foo']),
+        ('caret', 'ge', {'foo': [['^1.2']], 'bar': [['^1']]}, {'bar': '0.9'}, ['bar']),
+    ],
+)
+def test_build_violation_matrix(
+    use_numpy: bool,  # noqa: FBT001
+    old: str,
+    new: str,
+    constraints: dict[str, list[list[str]]],
+    locked: dict[str, str],
+    expected_violations: list[str],
+) -> None:
+    """Test ``build_violation_matrix`` agrees with ``VersionConstraint.allows``.
+
+    Parameters
+    ----------
+    use_numpy : bool
+        Whether to vectorize the comparisons with ``numpy``
+    old : str
+        The constraint to replace
+    new : str
+        The constraint to replace ``old`` with
+    constraints : dict[str, list[list[str]]]
+        The project constraints
+    locked : dict[str, str]
+        The project locked versions
+    expected_violations : list[str]
+        The packages expected to violate the policy
+    """
+    projects = [Project('a', constraints, locked)]
+
+    matrix = build_violation_matrix(projects, old=old, new=new, use_numpy=use_numpy)
+
+    assert [package for _, package, _, _ in matrix] == expected_violations
+    for package in expected_violations:
+        assert matrix.violations[0][matrix.packages.index(package)]
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_build_violation_matrix_many_projects(
+    use_numpy: bool,  # noqa: FBT001
+) -> None:
+    """Test the matrix rows and columns line up across many projects.
+
+    Parameters
+    ----------
+    use_numpy : bool
+        Whether to vectorize the comparisons with ``numpy``
+    """
+    projects = [
+        Project(
+            f'p{i}',
+            {'foo': [[f'^1.{i}']], f'only-{i}': [['^2']]},
+            {'foo': f'1.{i + (i % 2)}.0', f'only-{i}': '2.0.0'},
+        )
+        for i in range(50)
+    ]
+
+    matrix = build_violation_matrix(projects, old='caret', new='le', use_numpy=use_numpy)
+
+    assert matrix.packages[0] == 'foo'
+    assert [project for project, _, _, _ in matrix] == [f'p{i}' for i in range(1, 50, 2)]
+    for i in range(50):
+        assert matrix.checked[i][0]
+        assert matrix.checked[i][matrix.packages.index(f'only-{i}')]
+        assert not matrix.checked[i][matrix.packages.index(f'only-{(i + 1) % 50}')]
+
+
+def test_verify_command(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+) -> None:
+    """Test ``poetry constrain verify`` reports violations with a non-zero exit code.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    """
+    good = _write_project(tmp_path / 'good', '^1.2', '1.5.0', '1.2.7')
+    bad = _write_project(tmp_path / 'bad', '^1.2', '1.1.0', '1.2.7')
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute(f'constrain verify {good}')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == 0
+
+    status_code = poetry_tester.execute(f'constrain verify {good} {bad}')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == Error.POLICY_VIOLATIONS_FOUND
+    assert f'{bad}: foo 1.1.0 is not allowed by >=1.2' in poetry_tester.io.fetch_output()
+
+
+@pytest.mark.parametrize('pyproject', [None, '[tool.poetry\n'])
+def test_verify_command_invalid_pyproject(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+    pyproject: str | None,
+) -> None:
+    """Test projects without a valid ``pyproject.toml`` are reported, not raised.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    pyproject : str | None
+        The content of ``pyproject.toml``, or ``None`` if it is missing
+    """
+    good = _write_project(tmp_path / 'good', '^1.2', '1.5.0', '1.2.7')
+    invalid = tmp_path / 'invalid'
+    invalid.mkdir()
+    if pyproject is not None:
+        (invalid / 'pyproject.toml').write_text(pyproject)
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute(f'constrain verify {good} {invalid}')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == Error.INVALID_PYPROJECT
+    assert f'Could not read {invalid}' in poetry_tester.io.fetch_error()
+    assert 'All locked versions are allowed' in poetry_tester.io.fetch_output()
+
+
+@pytest.mark.parametrize(
+    ('foo_constraint', 'foo_locked'),
+    [('not-a-version', '1.5.0'), ('^1.2', 'not-a-version')],
+)
+def test_verify_command_malformed_entry(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+    foo_constraint: str,
+    foo_locked: str,
+) -> None:
+    """Test projects with a malformed constraint or locked version are reported.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    foo_constraint : str
+        The constraint of ``foo`` in the malformed project
+    foo_locked : str
+        The locked version of ``foo`` in the malformed project
+    """
+    good = _write_project(tmp_path / 'good', '^1.2', '1.5.0', '1.2.7')
+    malformed = _write_project(
+        tmp_path / 'malformed', foo_constraint, foo_locked, '1.2.7'
+    )
+
+    with pytest.raises(ValueError, match='not-a-version'):
+        load_project(malformed)
+
+    project = project_factory()  # type: ignore[call-arg]
+    poetry_tester = poetry_tester_factory(project)
+
+    status_code = poetry_tester.execute(f'constrain verify {good} {malformed}')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    assert status_code == Error.INVALID_PYPROJECT
+    assert f'Could not read {malformed}' in poetry_tester.io.fetch_error()
+    assert 'All locked versions are allowed' in poetry_tester.io.fetch_output()
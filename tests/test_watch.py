@@ -0,0 +1,196 @@
+"""Test ``watch.py``."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from poetry_plugin_constrain.watch import InotifyWatcher, PollingWatcher
+from tests.helpers import print_output
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .conftest import PoetryTesterFactory, ProjectFactory
+
+DEBUG = False
+
+
+def _save_later(path: Path, text: str, *, replace: bool = False) -> threading.Timer:
+    def save() -> None:
+        if replace:
+            # As editors that write a new file and rename it over the old one
+            temporary = path.with_name(f'.{path.name}.swp')
+            temporary.write_text(text)
+            temporary.replace(path)
+        else:
+            path.write_text(text)
+
+    timer = threading.Timer(0.1, save)
+    timer.start()
+    return timer
+
+
+@pytest.mark.parametrize('replace', [False, True], ids=['write', 'replace'])
+def test_polling_watcher(tmp_path: Path, replace: bool) -> None:  # noqa: FBT001
+    """Test the polling watcher notices a save.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    replace : bool
+        Whether the file is replaced rather than written in place
+    """
+    path = tmp_path / 'pyproject.toml'
+    path.write_text('a = 1\n')
+
+    watcher = PollingWatcher(path, interval=0.01)
+
+    assert not watcher.wait(timeout=0.05)
+
+    _save_later(path, 'a = 22\n', replace=replace).join()
+
+    assert watcher.wait(timeout=5)
+    watcher.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='Requires inotify')
+@pytest.mark.parametrize('replace', [False, True], ids=['write', 'replace'])
+def test_inotify_watcher(tmp_path: Path, replace: bool) -> None:  # noqa: FBT001
+    """Test the ``inotify`` watcher notices a save, but not changes to other files.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A ``pytest`` fixture that returns a temporary path for testing
+    replace : bool
+        Whether the file is replaced rather than written in place
+    """
+    path = tmp_path / 'pyproject.toml'
+    path.write_text('a = 1\n')
+
+    watcher = InotifyWatcher(path)
+
+    try:
+        (tmp_path / 'poetry.lock').write_text('')
+        assert not watcher.wait(timeout=0.1)
+
+        timer = _save_later(path, 'a = 2\n', replace=replace)
+        start = time.monotonic()
+
+        assert watcher.wait(timeout=5)
+        assert time.monotonic() - start < 5
+        timer.join()
+    finally:
+        watcher.close()
+
+
+class _FakeWatcher:
+    """Apply a list of edits to a file, one per wait, then stop the watch."""
+
+    def __init__(self, path: Path, edits: list[str]) -> None:
+        self.path = path
+        self.edits = edits
+        self.closed = False
+
+    def wait(self, timeout: float | None = None) -> bool:  # noqa: ARG002
+        if not self.edits:
+            raise KeyboardInterrupt
+
+        self.path.write_text(self.edits.pop(0))
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_constrain_watch(
+    poetry_tester_factory: PoetryTesterFactory,
+    project_factory: ProjectFactory,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test ``poetry constrain --watch`` only rewrites and checks changed entries.
+
+    Parameters
+    ----------
+    poetry_tester_factory : PoetryTesterFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry``
+        ``ApplicationTester`` instance.
+    project_factory : ProjectFactory
+        A ``poetry_plugin_constrain`` fixture that creates a ``poetry`` project.
+    monkeypatch : pytest.MonkeyPatch
+        A ``pytest`` fixture to modify the environment
+    """
+    project = project_factory('test_constrain_command.toml')
+    path = project.pyproject.path
+    original = path.read_text()
+
+    edited = original.replace('foo = "^0.1.0"', 'foo = "^0.2.0"')
+    edits = [
+        edited,
+        f'{edited}\nunterminated = "\n',
+        edited.replace('bar = "~1.2.3"  # Test tilde requirement\n', ''),
+    ]
+    final = edits[-1]
+    watcher = _FakeWatcher(path, edits)
+    checked: list[dict[str, list[str]]] = []
+
+    def run_installer_update(
+        dependencies_by_group: dict[str, list[Any]],
+        **kwargs: Any,  # noqa: ARG001
+    ) -> int:
+        checked.append(
+            {
+                group: [dependency.name for dependency in dependencies]
+                for group, dependencies in dependencies_by_group.items()
+            },
+        )
+        return 0
+
+    monkeypatch.setattr(
+        'poetry_plugin_constrain.watch.create_watcher',
+        lambda path: watcher,  # noqa: ARG005
+    )
+    monkeypatch.setattr(
+        'poetry_plugin_constrain.commands.run_installer_update',
+        run_installer_update,
+    )
+
+    poetry_tester = poetry_tester_factory(project)
+    status_code = poetry_tester.execute('constrain --watch --check')
+
+    if DEBUG:
+        print_output(poetry_tester)
+
+    output = poetry_tester.io.fetch_output()
+    error = poetry_tester.io.fetch_error()
+
+    assert status_code == 0
+    assert watcher.closed
+    assert edits == []
+
+    # Nothing is written
+    assert path.read_text() == final
+
+    # The first pass covers every entry, then only the changed ones
+    assert 'main: foo: ^0.1.0 --> >=0.1.0' in output
+    assert 'main: foo: ^0.2.0 --> >=0.2.0' in output
+    assert 'Changed 1 and removed 0 dependency entries.' in output
+    assert 'Changed 0 and removed 1 dependency entries.' in output
+    # Removing an entry leaves nothing to check
+    assert output.count('Dependency check successful.') == 2
+
+    # The invalid TOML is reported and the previous snapshot kept
+    assert 'ERROR:' in error
+
+    assert 'foo' in checked[0]['main']
+    assert checked[1:] == [{'main': ['foo']}]
+    assert 'bar' not in [
+        dependency.name
+        for dependency in project.package.dependency_group('main').dependencies
+    ]